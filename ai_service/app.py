@@ -11,7 +11,7 @@ import logging
 from datetime import datetime
 import time
 import requests
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Callable
 from pathlib import Path
 import backoff
 import subprocess
@@ -19,6 +19,22 @@ from mysql.connector import pooling
 import threading
 import uuid
 import json
+import bisect
+import queue
+import atexit
+import signal
+import hashlib
+import itertools
+import sqlite3
+import numpy as np
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, deque
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # no flock on Windows: every worker warms its own premade table
 
 # Configure comprehensive logging
 logging.basicConfig(
@@ -85,10 +101,51 @@ DB_CONFIG = {
     'password': os.getenv('DB_PASS', ''),
     'database': os.getenv('DB_NAME', 'defaultdb'),
     'pool_name': 'mypool',
-    'pool_size': 2,  # Reduced from 5 to save memory
+    'pool_size': int(os.getenv('DB_POOL_SIZE', 2)),  # Reduced from 5 to save memory
     'ssl_disabled': os.getenv('DB_SSL', 'true').lower() != 'true'
 }
 
+# Seconds a request waits for a free pooled connection before giving up
+DB_POOL_WAIT_TIMEOUT = float(os.getenv('DB_POOL_WAIT_TIMEOUT', 5))
+
+# How recommendation_components stores parts: 'reference' keeps component_id plus a price snapshot
+# and rehydrates the rest from the catalog on read; 'copy' stores the full row (image_url included)
+RECOMMENDATION_COMPONENT_STORAGE = os.getenv('RECOMMENDATION_COMPONENT_STORAGE', 'reference').lower()
+
+# Seconds between MAX(last_updated)/COUNT(*) checks that version caches when the catalog is off
+COMPONENTS_VERSION_TTL = float(os.getenv('COMPONENTS_VERSION_TTL', 10))
+
+# Host-wide cache shared by all worker processes (SQLite in WAL mode under CACHE_DIR)
+SHARED_CACHE_ENABLED = os.getenv('SHARED_CACHE', 'true').lower() == 'true'
+# Seconds entries of superseded catalog versions are kept for workers that have not refreshed yet
+SHARED_CACHE_RETENTION = float(os.getenv('SHARED_CACHE_RETENTION', 600))
+
+# Threads shared by all requests for computing a recommendation's budget/balanced/premium tiers
+BUILD_TIER_WORKERS = int(os.getenv('BUILD_TIER_WORKERS', 3))
+
+# Precompute premade builds for every budget tier in the background after startup (persisted under CACHE_DIR)
+PREMADE_WARMUP_ENABLED = os.getenv('PREMADE_WARMUP', 'true').lower() == 'true'
+
+# Write-behind recommendation persistence (/generate replies before the INSERTs run)
+RECOMMENDATION_WRITE_BEHIND = os.getenv('RECOMMENDATION_WRITE_BEHIND', 'true').lower() == 'true'
+
+# In-memory component catalog (serves price-window searches without hitting MySQL)
+CATALOG_ENABLED = os.getenv('CATALOG_ENABLED', 'true').lower() == 'true'
+# Rows fetched per component type when prefetching a build's candidate pool from SQL
+CANDIDATE_PREFETCH_LIMIT = int(os.getenv('CANDIDATE_PREFETCH_LIMIT', 200))
+
+# Parsed queries and translations kept per normalized message (repeated prompts and PHP retries)
+MESSAGE_CACHE_SIZE = int(os.getenv('MESSAGE_CACHE_SIZE', 1024))
+# Longer messages are not cached, so the caches stay within size * this many characters
+MESSAGE_CACHE_MAX_CHARS = int(os.getenv('MESSAGE_CACHE_MAX_CHARS', 2000))
+
+# Translations persisted under CACHE_DIR (SQLite), trimmed to the most recently used entries
+TRANSLATION_CACHE_ENABLED = os.getenv('TRANSLATION_CACHE', 'true').lower() == 'true'
+TRANSLATION_CACHE_MAX_ENTRIES = int(os.getenv('TRANSLATION_CACHE_MAX_ENTRIES', 50000))
+TRANSLATION_CACHE_COMPACT_INTERVAL = float(os.getenv('TRANSLATION_CACHE_COMPACT_INTERVAL', 600))
+# Share of a message's non-English words the offline lexicon must cover to skip the translation API
+TAGLISH_MIN_COVERAGE = float(os.getenv('TAGLISH_MIN_COVERAGE', 1.0))
+
 # Create connection pool
 try:
     connection_pool = pooling.MySQLConnectionPool(**DB_CONFIG)
@@ -144,6 +201,31 @@ def to_float(value):
     else:
         return float(value)
 
+def answer_from_window(rows: List[Dict], prices: List[float], window: Tuple[float, float, int],
+                       min_price: float = None, max_price: float = None, limit: int = 50) -> Optional[List[Dict]]:
+    """
+    Answer a (min_price, max_price, limit, ORDER BY price) query from the price-sorted rows
+    of an earlier, wider window query. Returns None when those rows may be incomplete.
+    Falsy bounds mean "no bound", as in search_components.
+    """
+    window_min, window_max, window_limit = window
+    if window_min and (not min_price or min_price < window_min):
+        return None
+    
+    lo = bisect.bisect_left(prices, to_float(min_price)) if min_price else 0
+    if len(rows) < window_limit:
+        # Window was not truncated: every row up to window_max is present
+        if window_max and (not max_price or max_price > window_max):
+            return None
+    else:
+        # Truncated window: rows are only known to be complete below the last fetched price
+        last_price = prices[-1]
+        if not (max_price and max_price < last_price) and bisect.bisect_left(prices, last_price) - lo < limit:
+            return None
+    
+    hi = bisect.bisect_right(prices, to_float(max_price)) if max_price else len(prices)
+    return [dict(row) for row in rows[lo:min(hi, lo + limit)]]
+
 # Enhanced model initialization with memory optimization
 class RobustAIModel:
     def __init__(self):
@@ -230,184 +312,1909 @@ class RobustAIModel:
 
 ai_model = RobustAIModel()
 
-# Database Manager with Smart Component Search
-class DatabaseManager:
-    def __init__(self):
-        self.pool = connection_pool
+# Component compatibility attributes
+# Every component is reduced once (at catalog load) to a tuple of small integers
+# (socket mask, memory mask, form factor mask, watts) so compatibility rules are bitmask
+# tests. 0 means the attribute could not be parsed and never makes a build incompatible.
+def _compact_spec(value) -> str:
+    """'Micro ATX' -> 'microatx', 'LGA 1700' -> 'lga1700'"""
+    return re.sub(r'[\s_\-]+', '', str(value).lower())
+
+SOCKET_BITS = {_compact_spec(socket): 1 << bit for bit, socket in enumerate([
+    'AM5', 'AM4', 'AM3+', 'AM3', 'AM2+', 'AM2', 'AM1', 'FM2+', 'FM2', 'FM1', 'sTR5', 'sTRX4', 'sTR4',
+    'LGA1851', 'LGA1700', 'LGA1200', 'LGA1151', 'LGA1150', 'LGA1155', 'LGA1156', 'LGA1366',
+    'LGA2066', 'LGA2011-3', 'LGA2011', 'LGA775'
+])}
+SOCKET_NAMES = {bit: socket for socket, bit in SOCKET_BITS.items()}
+MEMORY_BITS = {'ddr3': 1, 'ddr4': 2, 'ddr5': 4}
+FORM_FACTOR_BITS = {'eatx': 1, 'atx': 2, 'microatx': 4, 'miniitx': 8}
+# Boards a case holds: its own size and every smaller one
+CASE_FORM_FACTORS = {'eatx': 15, 'atx': 14, 'microatx': 12, 'miniitx': 8}
+# Memory a socket's boards take when the board itself does not say (LGA1700 boards exist for both)
+SOCKET_MEMORY = {
+    'am5': 4, 'lga1851': 4, 'lga1700': 6, 'am4': 2, 'lga1200': 2, 'lga1151': 2, 'lga2066': 2,
+    'lga20113': 2, 'str4': 2, 'strx4': 2, 'am3+': 1, 'am3': 1, 'fm2+': 1, 'fm2': 1,
+    'lga1150': 1, 'lga1155': 1
+}
+CPU_MICROARCHITECTURE_SOCKETS = {
+    'zen5': 'am5', 'zen4': 'am5', 'zen3': 'am4', 'zen2': 'am4', 'zen+': 'am4', 'zen': 'am4',
+    'arrowlake': 'lga1851', 'raptorlakerefresh': 'lga1700', 'raptorlake': 'lga1700', 'alderlake': 'lga1700',
+    'rocketlake': 'lga1200', 'cometlake': 'lga1200', 'coffeelakerefresh': 'lga1151', 'coffeelake': 'lga1151'
+}
+CPU_MODEL_SOCKETS = [
+    (re.compile(r'core\s+ultra\s+[3579]\s+2\d\d'), 'lga1851'),
+    (re.compile(r'\bi[3579]-1[234]\d{3}'), 'lga1700'),
+    (re.compile(r'\bi[3579]-1[01]\d{3}'), 'lga1200'),
+    (re.compile(r'\bi[3579]-[6-9]\d{3}'), 'lga1151'),
+    (re.compile(r'ryzen\s+[3579]\s+[7-9]\d{3}'), 'am5'),
+    (re.compile(r'ryzen\s+[3579]\s+[1-5]\d{3}'), 'am4'),
+    (re.compile(r'\b(am[45]|lga\s?1[0-9]{3})\b'), None),  # socket named in the model itself
+]
+# Watts a build draws besides the CPU and GPU (board, memory, drives, fans)
+BASE_SYSTEM_WATTS = 100
+
+def _socket_mask(value) -> int:
+    mask = 0
+    for part in re.split(r'[/,]', str(value)):
+        part = re.sub(r'^\s*\d+\s*x\s*', '', part)  # "2 x LGA2011-3" (dual socket)
+        mask |= SOCKET_BITS.get(_compact_spec(part).replace('narrow', ''), 0)
+    return mask
+
+def _form_factor(text: str) -> Optional[str]:
+    text = _compact_spec(text)
+    if 'eatx' in text or 'extendedatx' in text:
+        return 'eatx'
+    if 'microatx' in text or 'matx' in text:
+        return 'microatx'
+    if 'itx' in text:
+        return 'miniitx'
+    if 'atx' in text:
+        return 'atx'
+    return None
+
+def component_attributes(component_type: str, model: str, specs: Optional[Dict]) -> Tuple[int, int, int, int]:
+    """(socket mask, memory mask, form factor mask, watts) parsed from specs, falling back to the model name"""
+    specs = specs if isinstance(specs, dict) else {}
+    model = (model or '').lower()
+    socket = memory = form_factor = watts = 0
     
-    def get_connection(self):
-        """Get connection from pool with retry logic"""
-        try:
-            if self.pool:
-                return self.pool.get_connection()
-            return None
-        except Exception as e:
-            logger.error(f"Failed to get DB connection: {e}")
-            return None
+    if component_type == 'cpu':
+        if specs.get('socket'):
+            socket = _socket_mask(specs['socket'])
+        if not socket and specs.get('microarchitecture'):
+            socket = SOCKET_BITS.get(CPU_MICROARCHITECTURE_SOCKETS.get(_compact_spec(specs['microarchitecture'])), 0)
+        if not socket:
+            for pattern, name in CPU_MODEL_SOCKETS:
+                match = pattern.search(model)
+                if match:
+                    socket = SOCKET_BITS.get(name or _compact_spec(match.group(1)), 0)
+                    break
+        watts = int(to_float(specs.get('tdp')))
+    elif component_type == 'motherboard':
+        socket = _socket_mask(specs['socket']) if specs.get('socket') else 0
+        if not socket:
+            match = re.search(r'\b(am[45]|lga\s?1[0-9]{3})\b', model)
+            socket = SOCKET_BITS.get(_compact_spec(match.group(1)), 0) if match else 0
+        generation = re.search(r'ddr([345])', f"{specs.get('memory_type', '')} {model}".lower())
+        if generation:
+            memory = MEMORY_BITS[f"ddr{generation.group(1)}"]
+        else:
+            memory = SOCKET_MEMORY.get(SOCKET_NAMES.get(socket), 0)
+        name = _form_factor(specs.get('form_factor') or model)
+        form_factor = FORM_FACTOR_BITS[name] if name else 0
+    elif component_type == 'ram':
+        speed = specs.get('speed')
+        if isinstance(speed, (list, tuple)) and speed and str(speed[0]) in ('3', '4', '5'):
+            memory = MEMORY_BITS[f"ddr{speed[0]}"]
+        else:
+            generation = re.search(r'ddr([345])', f"{speed or ''} {model}".lower())
+            memory = MEMORY_BITS[f"ddr{generation.group(1)}"] if generation else 0
+    elif component_type == 'case':
+        compact = _compact_spec(' '.join(str(specs[key]) for key in ('type', 'form_factor') if specs.get(key)) or model)
+        name = 'eatx' if 'fulltower' in compact else _form_factor(compact)
+        if name is None and 'midtower' in compact:
+            name = 'atx'
+        elif name is None and 'minitower' in compact:
+            name = 'microatx'
+        form_factor = CASE_FORM_FACTORS[name] if name else 0
+    elif component_type == 'psu':
+        watts = int(to_float(specs.get('wattage')))
+        if not watts:
+            match = re.search(r'\b(\d{3,4})\s?w\b', model)
+            watts = int(match.group(1)) if match else 0
+    elif component_type == 'gpu':
+        watts = int(to_float(specs.get('tdp')))
     
-    def search_components(self, component_type: str = None, brand: str = None, 
-                         model_query: str = None, max_price: float = None, 
-                         min_price: float = None, limit: int = 50) -> List[Dict]:
-        """Advanced component search with multiple filters"""
-        conn = self.get_connection()
+    return socket, memory, form_factor, watts
+
+# Component performance scores
+# A raw, unitless score per component from its specs (0 when the specs say too little). Scores
+# only compare parts of one type; the catalog turns them into price-equivalent values per type.
+PSU_EFFICIENCY = {'titanium': 1.14, 'platinum': 1.11, 'gold': 1.08, 'silver': 1.05, 'bronze': 1.03, 'plus': 1.0}
+PSU_MODULAR = {'full': 1.05, 'semi': 1.02}
+# Storage interfaces from fastest: (compacted substring, factor); anything else is a hard drive
+STORAGE_INTERFACES = (('pcie50', 3.0), ('pcie5', 3.0), ('pcie40', 2.5), ('pcie4', 2.5),
+                      ('pcie', 2.0), ('nvme', 2.0), ('ssd', 1.5), ('m2', 1.5))
+# A part's value is kept within [price / clip, price * clip]
+PERFORMANCE_VALUE_CLIP = 2.0
+PERFORMANCE_MIN_SAMPLES = 8
+
+def _spec_number(value, index: int = -1) -> float:
+    """Number in a spec value: [5, 6000] -> 6000 (index picks from pairs/ranges), '5.2 GHz' -> 5.2"""
+    if isinstance(value, bool) or value is None:
+        return 0.0
+    if isinstance(value, (list, tuple)):
+        return _spec_number(value[index]) if value else 0.0
+    if isinstance(value, (int, float, Decimal)):
+        return float(value)
+    match = re.search(r'\d+(?:\.\d+)?', str(value))
+    return float(match.group(0)) if match else 0.0
+
+# GPU tier bumps for a model suffix within its class
+GPU_SUFFIXES = {'ti': 0.5, 'super': 0.25, 'xtx': 1.0, 'xt': 0.5, 'gre': 0.25}
+
+def _gpu_suffix(*names: Optional[str]) -> float:
+    return sum(GPU_SUFFIXES[name] for name in names if name)
+
+def _gpu_tier(chipset: str) -> float:
+    """
+    Model class plus suffix, scaled by generation: 'GeForce RTX 4070 Ti' -> (7 + 0.5) * 1.36,
+    'Radeon RX 9070 XT' -> (7 + 0.5) * 1.48. Generations line up with their contemporaries
+    across vendors (RTX 50 and RX 9000 share one).
+    """
+    compact = _compact_spec(chipset)
+    match = re.search(r'(?:rtx|gtx)(\d{2})(\d)0(ti)?(super)?', compact)  # RTX 4070 Ti SUPER
+    if match:
+        generation = {'10': 0, '16': 0.5}.get(match.group(1), int(match.group(1)) / 10 - 1)
+        return (int(match.group(2)) + _gpu_suffix(match.group(3), match.group(4))) * (1 + 0.12 * generation)
+    match = re.search(r'gtx([79])(\d)0(ti)?', compact)  # GTX 980 Ti
+    if match:
+        return (int(match.group(2)) + _gpu_suffix(match.group(3))) * (1 + 0.12 * (int(match.group(1)) - 10))
+    match = re.search(r'rx9\d(\d)0(xtx|xt|gre)?', compact)  # RX 9070 XT: the class is the third digit
+    if match:
+        return (int(match.group(1)) + _gpu_suffix(match.group(2))) * (1 + 0.12 * 4)
+    match = re.search(r'rx([5-7])(\d)(\d)0(xtx|xt|gre)?', compact)  # RX 6650 XT: refresh in the third digit
+    if match:
+        generation = int(match.group(1)) - 5
+        tier = int(match.group(2)) + 0.05 * int(match.group(3)) + _gpu_suffix(match.group(4))
+        return tier * (1 + 0.12 * generation)
+    match = re.search(r'rx([45])(\d)0', compact)  # RX 580
+    if match:
+        return int(match.group(2)) * (1 - 0.12 * (6 - int(match.group(1))))
+    match = re.search(r'arc([ab])(\d)\d0', compact)
+    if match:
+        return int(match.group(2)) * (1.12 if match.group(1) == 'b' else 1.0)
+    return 0.0
+
+def component_performance(component_type: str, model: str, specs: Optional[Dict]) -> float:
+    """Raw performance score of a component from its specs (0 = unknown)"""
+    specs = specs or {}
+    model = model or ''
+    if component_type == 'cpu':
+        cores = _spec_number(specs.get('core_count') or specs.get('cores'))
+        clock = _spec_number(specs.get('boost_clock') or specs.get('clock_speed') or specs.get('base_clock'))
+        return cores ** 0.6 * clock if cores and clock else 0.0
+    if component_type == 'gpu':
+        tier = _gpu_tier(str(specs.get('chipset') or model))
+        memory = _spec_number(specs.get('memory') or specs.get('memory_size'))
+        return tier * (memory ** 0.25 if memory else 1.0)
+    if component_type == 'ram':
+        modules = specs.get('modules')
+        if isinstance(modules, (list, tuple)) and len(modules) == 2:
+            capacity = _spec_number(modules, 0) * _spec_number(modules, 1)
+        else:
+            match = re.search(r'(\d+)\s?gb', model.lower())
+            capacity = float(match.group(1)) if match else 0.0
+        speed = _spec_number(specs.get('speed') or specs.get('speed_mhz'))
+        cas = _spec_number(specs.get('cas_latency'))
+        latency = _spec_number(specs.get('first_word_latency')) or (2000 * cas / speed if cas and speed else 0)
+        if not capacity:
+            return 0.0
+        return capacity ** 0.5 * (speed / 1000 / latency ** 0.5 if speed and latency else 1.0)
+    if component_type == 'storage':
+        capacity = _spec_number(specs.get('capacity'))
+        compact = _compact_spec(' '.join(str(specs.get(key) or '') for key in ('interface', 'type', 'form_factor')))
+        factor = next((factor for key, factor in STORAGE_INTERFACES if key in compact), 1.0)
+        return capacity ** 0.5 * factor if capacity else 0.0
+    if component_type == 'psu':
+        watts = _spec_number(specs.get('wattage'))
+        efficiency = _compact_spec(specs.get('efficiency') or specs.get('efficiency_rating') or '')
+        modular = _compact_spec(specs.get('modular') or '')
+        return (watts * next((factor for key, factor in PSU_EFFICIENCY.items() if key in efficiency), 1.0)
+                * next((factor for key, factor in PSU_MODULAR.items() if key in modular), 1.0))
+    if component_type == 'motherboard':
+        slots = _spec_number(specs.get('memory_slots'))
+        capacity = _spec_number(specs.get('max_memory'))
+        return slots ** 0.5 * capacity ** 0.25 if slots and capacity else 0.0
+    if component_type == 'cooler':
+        rpm = _spec_number(specs.get('rpm'))
+        noise = _spec_number(specs.get('noise_level')) or 25.0
+        size = _spec_number(specs.get('size')) or 120.0
+        return rpm / 1000 * size / 120 / (noise / 25) ** 0.5 if rpm else 0.0
+    if component_type == 'case-fan':
+        airflow = _spec_number(specs.get('airflow'))
+        noise = _spec_number(specs.get('noise_level')) or 25.0
+        return airflow / (noise / 25) ** 0.5 if airflow else 0.0
+    if component_type == 'monitor':
+        resolution = specs.get('resolution')
+        pixels = _spec_number(resolution, 0) * _spec_number(resolution, 1) if isinstance(resolution, (list, tuple)) else 0
+        refresh = _spec_number(specs.get('refresh_rate'))
+        size = _spec_number(specs.get('screen_size')) or 24.0
+        return (pixels / 2073600) ** 0.5 * (refresh / 60) ** 0.5 * size / 24 if pixels and refresh else 0.0
+    if component_type == 'mouse':
+        return _spec_number(specs.get('max_dpi')) ** 0.25
+    if component_type == 'speakers':
+        return _spec_number(specs.get('wattage')) ** 0.5
+    return 0.0
+
+def performance_values(prices: np.ndarray, scores: np.ndarray) -> np.ndarray:
+    """
+    Price-equivalent performance for the parts of one type: a log-log fit of price against score
+    values each part at what the catalog typically charges for its performance (above its price
+    is a bargain). Unscored parts, and types whose scores do not track price, are valued at
+    their price.
+    """
+    values = prices.astype(np.float64)
+    known = (scores > 0) & (prices > 0)
+    if known.sum() < PERFORMANCE_MIN_SAMPLES:
+        return values
+    log_prices, log_scores = np.log(prices[known]), np.log(scores[known])
+    if np.ptp(log_scores) == 0:
+        return values
+    slope, intercept = np.polyfit(log_scores, log_prices, 1)
+    if slope <= 0:  # better scores are not dearer in this type: no usable signal
+        return values
+    implied = np.exp(intercept + slope * log_scores)
+    values[known] = np.clip(implied, prices[known] / PERFORMANCE_VALUE_CLIP, prices[known] * PERFORMANCE_VALUE_CLIP)
+    return values
+
+# In-memory Component Catalog
+class CatalogTypeSlice:
+    """Price-sorted arrays for one component type (never mutated once published)"""
+    __slots__ = ('prices', 'ids', 'values')
+
+    def __init__(self, prices: np.ndarray, ids: np.ndarray, values: np.ndarray):
+        self.prices = prices
+        self.ids = ids
+        self.values = values  # performance_values() of the parts, aligned with prices
+
+class ComponentCatalog:
+    """
+    Process-local snapshot of the components table.
+    Answers the (type, min_price, max_price, limit, ORDER BY price) searches the build
+    generators issue with a binary search over per-type NumPy arrays instead of a query.
+    """
+
+    ROW_FIELDS = ('id', 'type', 'brand', 'model', 'price', 'currency',
+                  'image_url', 'source_url', 'last_updated')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.types: Dict[str, CatalogTypeSlice] = {}
+        self.rows: Dict[int, tuple] = {}  # id -> row tuple in ROW_FIELDS order
+        self.specs: Dict[int, Dict] = {}
+        self.attributes: Dict[int, Tuple[int, int, int, int]] = {}  # id -> component_attributes()
+        self.scores: Dict[int, float] = {}  # id -> component_performance()
+        self.values: Dict[int, float] = {}  # id -> price-equivalent performance (see performance_values)
+        self.loaded = False
+        self.loaded_at = None
+        self.load_seconds = 0.0
+        self.version = 0  # bumped on every content change; downstream caches key on it
+        self.watermark = None  # MAX(last_updated) seen so far
+        # (version, {type: (low, high) price range touched}) per change; None for a full load
+        self.changes = deque(maxlen=64)
+
+    def load(self, db) -> bool:
+        """Load the full components table into memory"""
+        conn = db.get_connection()
         if not conn:
-            return []
-        
+            return False
+
         try:
+            start = time.time()
             cursor = conn.cursor(dictionary=True)
-            
-            conditions = []
-            params = []
-            
-            if component_type:
-                conditions.append("type = %s")
-                params.append(component_type)
-            
-            if brand:
-                conditions.append("brand LIKE %s")
-                params.append(f"%{brand}%")
-            
-            if model_query:
-                conditions.append("(model LIKE %s OR MATCH(model) AGAINST(%s IN NATURAL LANGUAGE MODE))")
-                params.extend([f"%{model_query}%", model_query])
-            
-            if max_price:
-                conditions.append("price <= %s")
-                params.append(max_price)
-            
-            if min_price:
-                conditions.append("price >= %s")
-                params.append(min_price)
-            
-            where_clause = " AND ".join(conditions) if conditions else "1=1"
-            
-            query = f"""
-                SELECT id, type, brand, model, price, currency, image_url, 
-                       source_url, last_updated 
-                FROM components 
-                WHERE {where_clause}
-                ORDER BY price ASC
-                LIMIT %s
-            """
-            params.append(limit)
-            
-            cursor.execute(query, params)
-            results = cursor.fetchall()
-            
+            cursor.execute("""
+                SELECT id, type, brand, model, price, currency, image_url,
+                       source_url, last_updated, specs
+                FROM components
+            """)
+            rows = cursor.fetchall()
             cursor.close()
             conn.close()
-            
-            # Convert Decimal prices to float - ensure all are converted
-            for result in results:
-                if 'price' in result and result['price'] is not None:
-                    result['price'] = float(to_float(result['price']))  # Double conversion to ensure float
-            
-            return results
+
+            self.load_rows(rows)
+            self.load_seconds = time.time() - start
+            logger.info(f"Component catalog loaded: {len(self.rows)} components, "
+                        f"{len(self.types)} types in {self.load_seconds:.2f}s")
+            return True
         except Exception as e:
-            logger.error(f"Database search error: {e}")
+            logger.error(f"Component catalog load failed: {e}")
             if conn:
                 conn.close()
+            return False
+
+    def load_rows(self, rows: List[Dict]):
+        """Replace the snapshot with the given component rows"""
+        new_rows = {}
+        new_specs = {}
+        new_attributes = {}
+        new_scores = {}
+        by_type: Dict[str, List[Tuple[float, int]]] = {}
+
+        for row in rows:
+            component_id = int(row['id'])
+            price = to_float(row.get('price'))
+            new_rows[component_id] = self._pack_row(row, price)
+            new_specs[component_id] = self._parse_specs(row.get('specs'))
+            new_attributes[component_id] = component_attributes(row['type'], row.get('model'), new_specs[component_id])
+            new_scores[component_id] = component_performance(row['type'], row.get('model'), new_specs[component_id])
+            by_type.setdefault(row['type'], []).append((price, component_id))
+
+        new_types = {comp_type: self._build_slice(entries, new_scores) for comp_type, entries in by_type.items()}
+        new_values = {}
+        for type_slice in new_types.values():
+            new_values.update(zip(type_slice.ids.tolist(), type_slice.values.tolist()))
+        watermark = max((row['last_updated'] for row in rows if row.get('last_updated')), default=None)
+
+        with self.lock:
+            self.rows = new_rows
+            self.specs = new_specs
+            self.attributes = new_attributes
+            self.scores = new_scores
+            self.values = new_values
+            self.types = new_types
+            self.watermark = watermark
+            self.version += 1
+            self.changes.append((self.version, None))
+            self.loaded = True
+            self.loaded_at = datetime.now()
+
+    def apply_changes(self, rows: List[Dict]) -> int:
+        """
+        Merge changed rows (new or updated) into the snapshot.
+        Only the types touched by the changes are re-spliced; returns the number of rows applied.
+        """
+        with self.lock:
+            rows_map = dict(self.rows)
+            specs_map = dict(self.specs)
+            attributes_map = dict(self.attributes)
+            scores_map = dict(self.scores)
+            removed: Dict[str, set] = {}
+            added: Dict[str, List[Tuple[float, int]]] = {}
+            touched: Dict[str, Tuple[float, float]] = {}
+            watermark = self.watermark
+
+            latest = {}
+            for row in rows:
+                latest[int(row['id'])] = row  # last write wins within a batch
+                if row.get('last_updated') and (watermark is None or row['last_updated'] > watermark):
+                    watermark = row['last_updated']
+
+            for component_id, row in latest.items():
+                price = to_float(row.get('price'))
+                packed = self._pack_row(row, price)
+                specs = self._parse_specs(row.get('specs'))
+
+                previous = rows_map.get(component_id)
+                if previous == packed and specs_map.get(component_id) == specs:
+                    continue  # re-read of an unchanged row (watermark boundary)
+
+                if previous is not None:
+                    removed.setdefault(previous[1], set()).add(component_id)
+                    self._touch(touched, previous[1], previous[4])
+                self._touch(touched, packed[1], price)
+                rows_map[component_id] = packed
+                specs_map[component_id] = specs
+                attributes_map[component_id] = component_attributes(packed[1], packed[3], specs)
+                scores_map[component_id] = component_performance(packed[1], packed[3], specs)
+                added.setdefault(packed[1], []).append((price, component_id))
+
+            self.watermark = watermark
+            changed_types = set(removed) | set(added)
+            if not changed_types:
+                return 0
+
+            # A type's values depend on all of its parts, so changed types are re-valued whole
+            types = dict(self.types)
+            values_map = dict(self.values)
+            for comp_type in changed_types:
+                types[comp_type] = self._splice_slice(
+                    types.get(comp_type), removed.get(comp_type, set()), added.get(comp_type, []), scores_map
+                )
+                values_map.update(zip(types[comp_type].ids.tolist(), types[comp_type].values.tolist()))
+
+            self.rows = rows_map
+            self.specs = specs_map
+            self.attributes = attributes_map
+            self.scores = scores_map
+            self.values = values_map
+            self.types = types
+            self.version += 1
+            self.changes.append((self.version, touched))
+            return sum(len(entries) for entries in added.values())
+
+    def remove(self, component_ids: List[int]) -> int:
+        """Drop deleted components from the snapshot; returns the number removed"""
+        with self.lock:
+            removed: Dict[str, set] = {}
+            touched: Dict[str, Tuple[float, float]] = {}
+            for component_id in component_ids:
+                row = self.rows.get(int(component_id))
+                if row is not None:
+                    removed.setdefault(row[1], set()).add(int(component_id))
+                    self._touch(touched, row[1], row[4])
+            if not removed:
+                return 0
+
+            gone = set().union(*removed.values())
+            rows_map = {k: v for k, v in self.rows.items() if k not in gone}
+            specs_map = {k: v for k, v in self.specs.items() if k not in gone}
+            attributes_map = {k: v for k, v in self.attributes.items() if k not in gone}
+            scores_map = {k: v for k, v in self.scores.items() if k not in gone}
+            values_map = {k: v for k, v in self.values.items() if k not in gone}
+            types = dict(self.types)
+            for comp_type, type_removed in removed.items():
+                types[comp_type] = self._splice_slice(types.get(comp_type), type_removed, [], scores_map)
+                values_map.update(zip(types[comp_type].ids.tolist(), types[comp_type].values.tolist()))
+
+            self.rows = rows_map
+            self.specs = specs_map
+            self.attributes = attributes_map
+            self.scores = scores_map
+            self.values = values_map
+            self.types = types
+            self.version += 1
+            self.changes.append((self.version, touched))
+            return len(gone)
+
+    @staticmethod
+    def _touch(touched: Dict[str, Tuple[float, float]], comp_type: str, price: float):
+        low, high = touched.get(comp_type, (price, price))
+        touched[comp_type] = (min(low, price), max(high, price))
+
+    def changes_since(self, version: Any) -> Optional[Dict[str, Tuple[float, float]]]:
+        """
+        Price range each type's changes touched (old and new prices) since version; None when the
+        log cannot tell: a full load happened since, or version is older than the log.
+        """
+        with self.lock:
+            if not isinstance(version, int) or version > self.version:
+                return None
+            entries = [changes for entry_version, changes in self.changes if entry_version > version]
+            if len(entries) != self.version - version:
+                return None
+        merged: Dict[str, Tuple[float, float]] = {}
+        for changes in entries:
+            if changes is None:
+                return None
+            for comp_type, (low, high) in changes.items():
+                self._touch(merged, comp_type, low)
+                self._touch(merged, comp_type, high)
+        return merged
+
+    def can_serve(self, component_type: str = None, brand: str = None, model_query: str = None) -> bool:
+        """The catalog only answers typed price-window searches"""
+        return self.loaded and bool(component_type) and not brand and not model_query
+
+    def search(self, component_type: str, min_price: float = None,
+               max_price: float = None, limit: int = 50) -> List[Dict]:
+        """Same result as the SQL search: type match, price window, ORDER BY price, LIMIT"""
+        type_slice = self.types.get(component_type)
+        if type_slice is None or limit <= 0:
             return []
-    
-    def fuzzy_search_components(self, query: str, component_type: str = None, 
-                                max_price: float = None) -> List[Dict]:
-        """Fuzzy search for components with intelligent matching"""
-        conn = self.get_connection()
-        if not conn:
+
+        prices = type_slice.prices
+        # Falsy bounds are ignored, matching the `if max_price:` checks in the SQL builder
+        lo = int(np.searchsorted(prices, to_float(min_price), side='left')) if min_price else 0
+        hi = int(np.searchsorted(prices, to_float(max_price), side='right')) if max_price else len(prices)
+        if hi <= lo:
             return []
-        
-        try:
-            cursor = conn.cursor(dictionary=True)
-            
-            # Build fuzzy search query
-            conditions = []
-            params = []
-            
-            if component_type:
-                conditions.append("type = %s")
-                params.append(component_type)
-            
-            if max_price:
-                conditions.append("price <= %s")
-                params.append(max_price)
-            
-            # Extract keywords from query
-            keywords = query.lower().split()
-            keyword_conditions = []
-            for keyword in keywords:
-                if len(keyword) > 2:  # Skip very short words
-                    keyword_conditions.append("(model LIKE %s OR brand LIKE %s)")
-                    params.extend([f"%{keyword}%", f"%{keyword}%"])
-            
-            if keyword_conditions:
-                conditions.append(f"({' OR '.join(keyword_conditions)})")
-            
-            where_clause = " AND ".join(conditions) if conditions else "1=1"
-            
-            query_sql = f"""
-                SELECT id, type, brand, model, price, currency, image_url, 
-                       source_url, last_updated,
-                       (CASE 
-                           WHEN model LIKE %s THEN 100
-                           WHEN model LIKE %s THEN 50
-                           ELSE 0
-                       END) as relevance_score
-                FROM components 
-                WHERE {where_clause}
-                ORDER BY relevance_score DESC, price ASC
-                LIMIT 20
-            """
-            
-            # Add relevance scoring parameters
-            exact_match = f"%{query}%"
-            partial_match = f"%{' '.join(keywords[:2])}%"
-            params = [exact_match, partial_match] + params
-            
-            cursor.execute(query_sql, params)
-            results = cursor.fetchall()
-            
-            cursor.close()
-            conn.close()
-            
-            # Convert Decimal prices to float
-            for result in results:
-                if 'price' in result:
-                    result['price'] = to_float(result['price'])  # Simplified
-            
-            return results
-        except Exception as e:
-            logger.error(f"Fuzzy search error: {e}")
-            if conn:
-                conn.close()
+
+        return [self.get(int(component_id)) for component_id in type_slice.ids[lo:min(hi, lo + limit)]]
+
+    def sample(self, component_type: str, min_price: float, max_price: float, count: int) -> List[Dict]:
+        """Up to count components spread evenly (by rank) over the open-closed price window (min, max]"""
+        type_slice = self.types.get(component_type)
+        if type_slice is None or count <= 0:
             return []
-    
-    def get_component_by_id(self, component_id: int) -> Optional[Dict]:
-        """Get specific component by ID"""
-        conn = self.get_connection()
-        if not conn:
+
+        lo = int(np.searchsorted(type_slice.prices, to_float(min_price), side='right'))
+        hi = int(np.searchsorted(type_slice.prices, to_float(max_price), side='right'))
+        if hi <= lo:
+            return []
+        positions = np.unique(np.linspace(lo, hi - 1, min(count, hi - lo)).round().astype(np.int64))
+        return [self.get(int(type_slice.ids[position])) for position in positions]
+
+    def get(self, component_id: int) -> Optional[Dict]:
+        """Return a fresh dict for a component (callers are free to mutate it)"""
+        row = self.rows.get(component_id)
+        if row is None:
             return None
-        
+        return dict(zip(self.ROW_FIELDS, row))
+
+    def performance_value(self, component: Dict) -> float:
+        """Price-equivalent performance of a component (its price when the catalog cannot score it)"""
+        value = self.values.get(component.get('id') or component.get('component_id'))
+        return value if value is not None else to_float(component.get('price'))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "version": self.version,
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+            "components": len(self.rows),
+            "scored": sum(1 for score in self.scores.values() if score > 0),
+            "types": {comp_type: len(s.ids) for comp_type, s in self.types.items()},
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "load_seconds": round(self.load_seconds, 3)
+        }
+
+    def _pack_row(self, row: Dict, price: float) -> tuple:
+        return (int(row['id']), row.get('type'), row.get('brand'), row.get('model'), price,
+                row.get('currency'), row.get('image_url'), row.get('source_url'),
+                row.get('last_updated'))
+
+    @staticmethod
+    def _parse_specs(specs) -> Dict:
+        if not specs:
+            return {}
+        if isinstance(specs, dict):
+            return specs
+        try:
+            parsed = json.loads(specs)
+            return parsed if isinstance(parsed, dict) else {}
+        except (TypeError, ValueError):
+            return {}
+
+    @staticmethod
+    def _build_slice(entries: List[Tuple[float, int]], scores: Dict[int, float]) -> CatalogTypeSlice:
+        prices = np.fromiter((p for p, _ in entries), dtype=np.float64, count=len(entries))
+        ids = np.fromiter((i for _, i in entries), dtype=np.int64, count=len(entries))
+        order = np.lexsort((ids, prices))  # price ascending, id breaks ties
+        return ComponentCatalog._valued_slice(prices[order], ids[order], scores)
+
+    @staticmethod
+    def _valued_slice(prices: np.ndarray, ids: np.ndarray, scores: Dict[int, float]) -> CatalogTypeSlice:
+        type_scores = np.fromiter((scores.get(i, 0.0) for i in ids.tolist()), dtype=np.float64, count=len(ids))
+        return CatalogTypeSlice(prices, ids, performance_values(prices, type_scores))
+
+    @staticmethod
+    def _splice_slice(type_slice: Optional[CatalogTypeSlice], removed_ids: set,
+                      added: List[Tuple[float, int]], scores: Dict[int, float]) -> CatalogTypeSlice:
+        """Drop removed ids and insert new (price, id) entries, keeping (price, id) order"""
+        if type_slice is None:
+            return ComponentCatalog._build_slice(added, scores)
+
+        prices, ids = type_slice.prices, type_slice.ids
+        if removed_ids:
+            keep = ~np.isin(ids, np.fromiter(removed_ids, dtype=np.int64, count=len(removed_ids)))
+            prices, ids = prices[keep], ids[keep]
+
+        if added:
+            added = sorted(added)
+            positions = []
+            for price, component_id in added:
+                lo = int(np.searchsorted(prices, price, side='left'))
+                hi = int(np.searchsorted(prices, price, side='right'))
+                positions.append(lo + int(np.searchsorted(ids[lo:hi], component_id)))
+            prices = np.insert(prices, positions, [price for price, _ in added])
+            ids = np.insert(ids, positions, [component_id for _, component_id in added])
+
+        return ComponentCatalog._valued_slice(prices, ids, scores)
+
+component_catalog = ComponentCatalog()
+
+class CatalogRefresher:
+    """
+    Background poller that keeps component_catalog fresh using the
+    components.last_updated watermark, so refresh cost follows churn.
+    Deletes are read from the component_deletions tombstones (filled by a trigger, see
+    database.sql); a full reload every reconcile_interval covers databases without them.
+    Every reload also prunes tombstones older than tombstone_retention. Each refresher
+    reloads at least once per reconcile_interval, so retention is kept above that plus a
+    poll interval and no refresher misses a tombstone it still needs.
+    """
+
+    def __init__(self, catalog: ComponentCatalog, db, interval: float = 60.0,
+                 reconcile_interval: float = 21600.0, tombstone_retention: float = 86400.0):
+        self.catalog = catalog
+        self.db = db
+        self.interval = interval
+        self.reconcile_interval = reconcile_interval
+        self.tombstone_retention = max(tombstone_retention, reconcile_interval + interval)
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.last_refresh = None
+        self.last_reconcile = 0.0  # time.time() of the last full reload
+        self.last_applied = 0
+        self.last_removed = 0
+        self.full_reloads = 0
+        self.tombstones = True  # False once the component_deletions table turned out missing
+        self.tombstone_cursor = 0  # highest component_deletions.id applied
+        self.listeners: List[Callable[[], Any]] = []  # run after the catalog content changed
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._run, name='catalog-refresher', daemon=True)
+        self.thread.start()
+        logger.info(f"Catalog refresher started (every {self.interval:.0f}s)")
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Catalog refresh failed: {e}")
+
+    def refresh(self) -> int:
+        """Pull rows changed since the watermark and merge them; returns rows applied (a reload applies every row)"""
+        if not self.catalog.loaded or time.time() - self.last_reconcile >= self.reconcile_interval:
+            return len(self.catalog.rows) if self.reload() else 0
+
+        conn = self.db.get_connection()
+        if not conn:
+            return 0
+
         try:
             cursor = conn.cursor(dictionary=True)
-            cursor.execute(
-                "SELECT * FROM components WHERE id = %s",
-                (component_id,)
-            )
-            result = cursor.fetchone()
+            # >= rather than >: TIMESTAMP has one-second resolution, so rows written in the
+            # same second as the previous poll would otherwise be missed. Unchanged rows are no-ops.
+            if self.catalog.watermark:
+                cursor.execute("""
+                    SELECT id, type, brand, model, price, currency, image_url,
+                           source_url, last_updated, specs
+                    FROM components
+                    WHERE last_updated >= %s
+                """, (self.catalog.watermark,))
+                changed = cursor.fetchall()
+            else:
+                changed = []
+            deletions = self._read_tombstones(cursor)
             cursor.close()
             conn.close()
-            
-            # Convert Decimal price to float
-            if result and 'price' in result:
-                result['price'] = to_float(result['price'])
-            
-            return result
         except Exception as e:
-            logger.error(f"Get component error: {e}")
+            logger.error(f"Catalog change poll failed: {e}")
             if conn:
                 conn.close()
-            return None
-    
+            return 0
+
+        applied = self.catalog.apply_changes(changed) if changed else 0
+        removed = self.catalog.remove([row['component_id'] for row in deletions]) if deletions else 0
+        if deletions:
+            self.tombstone_cursor = max(self.tombstone_cursor, max(int(row['id']) for row in deletions))
+        self.last_refresh = datetime.now()
+        self.last_applied = applied
+        self.last_removed = removed
+
+        if applied or removed:
+            logger.info(f"Catalog refreshed: {applied} changed, {removed} deleted components "
+                        f"(version {self.catalog.version})")
+            self._notify()
+
+        return applied
+
+    def _read_tombstones(self, cursor, latest: bool = False) -> List[Dict]:
+        """Deletions past the cursor (or, with latest, just the newest tombstone id)"""
+        if not self.tombstones:
+            return []
+        try:
+            if latest:
+                cursor.execute("SELECT COALESCE(MAX(id), 0) AS id FROM component_deletions")
+            else:
+                cursor.execute("SELECT id, component_id FROM component_deletions WHERE id > %s ORDER BY id",
+                               (self.tombstone_cursor,))
+            return cursor.fetchall()
+        except Exception as e:
+            # Table predates the database.sql migration: deletes wait for the periodic reconcile
+            self.tombstones = False
+            logger.warning(f"component_deletions unavailable ({e}); deletes apply on the "
+                           f"{self.reconcile_interval:.0f}s reconcile")
+            return []
+
+    def reload(self) -> bool:
+        self.full_reloads += 1
+        # Read the tombstone cursor before the snapshot: deletes racing the load are re-applied (no-ops)
+        conn = self.db.get_connection()
+        if conn:
+            try:
+                cursor = conn.cursor(dictionary=True)
+                latest = self._read_tombstones(cursor, latest=True)
+                if latest:
+                    self.tombstone_cursor = int(latest[0]['id'])
+                    self._prune_tombstones(conn, cursor)
+                cursor.close()
+            finally:
+                conn.close()
+        loaded = self.catalog.load(self.db)
+        if loaded:
+            self.last_reconcile = time.time()
+            self._notify()
+        return loaded
+
+    def _prune_tombstones(self, conn, cursor):
+        """Drop tombstones every refresher has either applied or reloaded past"""
+        try:
+            cursor.execute("DELETE FROM component_deletions WHERE deleted_at < NOW() - INTERVAL %s SECOND",
+                           (int(self.tombstone_retention),))
+            pruned = cursor.rowcount
+            conn.commit()
+            if pruned:
+                logger.info(f"Pruned {pruned} component deletion tombstones")
+        except Exception as e:
+            logger.warning(f"Tombstone prune failed: {e}")
+
+    def _notify(self):
+        for listener in self.listeners:
+            try:
+                listener()
+            except Exception as e:
+                logger.error(f"Catalog listener failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": bool(self.thread and self.thread.is_alive()),
+            "interval_seconds": self.interval,
+            "last_refresh": self.last_refresh.isoformat() if self.last_refresh else None,
+            "last_applied": self.last_applied,
+            "last_removed": self.last_removed,
+            "full_reloads": self.full_reloads,
+            "reconcile_interval_seconds": self.reconcile_interval,
+            "tombstones": self.tombstones,
+            "tombstone_retention_seconds": self.tombstone_retention
+        }
+
+class AlternativesIndex:
+    """
+    Precomputed /alternatives answers from the catalog.
+    For every component: the most spec-similar same-type parts within the price band (when specs
+    exist), topped up with the nearest parts by price. Only types whose catalog slice was
+    replaced since the last build are recomputed.
+    """
+
+    def __init__(self, catalog: ComponentCatalog, k: int = 8, price_range: float = 3000,
+                 candidates: int = 32):
+        self.catalog = catalog
+        self.k = k
+        self.price_range = price_range
+        self.candidates = candidates  # nearest-by-price neighbours scored for spec similarity
+        self.lock = threading.Lock()
+        self.entries: Dict[int, Tuple[int, ...]] = {}
+        self.built_slices: Dict[str, CatalogTypeSlice] = {}
+        self.version = None
+        self.build_seconds = 0.0
+        self.types_rebuilt = 0
+
+    def refresh(self) -> int:
+        """Bring the index up to the catalog version; returns the number of types rebuilt"""
+        with self.lock:
+            if self.version == self.catalog.version:
+                return 0
+
+            start = time.time()
+            with self.catalog.lock:
+                version = self.catalog.version
+                types = self.catalog.types
+                specs = self.catalog.specs
+
+            stale = [comp_type for comp_type in set(self.built_slices) | set(types)
+                     if self.built_slices.get(comp_type) is not types.get(comp_type)]
+            entries = dict(self.entries)
+            for comp_type in stale:
+                old_slice = self.built_slices.get(comp_type)
+                if old_slice is not None:
+                    for component_id in old_slice.ids.tolist():
+                        entries.pop(component_id, None)
+            for comp_type in stale:
+                if comp_type in types:
+                    entries.update(self._build_type(types[comp_type], specs))
+
+            self.entries = entries
+            self.built_slices = dict(types)
+            self.version = version
+            self.build_seconds = time.time() - start
+            self.types_rebuilt += len(stale)
+            if stale:
+                logger.info(f"Alternatives index rebuilt for {len(stale)} types in {self.build_seconds:.2f}s")
+            return len(stale)
+
+    def lookup(self, component_id: int) -> Optional[List[Dict]]:
+        """Alternatives for a catalogued component, or None if it is not indexed"""
+        if self.version != self.catalog.version:
+            self.refresh()
+        alternative_ids = self.entries.get(component_id)
+        if alternative_ids is None:
+            return None
+        return [component for component in map(self.catalog.get, alternative_ids) if component]
+
+    def _build_type(self, type_slice: CatalogTypeSlice, specs: Dict[int, Dict]) -> Dict[int, Tuple[int, ...]]:
+        prices, ids = type_slice.prices, type_slice.ids
+        numeric, categorical, has_specs = self._spec_features([specs.get(int(i)) for i in ids])
+        band_lo = np.searchsorted(prices, prices - self.price_range, side='left')
+        band_hi = np.searchsorted(prices, prices + self.price_range, side='right')
+
+        entries = {}
+        for i in range(len(ids)):
+            window = np.arange(max(band_lo[i], i - self.candidates), min(band_hi[i], i + self.candidates + 1))
+            window = window[window != i]
+            gaps = np.abs(prices[window] - prices[i])
+            nearest = window[np.lexsort((ids[window], gaps))][:self.candidates]
+
+            by_spec = []
+            if has_specs[i] and len(nearest):
+                distance = self._spec_distance(i, nearest, numeric, categorical)
+                similar = np.isfinite(distance)
+                ranked = nearest[similar][np.argsort(distance[similar], kind='stable')]
+                by_spec = ids[ranked[:self.k]].tolist()
+
+            ordered = list(dict.fromkeys(by_spec + ids[nearest[:self.k]].tolist()))
+            entries[int(ids[i])] = tuple(ordered[:self.k])
+        return entries
+
+    @staticmethod
+    def _spec_features(spec_list: List[Optional[Dict]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Numeric (NaN = missing) and categorical (-1 = missing) feature matrices from specs"""
+        numeric_keys: Dict[str, int] = {}
+        categorical_keys: Dict[str, int] = {}
+        flattened = []
+        for spec in spec_list:
+            values = {}
+            for key, value in (spec or {}).items():
+                if isinstance(value, bool):
+                    continue
+                if isinstance(value, (int, float)):
+                    values[key] = float(value)
+                elif isinstance(value, list):
+                    for position, item in enumerate(value):
+                        if isinstance(item, (int, float)) and not isinstance(item, bool):
+                            values[f"{key}.{position}"] = float(item)
+                elif isinstance(value, str) and value.strip():
+                    values[key] = value.strip().lower()
+            for key, value in values.items():
+                keys = numeric_keys if isinstance(value, float) else categorical_keys
+                keys.setdefault(key, len(keys))
+            flattened.append(values)
+
+        numeric = np.full((len(spec_list), len(numeric_keys)), np.nan)
+        categorical = np.full((len(spec_list), len(categorical_keys)), -1, dtype=np.int64)
+        codes: Dict[str, int] = {}
+        for row, values in enumerate(flattened):
+            for key, value in values.items():
+                if isinstance(value, float):
+                    numeric[row, numeric_keys[key]] = value
+                else:
+                    categorical[row, categorical_keys[key]] = codes.setdefault(value, len(codes))
+        has_specs = np.array([bool(values) for values in flattened], dtype=bool)
+        return numeric, categorical, has_specs
+
+    @staticmethod
+    def _spec_distance(i: int, candidates: np.ndarray, numeric: np.ndarray,
+                       categorical: np.ndarray) -> np.ndarray:
+        """Mean per-attribute distance over attributes both parts have (inf when none are shared)"""
+        total = np.zeros(len(candidates))
+        count = np.zeros(len(candidates))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if numeric.shape[1]:
+                a, b = numeric[i], numeric[candidates]
+                diff = np.abs(b - a) / np.maximum(np.maximum(np.abs(a), np.abs(b)), 1e-9)
+                valid = ~np.isnan(diff)
+                total += np.where(valid, diff, 0.0).sum(axis=1)
+                count += valid.sum(axis=1)
+            if categorical.shape[1]:
+                a, b = categorical[i], categorical[candidates]
+                valid = (a >= 0) & (b >= 0)
+                total += ((a != b) & valid).sum(axis=1)
+                count += valid.sum(axis=1)
+            return np.where(count > 0, total / np.maximum(count, 1), np.inf)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "components": len(self.entries),
+            "build_seconds": round(self.build_seconds, 3),
+            "types_rebuilt": self.types_rebuilt
+        }
+
+alternatives_index = AlternativesIndex(
+    component_catalog,
+    k=int(os.getenv('ALTERNATIVES_K', 8)),
+    price_range=float(os.getenv('ALTERNATIVES_PRICE_RANGE', 3000))
+)
+
+class ModelSearchIndex:
+    """
+    In-process brand/model search over the catalog.
+    Word tokens are scored with BM25; character trigrams catch partial words and typos
+    ("4060" in "4060ti", "ryzn"), so lookups walk postings lists instead of scanning LIKE patterns.
+    The catalog refresher brings the postings up to date (only the rows that changed are
+    re-indexed) and publishes them with one assignment, so searches never wait on a rebuild.
+    """
+
+    K1 = 1.2
+    B = 0.75
+    TRIGRAM_WEIGHT = 0.5
+    TRIGRAM_MIN_COVERAGE = 0.6  # share of a term's trigrams a document must contain
+    PHRASE_BONUS = 2.0
+    MIN_TERM_LENGTH = 3  # fuzzy search has always ignored one- and two-letter words
+
+    def __init__(self, catalog: ComponentCatalog):
+        self.catalog = catalog
+        self.lock = threading.Lock()  # one refresh at a time; searches read self.postings
+        self.postings: Optional['ModelSearchPostings'] = None
+        self.build_seconds = 0.0
+        self.rows_reindexed = 0
+
+    @property
+    def version(self):
+        postings = self.postings
+        return postings.version if postings else None
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        """Lowercase alphanumeric words, plus their letter/digit runs ("rtx4060" -> rtx4060, rtx, 4060)"""
+        tokens = []
+        for word in re.findall(r'[a-z0-9]+', (text or '').lower()):
+            tokens.append(word)
+            parts = re.findall(r'[a-z]+|[0-9]+', word)
+            if len(parts) > 1:
+                tokens.extend(parts)
+        return tokens
+
+    @staticmethod
+    def trigrams_of(word: str) -> set:
+        return {word[i:i + 3] for i in range(len(word) - 2)}
+
+    def refresh(self) -> int:
+        """Bring the postings up to the catalog version; returns the number of rows re-indexed"""
+        with self.lock:
+            current = self.postings
+            if current is not None and current.version == self.catalog.version:
+                return 0
+
+            start = time.time()
+            with self.catalog.lock:
+                version = self.catalog.version
+                rows = self.catalog.rows
+
+            built = current.rows if current else {}
+            postings = current.copy() if current else ModelSearchPostings()
+            # Catalog rows are immutable tuples: a changed row is a different object
+            stale = [component_id for component_id, row in built.items() if rows.get(component_id) is not row]
+            fresh = [component_id for component_id, row in rows.items() if built.get(component_id) is not row]
+            for component_id in stale:
+                postings.discard(component_id, built[component_id])
+            for component_id in fresh:
+                postings.add(component_id, rows[component_id])
+            postings.publish(rows, version)
+
+            self.postings = postings
+            self.build_seconds = time.time() - start
+            self.rows_reindexed += len(fresh)
+            return len(fresh)
+
+    def _current(self) -> 'ModelSearchPostings':
+        """The published postings (built here only the first time, before any refresh)"""
+        if self.postings is None:
+            self.refresh()
+        return self.postings
+
+    def search(self, query: str, component_type: str = None, max_price: float = None,
+               min_price: float = None, limit: int = 20) -> List[Dict]:
+        """Relevance-ranked brand/model search (ties and empty queries fall back to price order)"""
+        postings = self._current()
+
+        terms = [term for term in dict.fromkeys(self.tokenize(query)) if len(term) >= self.MIN_TERM_LENGTH]
+        if not terms:
+            candidates = {component_id: 0.0 for component_id in postings.lengths}
+        else:
+            candidates = self._score(postings, terms)
+            phrase = ' '.join(re.findall(r'[a-z0-9]+', query.lower()))
+            for component_id in candidates:
+                if phrase and phrase in postings.texts.get(component_id, ''):
+                    candidates[component_id] += self.PHRASE_BONUS
+
+        return self._rank(candidates, component_type, max_price, min_price, limit)
+
+    def match_models(self, model_query: str, brand: str = None, component_type: str = None,
+                     max_price: float = None, min_price: float = None, limit: int = 50) -> List[Dict]:
+        """
+        Catalog version of search_components' model filter: model contains the phrase or shares a
+        word with it (what MATCH ... IN NATURAL LANGUAGE MODE accepts), optional brand substring, by price
+        """
+        postings = self._current()
+
+        phrase = (model_query or '').lower()
+        matched = set()
+        for term in dict.fromkeys(re.findall(r'[a-z0-9]+', phrase)):
+            if len(term) >= self.MIN_TERM_LENGTH:
+                matched.update(postings.model_words.get(term, ()))
+        if phrase:
+            matched.update(self._substring_candidates(postings, phrase, postings.models))
+
+        if brand:
+            brand = brand.lower()
+            matched = {component_id for component_id in matched if brand in postings.brands.get(component_id, '')}
+
+        return self._rank({component_id: 0.0 for component_id in matched},
+                          component_type, max_price, min_price, limit)
+
+    def _score(self, index: 'ModelSearchPostings', terms: List[str]) -> Dict[int, float]:
+        total = len(index.lengths) or 1
+        average_length = index.average_length
+        scores: Dict[int, float] = {}
+        for term in terms:
+            postings = index.tokens.get(term, {})
+            if postings:
+                idf = np.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                for component_id, tf in postings.items():
+                    norm = self.K1 * (1 - self.B + self.B * index.lengths[component_id] / average_length)
+                    scores[component_id] = scores.get(component_id, 0.0) + idf * tf * (self.K1 + 1) / (tf + norm)
+
+            grams = self.trigrams_of(term)
+            if not grams:
+                continue
+            hits: Dict[int, int] = {}
+            for gram in grams:
+                for component_id in index.trigrams.get(gram, ()):
+                    hits[component_id] = hits.get(component_id, 0) + 1
+            needed = max(1, int(np.ceil(self.TRIGRAM_MIN_COVERAGE * len(grams))))
+            fuzzy = {component_id: count for component_id, count in hits.items() if count >= needed}
+            if fuzzy:
+                idf = np.log(1 + (total - len(fuzzy) + 0.5) / (len(fuzzy) + 0.5))
+                for component_id, count in fuzzy.items():
+                    scores[component_id] = (scores.get(component_id, 0.0)
+                                            + self.TRIGRAM_WEIGHT * idf * count / len(grams))
+        return scores
+
+    def _substring_candidates(self, index: 'ModelSearchPostings', phrase: str, texts: Dict[int, str]) -> set:
+        """Ids whose text contains phrase, narrowed through the trigram postings first"""
+        words = re.findall(r'[a-z0-9]+', phrase)
+        grams = set().union(*(self.trigrams_of(word) for word in words)) if words else set()
+        if grams:
+            postings = sorted((index.trigrams.get(gram, set()) for gram in grams), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+        else:
+            candidates = texts.keys()
+        return {component_id for component_id in candidates if phrase in texts.get(component_id, '')}
+
+    def _rank(self, scores: Dict[int, float], component_type: str, max_price: float,
+              min_price: float, limit: int) -> List[Dict]:
+        ranked = []
+        for component_id, score in scores.items():
+            row = self.catalog.rows.get(component_id)
+            if row is None or (component_type and row[1] != component_type):
+                continue
+            # Falsy bounds are ignored, matching the SQL builders
+            if (max_price and row[4] > to_float(max_price)) or (min_price and row[4] < to_float(min_price)):
+                continue
+            ranked.append((-score, row[4], component_id))
+        ranked.sort()
+
+        results = []
+        for negative_score, _, component_id in ranked[:limit]:
+            component = self.catalog.get(component_id)
+            if component:
+                component['relevance_score'] = round(float(-negative_score), 3)
+                results.append(component)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        postings = self.postings
+        return {
+            "version": self.version,
+            "tokens": len(postings.tokens) if postings else 0,
+            "trigrams": len(postings.trigrams) if postings else 0,
+            "rows_reindexed": self.rows_reindexed,
+            "build_seconds": round(self.build_seconds, 3)
+        }
+
+class ModelSearchPostings:
+    """
+    One published state of ModelSearchIndex. A refresh works on a copy(): the outer maps are
+    copied up front and an inner postings entry only when the refresh first changes it, so the
+    published object is never mutated while searches read it.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.rows: Dict[int, tuple] = {}  # the catalog rows indexed
+        self.tokens: Dict[str, Dict[int, int]] = {}  # token -> {component id: term frequency}
+        self.trigrams: Dict[str, set] = {}  # trigram -> component ids
+        self.model_words: Dict[str, set] = {}  # whole model word -> component ids
+        self.lengths: Dict[int, int] = {}
+        self.texts: Dict[int, str] = {}  # normalized "brand model"
+        self.models: Dict[int, str] = {}
+        self.brands: Dict[int, str] = {}
+        self.total_length = 0
+        self._owned: set = set()  # (table, key) entries already private to this copy
+
+    @property
+    def average_length(self) -> float:
+        return self.total_length / len(self.lengths) if self.lengths else 1.0
+
+    def copy(self) -> 'ModelSearchPostings':
+        postings = ModelSearchPostings()
+        postings.tokens, postings.trigrams = dict(self.tokens), dict(self.trigrams)
+        postings.model_words = dict(self.model_words)
+        postings.lengths, postings.texts = dict(self.lengths), dict(self.texts)
+        postings.models, postings.brands = dict(self.models), dict(self.brands)
+        postings.total_length = self.total_length
+        return postings
+
+    def publish(self, rows: Dict[int, tuple], version):
+        """Mark the copy as built from rows at version; it is read-only from here on"""
+        self.rows = rows
+        self.version = version
+        self._owned = set()
+
+    def _entry(self, name: str, key: str, empty: type):
+        """The table's entry for key, copied first if it is still shared with the published postings"""
+        table = getattr(self, name)
+        if (name, key) not in self._owned:
+            self._owned.add((name, key))
+            table[key] = empty(table.get(key, ()))
+        return table[key]
+
+    @staticmethod
+    def _document(row: tuple) -> Tuple[str, str, List[str]]:
+        brand, model = (row[2] or '').lower(), (row[3] or '').lower()
+        return brand, model, ModelSearchIndex.tokenize(f"{brand} {model}")
+
+    def add(self, component_id: int, row: tuple):
+        brand, model, doc_tokens = self._document(row)
+        for token in doc_tokens:
+            postings = self._entry('tokens', token, dict)
+            postings[component_id] = postings.get(component_id, 0) + 1
+        for word in re.findall(r'[a-z0-9]+', f"{brand} {model}"):
+            for gram in ModelSearchIndex.trigrams_of(word):
+                self._entry('trigrams', gram, set).add(component_id)
+        for word in re.findall(r'[a-z0-9]+', model):
+            self._entry('model_words', word, set).add(component_id)
+        self.lengths[component_id] = len(doc_tokens) or 1
+        self.total_length += self.lengths[component_id]
+        self.texts[component_id] = ' '.join(re.findall(r'[a-z0-9]+', f"{brand} {model}"))
+        self.models[component_id] = model
+        self.brands[component_id] = brand
+
+    def discard(self, component_id: int, row: tuple):
+        """Undo add() for the row as it was indexed"""
+        brand, model, doc_tokens = self._document(row)
+        for token in set(doc_tokens):
+            self._drop('tokens', token, component_id)
+        for word in re.findall(r'[a-z0-9]+', f"{brand} {model}"):
+            for gram in ModelSearchIndex.trigrams_of(word):
+                self._drop('trigrams', gram, component_id)
+        for word in re.findall(r'[a-z0-9]+', model):
+            self._drop('model_words', word, component_id)
+        self.total_length -= self.lengths.pop(component_id, 0)
+        for table in (self.texts, self.models, self.brands):
+            table.pop(component_id, None)
+
+    def _drop(self, name: str, key: str, component_id: int):
+        table = getattr(self, name)
+        if component_id not in table.get(key, ()):
+            return
+        entry = self._entry(name, key, dict if name == 'tokens' else set)
+        if isinstance(entry, dict):
+            entry.pop(component_id, None)
+        else:
+            entry.discard(component_id)
+        if not entry:
+            del table[key]
+            self._owned.discard((name, key))
+
+model_search_index = ModelSearchIndex(component_catalog)
+
+# Request-scoped query memoization
+class QueryMemo:
+    """
+    Memo of search_components results for a single request.
+    Identical queries are deduplicated and a cached wider window also answers narrower ones.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries: Dict[tuple, List[tuple]] = {}  # (type, brand, model_query) -> [(window, rows, prices)]
+        self.hits = 0
+        self.misses = 0
+    
+    def lookup(self, key: tuple, min_price: float = None, max_price: float = None,
+               limit: int = 50) -> Optional[List[Dict]]:
+        with self.lock:
+            for window, rows, prices in self.entries.get(key, []):
+                results = answer_from_window(rows, prices, window, min_price, max_price, limit)
+                if results is not None:
+                    self.hits += 1
+                    return results
+            self.misses += 1
+            return None
+    
+    def store(self, key: tuple, min_price: float, max_price: float, limit: int, rows: List[Dict]):
+        rows = [dict(row) for row in rows]
+        prices = [to_float(row.get('price')) for row in rows]
+        with self.lock:
+            self.entries.setdefault(key, []).append(((min_price, max_price, limit), rows, prices))
+    
+    def stats(self) -> Dict[str, int]:
+        return {"memo_hits": self.hits, "memo_misses": self.misses}
+
+class PooledConnection:
+    """
+    Connection handed out by DatabaseManager.get_connection.
+    close() hands the connection back to whoever owns it: the pool, or the request scope.
+    """
+    
+    def __init__(self, conn, on_close):
+        self._conn = conn
+        self._on_close = on_close
+        self._closed = False
+    
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+    
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._on_close(self._conn)
+
+class RequestScope:
+    """
+    Per-request database state, created at the start of a request and discarded at the end.
+    Acts as a unit of work: the first statement checks out one connection and every
+    later read or write in the request reuses it. Threads working for the request (see
+    DatabaseManager.in_worker_scope) get scopes of their own that share the memo.
+    """
+    
+    def __init__(self, db, memo: QueryMemo = None):
+        self.db = db
+        self.memo = memo or QueryMemo()
+        self.conn = None
+        self.checkout_failed = False
+        self.pool_wait = 0.0
+        self.connection_uses = 0
+    
+    def connection(self) -> Optional[PooledConnection]:
+        if self.conn is None and not self.checkout_failed:
+            self.conn, self.pool_wait = self.db._checkout()
+            self.checkout_failed = self.conn is None
+        if self.conn is None:
+            return None
+        self.connection_uses += 1
+        return PooledConnection(self.conn, lambda conn: None)  # stays open until the scope ends
+    
+    def close(self):
+        if self.conn is not None:
+            self.db._release(self.conn)
+            self.conn = None
+    
+    def stats(self) -> Dict[str, Any]:
+        stats = self.memo.stats()
+        stats.update({
+            "pool_wait_ms": round(self.pool_wait * 1000, 2),
+            "connection_uses": self.connection_uses
+        })
+        return stats
+
+class SharedCacheStore:
+    """
+    Cache shared by every worker process on a host: one SQLite file in WAL mode, so readers
+    never block each other and a value computed by one worker is reused by the rest.
+    Entries are keyed by (namespace, version, key), where version is a components version
+    string that is the same in every process; entries of other versions are pruned once they
+    are older than SHARED_CACHE_RETENTION. Values are stored as JSON.
+    """
+    
+    PRUNE_INTERVAL = 60.0
+    TOUCH_BATCH = 512  # buffered touches written in one transaction
+    
+    def __init__(self, path: Path, retention: float = 600.0):
+        self.path = path
+        self.retention = retention
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self._last_prune = 0.0
+        self._touch_lock = threading.Lock()
+        self._touches: Dict[Tuple[str, str, str], float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+    
+    def _connection(self) -> sqlite3.Connection:
+        # Connections must not cross a fork (gunicorn --preload, warmup pools)
+        if os.getpid() != self._pid:
+            self._local = threading.local()
+            self._pid = os.getpid()
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, version, key)
+                )
+            """)
+            # Recency order for compact() and the retention prune
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_entries_recency ON cache_entries (namespace, created_at)")
+            self._local.conn = conn
+        return conn
+    
+    def get(self, namespace: str, version: str, key: str) -> Optional[Any]:
+        try:
+            row = self._connection().execute(
+                "SELECT value FROM cache_entries WHERE namespace = ? AND version = ? AND key = ?",
+                (namespace, version, key)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.error(f"Shared cache read error: {e}")
+            return None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+    
+    def touch(self, namespace: str, version: str, key: str):
+        """
+        Mark an entry as just used, so compact() keeps it. Touches are buffered in memory (one
+        per key) and written together by flush_touches(), so a read does not become a write.
+        """
+        with self._touch_lock:
+            self._touches[(namespace, version, key)] = time.time()
+            full = len(self._touches) >= self.TOUCH_BATCH
+        if full:
+            self.flush_touches()
+    
+    def flush_touches(self) -> int:
+        """Write the buffered touches in one transaction; returns how many were written"""
+        with self._touch_lock:
+            touches, self._touches = self._touches, {}
+        if not touches:
+            return 0
+        conn = self._connection()
+        try:
+            conn.execute("BEGIN")
+            # MAX(): an entry rewritten since it was touched keeps its newer time
+            conn.executemany(
+                "UPDATE cache_entries SET created_at = MAX(created_at, ?) WHERE namespace = ? AND version = ? AND key = ?",
+                [(used_at, namespace, version, key) for (namespace, version, key), used_at in touches.items()]
+            )
+            conn.execute("COMMIT")
+            return len(touches)
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.error(f"Shared cache write error: {e}")
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+            return 0
+    
+    def compact(self, namespace: str, max_entries: int) -> int:
+        """Delete all but the max_entries most recently written/touched entries of a namespace"""
+        self.flush_touches()
+        try:
+            cursor = self._connection().execute("""
+                DELETE FROM cache_entries WHERE rowid IN (
+                    SELECT rowid FROM cache_entries WHERE namespace = ?
+                    ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (namespace, max_entries))
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.error(f"Shared cache compaction error: {e}")
+            return 0
+    
+    def put(self, namespace: str, version: str, key: str, value: Any) -> Any:
+        """Store value and return it as readers will see it (JSON round-tripped)"""
+        payload = json.dumps(value, default=str)
+        try:
+            conn = self._connection()
+            conn.execute("INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?, ?)",
+                         (namespace, version, key, payload, time.time()))
+            self.writes += 1
+            now = time.time()
+            if now - self._last_prune > self.PRUNE_INTERVAL:
+                self._last_prune = now
+                conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND version <> ? AND created_at < ?",
+                             (namespace, version, now - self.retention))
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.error(f"Shared cache write error: {e}")
+        return json.loads(payload)
+    
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "path": str(self.path),
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "errors": self.errors,
+            "pending_touches": len(self._touches),
+            "entries": None
+        }
+        try:
+            stats["entries"] = self._connection().execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+        except sqlite3.Error:
+            pass
+        return stats
+
+shared_cache = SharedCacheStore(CACHE_DIR / 'shared_cache.sqlite3', SHARED_CACHE_RETENTION) if SHARED_CACHE_ENABLED else None
+translation_store = SharedCacheStore(CACHE_DIR / 'translations.sqlite3') if TRANSLATION_CACHE_ENABLED else None
+
+# Database Manager with Smart Component Search
+class DatabaseManager:
+    def __init__(self):
+        self.pool = connection_pool
+        self._local = threading.local()
+        # The pool raises immediately when exhausted; this semaphore turns that into a bounded wait
+        self.pool_size = DB_CONFIG['pool_size']
+        self._slots = threading.BoundedSemaphore(self.pool_size)
+        self._stats_lock = threading.Lock()
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._components_version = None
+        self._components_version_checked = 0.0
+        self._schema: Dict[tuple, bool] = {}
+        self.component_storage = RECOMMENDATION_COMPONENT_STORAGE
+        self.has_component_id = True  # recommendation_components.component_id (database.sql migration)
+    
+    def schema_has(self, table: str, column: str = None, index: str = None) -> Optional[bool]:
+        """Whether a column or index exists, asked once (None when the database cannot be reached)"""
+        key = (table, column, index)
+        if key in self._schema:
+            return self._schema[key]
+        
+        conn = self.get_connection()
+        if not conn:
+            return None
+        
+        try:
+            cursor = conn.cursor()
+            if column:
+                cursor.execute("""
+                    SELECT COUNT(*) FROM information_schema.COLUMNS
+                    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+                """, (table, column))
+            else:
+                cursor.execute("""
+                    SELECT COUNT(*) FROM information_schema.STATISTICS
+                    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+                """, (table, index))
+            exists = int(cursor.fetchone()[0]) > 0
+            cursor.close()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Schema check error ({table} {column or index}): {e}")
+            conn.close()
+            return None
+        
+        self._schema[key] = exists
+        return exists
+    
+    def check_schema(self):
+        """Adapt to a database that predates the database.sql migrations"""
+        if self.schema_has('recommendation_components', column='component_id') is False:
+            self.has_component_id = False
+            if self.component_storage == 'reference':
+                logger.warning("recommendation_components.component_id is missing (run database.sql); "
+                               "storing recommendation components by copy")
+                self.component_storage = 'copy'
+        # FULLTEXT indexes the SQL model searches use when present (LIKE otherwise)
+        self.schema_has('components', index='ft_model')
+        self.schema_has('components', index='ft_brand_model')
+    
+    @contextmanager
+    def request_scope(self):
+        """Bind a fresh RequestScope to the current thread for the duration of a request"""
+        scope = RequestScope(self)
+        previous = getattr(self._local, 'scope', None)
+        self._local.scope = scope
+        try:
+            yield scope
+        finally:
+            self._local.scope = previous
+            scope.close()
+    
+    def current_scope(self) -> Optional[RequestScope]:
+        return getattr(self._local, 'scope', None)
+    
+    def in_worker_scope(self, fn: Callable) -> Callable:
+        """
+        fn for running on an executor thread on behalf of the calling thread's request: each call
+        gets a scope of its own that shares the request's memo, so a worker that reaches SQL
+        checks out its own connection instead of waiting on the request's
+        """
+        parent = self.current_scope()
+        if parent is None:
+            return fn
+        
+        def run(*args, **kwargs):
+            previous = getattr(self._local, 'scope', None)
+            scope = RequestScope(self, parent.memo)
+            self._local.scope = scope
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._local.scope = previous
+                scope.close()
+        return run
+    
+    def get_connection(self):
+        """Get a connection: the request's shared connection inside a scope, otherwise a pooled one"""
+        scope = self.current_scope()
+        if scope:
+            return scope.connection()
+        
+        conn, _ = self._checkout()
+        if conn is None:
+            return None
+        return PooledConnection(conn, self._release)
+    
+    def _checkout(self) -> Tuple[Optional[Any], float]:
+        """Check a raw connection out of the pool, waiting up to DB_POOL_WAIT_TIMEOUT for a free slot"""
+        if not self.pool:
+            return None, 0.0
+        
+        start = time.time()
+        acquired = self._slots.acquire(timeout=DB_POOL_WAIT_TIMEOUT)
+        waited = time.time() - start
+        
+        with self._stats_lock:
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            if not acquired:
+                self._timeouts += 1
+        
+        if not acquired:
+            logger.error(f"Timed out after {waited:.2f}s waiting for a DB connection "
+                         f"({self.pool_size} in use)")
+            return None, waited
+        
+        try:
+            conn = self.pool.get_connection()
+        except Exception as e:
+            self._slots.release()
+            logger.error(f"Failed to get DB connection: {e}")
+            return None, waited
+        
+        with self._stats_lock:
+            self._checkouts += 1
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+        return conn, waited
+    
+    def _release(self, conn):
+        try:
+            conn.close()
+        except Exception as e:
+            logger.error(f"Failed to return DB connection to pool: {e}")
+        finally:
+            with self._stats_lock:
+                self._in_use -= 1
+            self._slots.release()
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "pool_size": self.pool_size,
+                "in_use": self._in_use,
+                "peak_in_use": self._peak_in_use,
+                "saturation": round(self._in_use / self.pool_size, 2) if self.pool_size else 0.0,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "avg_wait_ms": round(self._wait_total / max(self._checkouts + self._timeouts, 1) * 1000, 2),
+                "max_wait_ms": round(self._wait_max * 1000, 2)
+            }
+    
+    def search_components(self, component_type: str = None, brand: str = None, 
+                         model_query: str = None, max_price: float = None, 
+                         min_price: float = None, limit: int = 50) -> List[Dict]:
+        """Advanced component search with multiple filters"""
+        scope = self.current_scope()
+        memo_key = (component_type, brand, model_query)
+        if scope:
+            cached = scope.memo.lookup(memo_key, min_price, max_price, limit)
+            if cached is not None:
+                return cached
+        
+        results = self._search_components(component_type, brand, model_query, max_price, min_price, limit)
+        
+        if scope:
+            scope.memo.store(memo_key, min_price, max_price, limit, results)
+        return results
+    
+    def _search_components(self, component_type: str = None, brand: str = None,
+                           model_query: str = None, max_price: float = None,
+                           min_price: float = None, limit: int = 50) -> List[Dict]:
+        if component_catalog.can_serve(component_type, brand, model_query):
+            return component_catalog.search(component_type, min_price, max_price, limit)
+        if component_catalog.loaded and model_query:
+            results = model_search_index.match_models(model_query, brand, component_type,
+                                                      max_price, min_price, limit)
+            for result in results:
+                result.pop('relevance_score', None)
+            return results
+        
+        # SQL results are shared with the other workers on this host
+        version = self.components_version() if shared_cache else None
+        if version:
+            shared_key = json.dumps([component_type, brand, model_query, max_price, min_price, limit])
+            cached = shared_cache.get('search', version, shared_key)
+            if cached is not None:
+                return cached
+        
+        # Resolved before the checkout: a first-time schema lookup takes a connection of its own
+        fulltext = bool(model_query) and self.schema_has('components', index='ft_model')
+        conn = self.get_connection()
+        if not conn:
+            return []
+        
+        try:
+            cursor = conn.cursor(dictionary=True)
+            
+            conditions = []
+            params = []
+            
+            if component_type:
+                conditions.append("type = %s")
+                params.append(component_type)
+            
+            if brand:
+                conditions.append("brand LIKE %s")
+                params.append(f"%{brand}%")
+            
+            if model_query:
+                if fulltext:
+                    conditions.append("(model LIKE %s OR MATCH(model) AGAINST(%s IN NATURAL LANGUAGE MODE))")
+                    params.extend([f"%{model_query}%", model_query])
+                else:
+                    conditions.append("model LIKE %s")
+                    params.append(f"%{model_query}%")
+            
+            if max_price:
+                conditions.append("price <= %s")
+                params.append(max_price)
+            
+            if min_price:
+                conditions.append("price >= %s")
+                params.append(min_price)
+            
+            where_clause = " AND ".join(conditions) if conditions else "1=1"
+            
+            query = f"""
+                SELECT id, type, brand, model, price, currency, image_url, 
+                       source_url, last_updated 
+                FROM components 
+                WHERE {where_clause}
+                ORDER BY price ASC
+                LIMIT %s
+            """
+            params.append(limit)
+            
+            cursor.execute(query, params)
+            results = cursor.fetchall()
+            
+            cursor.close()
+            conn.close()
+            
+            # Convert Decimal prices to float - ensure all are converted
+            for result in results:
+                if 'price' in result and result['price'] is not None:
+                    result['price'] = float(to_float(result['price']))  # Double conversion to ensure float
+            
+            if version:
+                results = shared_cache.put('search', version, shared_key, results)
+            return results
+        except Exception as e:
+            logger.error(f"Database search error: {e}")
+            if conn:
+                conn.close()
+            return []
+    
+    def search_components_batch(self, windows: Dict[str, Tuple[float, float, int]]) -> Dict[str, List[Dict]]:
+        """
+        Fetch candidates for several component types at once.
+        windows maps type -> (min_price, max_price, limit); all windows are answered by one
+        UNION ALL query (or by the in-memory catalog when it is loaded).
+        """
+        results = {comp_type: [] for comp_type in windows}
+        scope = self.current_scope()
+        
+        # Windows already answered earlier in this request never reach the database
+        pending = {}
+        for comp_type, window in windows.items():
+            cached = scope.memo.lookup((comp_type, None, None), *window) if scope else None
+            if cached is not None:
+                results[comp_type] = cached
+            else:
+                pending[comp_type] = window
+        
+        if pending:
+            for comp_type, rows in self._search_components_batch(pending).items():
+                results[comp_type] = rows
+                if scope:
+                    scope.memo.store((comp_type, None, None), *pending[comp_type], rows)
+        return results
+    
+    def _search_components_batch(self, windows: Dict[str, Tuple[float, float, int]]) -> Dict[str, List[Dict]]:
+        results = {comp_type: [] for comp_type in windows}
+        if component_catalog.loaded:
+            for comp_type, (min_price, max_price, limit) in windows.items():
+                results[comp_type] = component_catalog.search(comp_type, min_price, max_price, limit)
+            return results
+        
+        conn = self.get_connection()
+        if not conn:
+            return results
+        
+        try:
+            cursor = conn.cursor(dictionary=True)
+            
+            selects = []
+            params = []
+            for comp_type, (min_price, max_price, limit) in windows.items():
+                conditions = ["type = %s"]
+                params.append(comp_type)
+                if max_price:
+                    conditions.append("price <= %s")
+                    params.append(max_price)
+                if min_price:
+                    conditions.append("price >= %s")
+                    params.append(min_price)
+                params.append(limit)
+                selects.append(f"""
+                    (SELECT id, type, brand, model, price, currency, image_url, 
+                            source_url, last_updated 
+                     FROM components 
+                     WHERE {" AND ".join(conditions)}
+                     ORDER BY price ASC
+                     LIMIT %s)
+                """)
+            
+            cursor.execute(" UNION ALL ".join(selects), params)
+            rows = cursor.fetchall()
+            
+            cursor.close()
+            conn.close()
+            
+            for row in rows:
+                row['price'] = to_float(row['price'])
+                if row['type'] in results:
+                    results[row['type']].append(row)
+            for comp_type in results:
+                results[comp_type].sort(key=lambda x: (x['price'], x['id']))
+            
+            return results
+        except Exception as e:
+            logger.error(f"Batch component search error: {e}")
+            if conn:
+                conn.close()
+            return results
+    
+    def prefetch_candidate_pool(self, windows: Dict[str, Tuple[float, float, int]]) -> 'CandidatePool':
+        """Prefetch every candidate window of a build in one round trip"""
+        return CandidatePool(self, windows, self.search_components_batch(windows))
+    
+    def fuzzy_search_components(self, query: str, component_type: str = None, 
+                                max_price: float = None) -> List[Dict]:
+        """Fuzzy search for components with intelligent matching"""
+        if component_catalog.loaded:
+            return model_search_index.search(query, component_type=component_type, max_price=max_price)
+        
+        # Resolved before the checkout: a first-time schema lookup takes a connection of its own
+        fulltext = self.schema_has('components', index='ft_brand_model')
+        conn = self.get_connection()
+        if not conn:
+            return []
+        
+        try:
+            cursor = conn.cursor(dictionary=True)
+            
+            # Build fuzzy search query
+            conditions = []
+            params = []
+            
+            if component_type:
+                conditions.append("type = %s")
+                params.append(component_type)
+            
+            if max_price:
+                conditions.append("price <= %s")
+                params.append(max_price)
+            
+            # Extract keywords from query (very short words are skipped)
+            keywords = [keyword for keyword in query.lower().split() if len(keyword) > 2]
+            if keywords and fulltext:
+                conditions.append("MATCH(brand, model) AGAINST(%s IN NATURAL LANGUAGE MODE)")
+                params.append(' '.join(keywords))
+            elif keywords:
+                conditions.append(f"({' OR '.join(['(model LIKE %s OR brand LIKE %s)'] * len(keywords))})")
+                for keyword in keywords:
+                    params.extend([f"%{keyword}%", f"%{keyword}%"])
+            
+            where_clause = " AND ".join(conditions) if conditions else "1=1"
+            
+            if fulltext:
+                # Relevance comes from the ft_brand_model FULLTEXT index
+                relevance = "MATCH(brand, model) AGAINST(%s IN NATURAL LANGUAGE MODE)"
+                relevance_params = [' '.join(keywords) or query]
+            else:
+                # Database without the database.sql FULLTEXT migration: whole-query, then first-words match
+                relevance = "(CASE WHEN model LIKE %s THEN 100 WHEN model LIKE %s THEN 50 ELSE 0 END)"
+                relevance_params = [f"%{query}%", f"%{' '.join(keywords[:2])}%"]
+            
+            query_sql = f"""
+                SELECT id, type, brand, model, price, currency, image_url, 
+                       source_url, last_updated,
+                       {relevance} as relevance_score
+                FROM components 
+                WHERE {where_clause}
+                ORDER BY relevance_score DESC, price ASC
+                LIMIT 20
+            """
+            params = relevance_params + params
+            
+            cursor.execute(query_sql, params)
+            results = cursor.fetchall()
+            
+            cursor.close()
+            conn.close()
+            
+            # Convert Decimal prices to float
+            for result in results:
+                if 'price' in result:
+                    result['price'] = to_float(result['price'])  # Simplified
+            
+            return results
+        except Exception as e:
+            logger.error(f"Fuzzy search error: {e}")
+            if conn:
+                conn.close()
+            return []
+    
+    def get_component_by_id(self, component_id: int) -> Optional[Dict]:
+        """Get specific component by ID"""
+        conn = self.get_connection()
+        if not conn:
+            return None
+        
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(
+                "SELECT * FROM components WHERE id = %s",
+                (component_id,)
+            )
+            result = cursor.fetchone()
+            cursor.close()
+            conn.close()
+            
+            # Convert Decimal price to float
+            if result and 'price' in result:
+                result['price'] = to_float(result['price'])
+            
+            return result
+        except Exception as e:
+            logger.error(f"Get component error: {e}")
+            if conn:
+                conn.close()
+            return None
+    
     def get_alternatives(self, component_id: int, price_range: float = 5000) -> List[Dict]:
         """Get alternative components with similar price"""
         component = self.get_component_by_id(component_id)
@@ -497,6 +2304,267 @@ class DatabaseManager:
             return False
 
     # Recommendation management methods
+    RECOMMENDATION_INSERT = """
+        INSERT INTO recommendations 
+        (ai_response, query_analysis, components_found, needs_update, budget_analysis)
+        VALUES (%s, %s, %s, %s, %s)
+    """
+    
+    RECOMMENDATION_INSERT_WITH_ID = """
+        INSERT INTO recommendations 
+        (id, ai_response, query_analysis, components_found, needs_update, budget_analysis)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """
+    
+    RECOMMENDATION_TIER_INSERT = """
+        INSERT INTO recommendation_tiers 
+        (recommendation_id, tier_name, total_price, components_count)
+        VALUES (%s, %s, %s, %s)
+    """
+    
+    RECOMMENDATION_COMPONENT_INSERT = """
+        INSERT INTO recommendation_components 
+        (recommendation_id, component_id, component_type, brand, model, price, currency, 
+         image_url, source_url, tier)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """
+    
+    # 'copy' storage: the full row, without the component_id column older databases lack
+    RECOMMENDATION_COMPONENT_COPY_INSERT = """
+        INSERT INTO recommendation_components 
+        (recommendation_id, component_type, brand, model, price, currency, 
+         image_url, source_url, tier)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """
+    
+    # Columns rehydrated from the components table for rows stored by reference
+    REFERENCE_FIELDS = ('brand', 'model', 'currency', 'image_url', 'source_url')
+    
+    @property
+    def component_insert(self) -> str:
+        """INSERT matching the rows _recommendation_component_row builds"""
+        if self.component_storage == 'reference':
+            return self.RECOMMENDATION_COMPONENT_INSERT
+        return self.RECOMMENDATION_COMPONENT_COPY_INSERT
+    
+    def _recommendation_component_row(self, recommendation_id: int, component: Dict, tier: str) -> tuple:
+        copied = (
+            component.get('type'),
+            component.get('brand'),
+            component.get('model'),
+            component.get('price'),
+            component.get('currency', 'PHP'),
+            component.get('image_url'),
+            component.get('source_url'),
+            tier
+        )
+        if self.component_storage != 'reference':
+            return (recommendation_id,) + copied
+        
+        component_id = component.get('id') or component.get('component_id')
+        if not component_id:
+            return (recommendation_id, None) + copied
+        # image_url can be a multi-KB data URI; it is looked up again on read instead
+        return (
+            recommendation_id,
+            component_id,
+            component.get('type'),
+            component.get('brand'),
+            component.get('model'),
+            component.get('price'),
+            component.get('currency', 'PHP'),
+            None,
+            None,
+            tier
+        )
+    
+    def hydrate_components(self, components: List[Dict]) -> List[Dict]:
+        """
+        Fill the columns of reference-stored recommendation components (in place) from the catalog,
+        falling back to one IN (...) query for ids the catalog cannot answer.
+        The stored price is a snapshot and is never overwritten.
+        """
+        pending = {}
+        for component in components:
+            component_id = component.get('component_id')
+            if component_id and any(component.get(field) is None for field in self.REFERENCE_FIELDS):
+                pending.setdefault(int(component_id), []).append(component)
+        
+        if not pending:
+            return components
+        
+        found = {}
+        if component_catalog.loaded:
+            for component_id in pending:
+                row = component_catalog.get(component_id)
+                if row:
+                    found[component_id] = row
+        
+        missing = [component_id for component_id in pending if component_id not in found]
+        if missing:
+            conn = self.get_connection()
+            if conn:
+                try:
+                    cursor = conn.cursor(dictionary=True)
+                    placeholders = ', '.join(['%s'] * len(missing))
+                    cursor.execute(
+                        f"SELECT id, brand, model, currency, image_url, source_url "
+                        f"FROM components WHERE id IN ({placeholders})",
+                        tuple(missing)
+                    )
+                    for row in cursor.fetchall():
+                        found[int(row['id'])] = row
+                    cursor.close()
+                except Exception as e:
+                    logger.error(f"Hydrate components error: {e}")
+                conn.close()
+        
+        for component_id, targets in pending.items():
+            row = found.get(component_id)
+            if not row:
+                continue  # part was removed from the catalog; keep the stored snapshot
+            for component in targets:
+                for field in self.REFERENCE_FIELDS:
+                    if component.get(field) is None:
+                        component[field] = row.get(field)
+        
+        return components
+    
+    def save_recommendation(self, ai_response: str, query_analysis: Dict, components_found: int,
+                            needs_update: bool, budget_analysis: Dict = None,
+                            tiers: List[Tuple[str, float, int]] = None,
+                            components: List[Tuple[str, Dict]] = None,
+                            recommendation_id: int = None) -> Tuple[Optional[int], Dict[str, float]]:
+        """
+        Insert a recommendation, its tier summaries and its components in one transaction.
+        tiers holds (tier_name, total_price, components_count); components holds (tier, component).
+        recommendation_id is a reserved id (see reserve_recommendation_ids); without one the row
+        takes AUTO_INCREMENT, which can land inside a block reserved for a queued write.
+        Returns the recommendation id (None on failure) and per-phase timings in ms.
+        """
+        timings = {}
+        phase_start = time.time()
+        
+        def mark(phase: str):
+            nonlocal phase_start
+            now = time.time()
+            timings[phase] = round((now - phase_start) * 1000, 2)
+            phase_start = now
+        
+        conn = self.get_connection()
+        mark('connection_ms')
+        if not conn:
+            return None, timings
+        
+        try:
+            cursor = conn.cursor()
+            
+            recommendation_values = (
+                ai_response,
+                json.dumps(query_analysis) if query_analysis else None,
+                components_found,
+                needs_update,
+                json.dumps(budget_analysis) if budget_analysis else None
+            )
+            if recommendation_id is not None:
+                cursor.execute(self.RECOMMENDATION_INSERT_WITH_ID, (recommendation_id,) + recommendation_values)
+            else:
+                cursor.execute(self.RECOMMENDATION_INSERT, recommendation_values)
+                recommendation_id = cursor.lastrowid
+            mark('recommendation_ms')
+            
+            if tiers:
+                cursor.executemany(self.RECOMMENDATION_TIER_INSERT, [
+                    (recommendation_id, tier_name, total_price, components_count)
+                    for tier_name, total_price, components_count in tiers
+                ])
+            mark('tiers_ms')
+            
+            if components:
+                cursor.executemany(self.component_insert, [
+                    self._recommendation_component_row(recommendation_id, component, tier)
+                    for tier, component in components
+                ])
+            mark('components_ms')
+            
+            conn.commit()
+            mark('commit_ms')
+            cursor.close()
+            conn.close()
+            
+            return recommendation_id, timings
+        except Exception as e:
+            logger.error(f"Save recommendation error: {e}")
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            conn.close()
+            return None, timings
+    
+    def reserve_recommendation_ids(self, count: int) -> Optional[Tuple[int, int]]:
+        """
+        Reserve a block of recommendation ids [start, end) from recommendation_id_sequence.
+        GREATEST() keeps the block above any row inserted through AUTO_INCREMENT.
+        """
+        conn = self.get_connection()
+        if not conn:
+            return None
+        
+        try:
+            cursor = conn.cursor()
+            reserve_query = """
+                UPDATE recommendation_id_sequence
+                SET next_id = LAST_INSERT_ID(
+                    GREATEST(next_id, (SELECT COALESCE(MAX(id), 0) + 1 FROM recommendations)) + %s
+                )
+                WHERE id = 1
+            """
+            cursor.execute(reserve_query, (count,))
+            if cursor.rowcount == 0:
+                cursor.execute("INSERT IGNORE INTO recommendation_id_sequence (id, next_id) VALUES (1, 1)")
+                cursor.execute(reserve_query, (count,))
+            
+            cursor.execute("SELECT LAST_INSERT_ID()")
+            end = int(cursor.fetchone()[0])
+            conn.commit()
+            cursor.close()
+            conn.close()
+            
+            return end - count, end
+        except Exception as e:
+            logger.error(f"Reserve recommendation ids error: {e}")
+            if conn:
+                conn.close()
+            return None
+    
+    def save_recommendation_rows(self, recommendations: List[tuple], tiers: List[tuple],
+                                 components: List[tuple]) -> bool:
+        """Insert prepared rows for one or more recommendations (ids already reserved) in one transaction"""
+        conn = self.get_connection()
+        if not conn:
+            return False
+        
+        try:
+            cursor = conn.cursor()
+            cursor.executemany(self.RECOMMENDATION_INSERT_WITH_ID, recommendations)
+            if tiers:
+                cursor.executemany(self.RECOMMENDATION_TIER_INSERT, tiers)
+            if components:
+                cursor.executemany(self.component_insert, components)
+            conn.commit()
+            cursor.close()
+            conn.close()
+            return True
+        except Exception as e:
+            logger.error(f"Save recommendation rows error: {e}")
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            conn.close()
+            return False
+    
     def create_recommendation(self, ai_response: str, query_analysis: Dict, 
                             components_found: int, needs_update: bool, 
                             budget_analysis: Dict = None) -> int:
@@ -508,14 +2576,7 @@ class DatabaseManager:
         try:
             cursor = conn.cursor()
             
-            query = """
-                INSERT INTO recommendations 
-                (ai_response, query_analysis, components_found, needs_update, budget_analysis)
-                VALUES (%s, %s, %s, %s, %s)
-            """
-            
-            import json
-            cursor.execute(query, (
+            cursor.execute(self.RECOMMENDATION_INSERT, (
                 ai_response,
                 json.dumps(query_analysis) if query_analysis else None,
                 components_found,
@@ -545,24 +2606,8 @@ class DatabaseManager:
         try:
             cursor = conn.cursor()
             
-            query = """
-                INSERT INTO recommendation_components 
-                (recommendation_id, component_type, brand, model, price, currency, 
-                 image_url, source_url, tier)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            
-            cursor.execute(query, (
-                recommendation_id,
-                component.get('type'),
-                component.get('brand'),
-                component.get('model'),
-                component.get('price'),
-                component.get('currency', 'PHP'),
-                component.get('image_url'),
-                component.get('source_url'),
-                tier
-            ))
+            cursor.execute(self.component_insert,
+                           self._recommendation_component_row(recommendation_id, component, tier))
             
             conn.commit()
             cursor.close()
@@ -584,13 +2629,7 @@ class DatabaseManager:
         try:
             cursor = conn.cursor()
             
-            query = """
-                INSERT INTO recommendation_tiers 
-                (recommendation_id, tier_name, total_price, components_count)
-                VALUES (%s, %s, %s, %s)
-            """
-            
-            cursor.execute(query, (
+            cursor.execute(self.RECOMMENDATION_TIER_INSERT, (
                 recommendation_id,
                 tier_name,
                 total_price,
@@ -607,6 +2646,44 @@ class DatabaseManager:
                 conn.close()
             return False
     
+    def components_version(self) -> Optional[str]:
+        """
+        "MAX(last_updated)|COUNT(*)" of the components table: the same string in every process,
+        so it versions caches shared between workers. Taken from the catalog when it is loaded,
+        otherwise polled from MySQL at most every COMPONENTS_VERSION_TTL seconds.
+        """
+        if component_catalog.loaded:
+            with component_catalog.lock:
+                watermark, count = component_catalog.watermark, len(component_catalog.rows)
+            return f"{watermark.isoformat() if watermark else ''}|{count}"
+        
+        now = time.time()
+        if now - self._components_version_checked > COMPONENTS_VERSION_TTL:
+            self._components_version = self.get_components_version()
+            self._components_version_checked = now
+        return self._components_version
+    
+    def get_components_version(self) -> Optional[str]:
+        """MAX(components.last_updated) and COUNT(*) as a version string (deletes change the count)"""
+        conn = self.get_connection()
+        if not conn:
+            return None
+        
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT MAX(last_updated), COUNT(*) FROM components")
+            row = cursor.fetchone()
+            cursor.close()
+            conn.close()
+            if not row:
+                return None
+            return f"{row[0].isoformat() if row[0] else ''}|{row[1]}"
+        except Exception as e:
+            logger.error(f"Components version error: {e}")
+            if conn:
+                conn.close()
+            return None
+    
     def get_recommendation_data(self, recommendation_id: int) -> Dict:
         """Get all data for a recommendation"""
         conn = self.get_connection()
@@ -621,6 +2698,8 @@ class DatabaseManager:
             recommendation = cursor.fetchone()
             
             if not recommendation:
+                cursor.close()
+                conn.close()
                 return None
             
             # Get components
@@ -640,6 +2719,8 @@ class DatabaseManager:
             cursor.close()
             conn.close()
             
+            self.hydrate_components(components)
+            
             # Parse JSON fields
             import json
             if recommendation.get('query_analysis'):
@@ -648,34 +2729,506 @@ class DatabaseManager:
                 recommendation['budget_analysis'] = json.loads(recommendation['budget_analysis'])
             
             return {
-                'recommendation': recommendation,
-                'components': components,
-                'tiers': tiers
+                'recommendation': recommendation,
+                'components': components,
+                'tiers': tiers
+            }
+        except Exception as e:
+            logger.error(f"Get recommendation data error: {e}")
+            if conn:
+                conn.close()
+            return None
+
+class CandidatePool:
+    """
+    Per-build candidate lists prefetched with DatabaseManager.search_components_batch.
+    Answers search_components-style window queries from memory; a query that reaches
+    outside the prefetched windows falls through to the database.
+    """
+    
+    def __init__(self, db, windows: Dict[str, Tuple[float, float, int]], candidates: Dict[str, List[Dict]]):
+        self.db = db
+        self.windows = windows
+        self.candidates = candidates
+        self.prices = {comp_type: [to_float(c['price']) for c in rows] for comp_type, rows in candidates.items()}
+        self.lock = threading.Lock()  # one pool can serve several tier builds at once
+        self.hits = 0
+        self.fallbacks = 0
+    
+    def search_components(self, component_type: str = None, brand: str = None,
+                          model_query: str = None, max_price: float = None,
+                          min_price: float = None, limit: int = 50) -> List[Dict]:
+        """Drop-in replacement for DatabaseManager.search_components"""
+        results = None
+        if not brand and not model_query and component_type in self.windows:
+            results = answer_from_window(self.candidates[component_type], self.prices[component_type],
+                                         self.windows[component_type], min_price, max_price, limit)
+        
+        if results is None:
+            with self.lock:
+                self.fallbacks += 1
+            return self.db.search_components(component_type=component_type, brand=brand,
+                                             model_query=model_query, max_price=max_price,
+                                             min_price=min_price, limit=limit)
+        
+        with self.lock:
+            self.hits += 1
+        return results
+
+db_manager = DatabaseManager()
+if connection_pool:
+    db_manager.check_schema()
+
+class RecommendationWriter:
+    """
+    Write-behind persistence for recommendations.
+    Ids are reserved up front in blocks, so /generate can return the id as soon as the build is
+    computed; a background thread batches queued rows from many requests into one transaction.
+    """
+    
+    def __init__(self, db: DatabaseManager, capacity: int = 1000, batch_size: int = 50,
+                 linger: float = 0.02, id_block: int = 20):
+        self.db = db
+        self.queue = queue.Queue(maxsize=capacity)
+        self.batch_size = batch_size
+        self.linger = linger
+        self.id_block = id_block
+        self.id_lock = threading.Lock()
+        self.next_id = None
+        self.end_id = None
+        self.pending: Dict[int, threading.Event] = {}
+        self.pending_lock = threading.Lock()
+        self.thread = None
+        self.stopping = False
+        self.written = 0
+        self.failed = 0
+        self.sync_writes = 0
+        self.batches = 0
+    
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._run, name='recommendation-writer', daemon=True)
+        self.thread.start()
+    
+    def reserve_id(self) -> Optional[int]:
+        with self.id_lock:
+            if self.next_id is None or self.next_id >= self.end_id:
+                block = self.db.reserve_recommendation_ids(self.id_block)
+                if not block:
+                    return None
+                self.next_id, self.end_id = block
+            recommendation_id = self.next_id
+            self.next_id += 1
+            return recommendation_id
+    
+    def submit(self, ai_response: str, query_analysis: Dict, components_found: int, needs_update: bool,
+               budget_analysis: Dict = None, tiers: List[Tuple[str, float, int]] = None,
+               components: List[Tuple[str, Dict]] = None) -> Optional[int]:
+        """Queue a recommendation for persistence and return its reserved id (None if no id could be reserved)"""
+        if self.stopping:
+            return None
+        recommendation_id = self.reserve_id()
+        if recommendation_id is None:
+            return None
+        
+        # Rows are built now so later changes to the response objects cannot leak into the write
+        job = (
+            recommendation_id,
+            [(recommendation_id, ai_response,
+              json.dumps(query_analysis) if query_analysis else None,
+              components_found, needs_update,
+              json.dumps(budget_analysis) if budget_analysis else None)],
+            [(recommendation_id, tier_name, total_price, components_count)
+             for tier_name, total_price, components_count in (tiers or [])],
+            [self.db._recommendation_component_row(recommendation_id, component, tier)
+             for tier, component in (components or [])]
+        )
+        
+        with self.pending_lock:
+            self.pending[recommendation_id] = threading.Event()
+        
+        try:
+            self.queue.put_nowait(job)
+        except queue.Full:
+            # Queue is saturated: fall back to writing on the request thread
+            self.sync_writes += 1
+            self._write([job])
+        
+        return recommendation_id
+    
+    def wait_for(self, recommendation_id: int, timeout: float = 5.0) -> bool:
+        """Block until a queued recommendation has been written (True if it is not pending)"""
+        with self.pending_lock:
+            event = self.pending.get(recommendation_id)
+        return event.wait(timeout) if event else True
+    
+    def flush(self, timeout: float = 10.0) -> bool:
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with self.pending_lock:
+                if not self.pending:
+                    return True
+            time.sleep(0.01)
+        return False
+    
+    def shutdown(self, timeout: float = 10.0):
+        """Stop accepting work and flush everything still queued"""
+        self.stopping = True
+        if self.thread and self.thread.is_alive():
+            flushed = self.flush(timeout)
+        else:
+            jobs = []
+            while not self.queue.empty():
+                jobs.append(self.queue.get_nowait())
+            if jobs:
+                self._write(jobs)
+            flushed = True
+        if not flushed:
+            logger.error(f"Recommendation writer shut down with {len(self.pending)} unwritten recommendations")
+    
+    def _run(self):
+        while True:
+            job = self.queue.get()
+            jobs = [job]
+            deadline = time.time() + self.linger
+            while len(jobs) < self.batch_size:
+                try:
+                    jobs.append(self.queue.get(timeout=max(0.0, deadline - time.time())))
+                except queue.Empty:
+                    break
+            self._write(jobs)
+    
+    def _write(self, jobs: List[tuple]):
+        recommendations, tiers, components = [], [], []
+        for _, rec_rows, tier_rows, component_rows in jobs:
+            recommendations.extend(rec_rows)
+            tiers.extend(tier_rows)
+            components.extend(component_rows)
+        
+        if self.db.save_recommendation_rows(recommendations, tiers, components):
+            self.batches += 1
+            self.written += len(jobs)
+        elif len(jobs) > 1:
+            # Retry one by one so a single bad row does not drop the whole batch
+            for job in jobs:
+                if self.db.save_recommendation_rows(*job[1:]):
+                    self.written += 1
+                else:
+                    self.failed += 1
+        else:
+            self.failed += 1
+        
+        with self.pending_lock:
+            for job in jobs:
+                event = self.pending.pop(job[0], None)
+                if event:
+                    event.set()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": RECOMMENDATION_WRITE_BEHIND,
+            "queued": self.queue.qsize(),
+            "pending": len(self.pending),
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "sync_writes": self.sync_writes
+        }
+
+recommendation_writer = RecommendationWriter(
+    db_manager,
+    capacity=int(os.getenv('RECOMMENDATION_QUEUE_SIZE', 1000)),
+    id_block=int(os.getenv('RECOMMENDATION_ID_BLOCK', 20))
+)
+if RECOMMENDATION_WRITE_BEHIND:
+    recommendation_writer.start()
+    atexit.register(recommendation_writer.shutdown)
+
+catalog_refresher = CatalogRefresher(
+    component_catalog, db_manager, interval=float(os.getenv('CATALOG_REFRESH_INTERVAL', 60)),
+    reconcile_interval=float(os.getenv('CATALOG_RECONCILE_INTERVAL', 21600)),
+    tombstone_retention=float(os.getenv('CATALOG_TOMBSTONE_RETENTION', 86400))
+)
+
+catalog_refresher.listeners.append(alternatives_index.refresh)
+catalog_refresher.listeners.append(model_search_index.refresh)
+
+if CATALOG_ENABLED:
+    catalog_refresher.reload()  # listeners build the alternatives and model search indexes
+    if connection_pool:
+        catalog_refresher.start()
+
+# Tagalog Translator
+# Message-level caches
+def normalize_message(message: str) -> str:
+    """Cache key (and parser input) for a message: lower case, single spaces, '50 K' -> '50k'"""
+    text = re.sub(r'\s+', ' ', message.strip().lower())
+    return re.sub(r'(\d) ?k\b', r'\1k', text)
+
+class MessageCache:
+    """Bounded LRU keyed by normalized message, with hit/miss counts"""
+    
+    MISSING = object()
+    
+    def __init__(self, max_entries: int = MESSAGE_CACHE_SIZE, max_chars: int = MESSAGE_CACHE_MAX_CHARS):
+        self.lock = threading.Lock()
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self.entries: 'OrderedDict[str, Any]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: str) -> Any:
+        """Cached value, or MessageCache.MISSING"""
+        with self.lock:
+            value = self.entries.get(key, self.MISSING)
+            if value is self.MISSING:
+                self.misses += 1
+            else:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            return value
+    
+    def put(self, key: str, value: Any):
+        if self.max_entries <= 0 or len(key) > self.max_chars:
+            return
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+    
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
             }
-        except Exception as e:
-            logger.error(f"Get recommendation data error: {e}")
-            if conn:
-                conn.close()
-            return None
 
-db_manager = DatabaseManager()
+# Offline Taglish -> English for PC-buying messages
+# Tagalog words and phrases (hyphens split words: "pang-gaming" is "pang" + "gaming"). An empty
+# translation drops the word (particles and linkers). Longer phrases win over their prefixes.
+TAGLISH_LEXICON = {
+    # questions and requests
+    "magkano": "how much", "magkano ang": "how much is", "magkano aabutin": "how much will it cost",
+    "ano": "what", "ano ang": "what is", "anong": "what", "alin": "which", "alin ang": "which is",
+    "paano": "how", "bakit": "why", "saan": "where", "saan makakabili": "where to buy", "kailan": "when",
+    "ilan": "how many", "ilang": "how many",
+    "pwede": "can", "puwede": "can", "pwede ba": "can", "puwede ba": "can", "kaya": "can", "kaya ba": "can it",
+    "gusto": "want", "gusto ko": "i want", "gusto ko ng": "i want", "kailangan": "need",
+    "ayoko": "i don't want", "ayoko ng": "i don't want", "ayaw": "don't want", "ayaw ko": "i don't want",
+    "ayaw ko ng": "i don't want", "hindi ko gusto": "i don't want",
+    "kailangan ko": "i need", "kailangan ko ng": "i need",
+    "paki": "please", "pakitulungan": "please help", "tulong": "help", "tulungan": "help",
+    "tulungan mo ako": "help me", "pakitulungan mo ako": "please help me", "irekomenda": "recommend", "magrekomenda": "recommend",
+    "ipakita": "show", "ipakita mo": "show me", "bigyan mo ako": "give me", "ibigay": "give",
+    "hanapin": "find", "hanapan mo ako": "find me", "salamat": "thanks",
+    # buying and building
+    "bili": "buy", "bumili": "buy", "bibili": "buy", "bilhin": "buy", "bibilhin": "buy", "mabibili": "buy",
+    "gumawa": "build", "gawa": "build", "gawin": "build", "buuin": "build", "bubuo": "build",
+    "sira": "broken", "nasira": "broken", "alam": "know", "hindi ko alam": "i don't know",
+    "palitan": "replace", "papalitan": "replace", "ipalit": "replace", "pag": "", "mag": "",
+    "piyesa": "parts", "piyesang": "parts", "parte": "parts", "presyo": "price", "halaga": "cost",
+    "libo": "thousand", "libong": "thousand", "piso": "pesos",
+    "budget ko": "my budget", "ang budget ko": "my budget", "may budget ako": "i have a budget",
+    # budget limits
+    "hanggang": "within", "hindi lalagpas sa": "under", "hindi lalampas sa": "under",
+    "hindi hihigit sa": "under", "mababa sa": "under", "kulang sa": "under",
+    "lagpas sa": "over", "higit sa": "over", "mahigit": "over",
+    # qualities
+    "mura": "cheap", "murang": "cheap", "mas mura": "cheaper", "pinakamura": "cheapest",
+    "pinaka mura": "cheapest", "maganda": "good", "magandang": "good", "mas maganda": "better",
+    "pinakamaganda": "best", "pinakamagandang": "best", "pinakamurang": "cheapest", "mabilis": "fast", "mabilis na": "fast", "mas mabilis": "faster",
+    "malakas": "powerful", "malakas na": "powerful", "mahina": "weak", "mahal": "expensive",
+    "sulit": "worth it", "sulit na": "worth it", "tahimik": "quiet", "mainit": "hot",
+    "bago": "new", "bagong": "new", "luma": "old", "lumang": "old", "mas": "more", "pinaka": "most",
+    # uses
+    "pang": "for", "para": "for", "para sa": "for", "laro": "games", "maglaro": "play games",
+    "paglalaro": "gaming", "opisina": "office work", "trabaho": "work", "eskwela": "school",
+    "paaralan": "school", "estudyante": "student",
+    "tatakbo": "run", "patakbuhin": "run", "takbo": "run", "kakayanin": "can handle",
+    # pronouns, particles and linkers
+    "ako": "i", "akong": "i", "ko": "my", "akin": "mine", "mo": "you", "ikaw": "you", "siya": "they",
+    "namin": "our", "natin": "our", "meron": "have", "mayroon": "have", "may": "have",
+    "meron akong": "i have", "ang": "the", "yung": "the", "iyong": "the", "ung": "the",
+    "ito": "this", "iyan": "that", "yan": "that", "sa": "in", "nasa": "in", "at": "and", "o": "or",
+    "hindi": "not", "oo": "yes", "kung": "if", "kasi": "because", "dahil": "because", "pero": "but",
+    "tapos": "then", "ngayon": "now", "lang": "only", "lamang": "only", "din": "also", "rin": "also",
+    "sana": "hopefully", "siguro": "maybe", "talaga": "really", "medyo": "somewhat",
+    "ng": "", "na": "", "ba": "", "po": "", "naman": "", "mga": "", "nga": "", "pa": "",
+    # None: the phrase needs word order the lexicon can't produce ("na" as "already"), so the
+    # message goes to the API; "</s>" matches the end of the message
+    "na ako": None, "na ko": None, "na kami": None, "na tayo": None, "na siya": None,
+    "na sila": None, "na mo": None, "na po": None, "na </s>": None,
+}
+
+# "<n> libo" / "<n> libong" -> "<n>k", the shorthand the price parser reads
+TAGLISH_THOUSANDS = frozenset({"libo", "libong"})
+
+# English words a Taglish message carries through unchanged (tokens with digits always do)
+TAGLISH_ENGLISH_WORDS = frozenset("""
+    pc computer desktop laptop gaming game games gamer build builds setup rig unit set budget price
+    cpu gpu ram ssd hdd nvme storage memory motherboard mobo psu power supply case cooler cooling
+    fan fans monitor display screen keyboard mouse speakers speaker headset headphones parts specs
+    spec rtx gtx rx ryzen intel amd nvidia radeon geforce core ddr ddr4 ddr5 upgrade editing edit
+    video photo streaming stream rendering render office school work programming coding design
+    esports fps under below above over around within max maximum min minimum php pesos peso k
+    for and or the a an with without i my me need want can how much what which best good cheap
+    better full complete recommend help please budget-friendly entry mid high end level
+""".split())
+
+class TaglishNormalizer:
+    """
+    Word-level Tagalog -> English for PC-buying messages: a trie over TAGLISH_LEXICON phrases is
+    applied longest match first and English vocabulary and numbers pass through. Coverage is the
+    share of the remaining (Tagalog or unknown) words the lexicon translated.
+    """
+    
+    END = ''
+    END_OF_TEXT = '</s>'
+    
+    def __init__(self, lexicon: Dict[str, Optional[str]] = None, english: frozenset = TAGLISH_ENGLISH_WORDS):
+        self.english = english
+        self.trie: Dict[str, Any] = {}
+        for phrase, translation in (lexicon or TAGLISH_LEXICON).items():
+            node = self.trie
+            for word in phrase.split():
+                node = node.setdefault(word, {})
+            node[self.END] = translation
+    
+    def normalize(self, text: str) -> Tuple[str, float]:
+        """(English text, share of the non-English, non-numeric words the lexicon covered)"""
+        words = [word.strip('.,') for word in re.findall(r"[\w₱][\w₱.,']*", text.lower())]
+        words = [word for word in words if word]
+        if not words:
+            return text, 0.0
+        padded = words + [self.END_OF_TEXT]
+        
+        output = []
+        translated = 0
+        untranslated = 0
+        position = 0
+        while position < len(words):
+            word = words[position]
+            if re.fullmatch(r'\d+(?:\.\d+)?', word) and padded[position + 1] in TAGLISH_THOUSANDS:
+                output.append(f"{word}k")
+                translated += 1
+                position += 2
+                continue
+            
+            # Longest lexicon phrase starting here
+            node, match, match_end = self.trie, False, position
+            for index in range(position, len(padded)):
+                node = node.get(padded[index])
+                if node is None:
+                    break
+                if self.END in node:
+                    match, match_end = node[self.END], index + 1
+            if match is not False:
+                match_end = min(match_end, len(words))
+                if match is None:
+                    untranslated += match_end - position
+                    output.extend(words[position:match_end])
+                else:
+                    translated += match_end - position
+                    if match:
+                        output.append(match)
+                position = match_end
+                continue
+            
+            if word not in self.english and not any(char.isdigit() for char in word):
+                untranslated += 1
+            output.append(word)
+            position += 1
+        
+        tagalog = translated + untranslated
+        return ' '.join(output), translated / tagalog if tagalog else 1.0
 
-# Tagalog Translator
 class TagalogTranslator:
-    """Free translation service for Tagalog to English"""
+    """
+    Free translation service for Tagalog to English.
+    Messages the offline TaglishNormalizer covers (by default: every Tagalog word is in the
+    lexicon) are translated locally; the rest go to the API. Translations are cached by
+    normalized text in memory and, when a store is given, on disk (shared by every worker and
+    kept across restarts); a background thread trims the store.
+    """
     
-    def __init__(self):
+    STORE_NAMESPACE = 'translation'
+    STORE_VERSION = 'tl|en'
+    
+    def __init__(self, store: 'SharedCacheStore' = None, max_entries: int = TRANSLATION_CACHE_MAX_ENTRIES,
+                 compact_interval: float = TRANSLATION_CACHE_COMPACT_INTERVAL,
+                 normalizer: TaglishNormalizer = None, min_coverage: float = TAGLISH_MIN_COVERAGE):
         self.api_url = "https://api.mymemory.translated.net/get"
+        self.cache = MessageCache()  # normalized text -> translation (None: already English)
+        self.normalizer = normalizer or TaglishNormalizer()
+        self.min_coverage = min_coverage
+        self.local_translations = 0
+        self.store = store
+        self.max_entries = max_entries
+        self.compact_interval = compact_interval
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.store_hits = 0
+        self.api_calls = 0
+        self.compacted = 0
+    
+    def start_compaction(self):
+        if not self.store or (self.thread and self.thread.is_alive()):
+            return
+        self.thread = threading.Thread(target=self._run, name='translation-compactor', daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        self.stop_event.set()
+    
+    def _run(self):
+        while not self.stop_event.wait(self.compact_interval):
+            self.compact()
+    
+    def compact(self) -> int:
+        """Trim the store to max_entries; returns the number of translations dropped"""
+        removed = self.store.compact(self.STORE_NAMESPACE, self.max_entries) if self.store else 0
+        if removed:
+            self.compacted += removed
+            logger.info(f"Translation cache compacted: {removed} entries dropped")
+        return removed
     
     def translate_to_english(self, tagalog_text: str) -> str:
-        """Translate Tagalog text to English using MyMemory Translation API"""
+        """Translate Tagalog text to English using MyMemory Translation API (normalized, see normalize_message)"""
+        key = normalize_message(tagalog_text)
+        cached = self.cache.get(key)
+        if cached is not MessageCache.MISSING:
+            return tagalog_text if cached is None else cached
+        
         try:
             # If text is already in English or mixed, return as is
-            if self._is_mostly_english(tagalog_text):
+            if self._is_mostly_english(key):
+                self.cache.put(key, None)
                 return tagalog_text
             
+            local_text, coverage = self.normalizer.normalize(key)
+            if coverage >= self.min_coverage:
+                self.local_translations += 1
+                self.cache.put(key, local_text)
+                logger.info(f"Translated locally ({coverage:.0%} covered): '{tagalog_text}' -> '{local_text}'")
+                return local_text
+            
+            stored = self.store.get(self.STORE_NAMESPACE, self.STORE_VERSION, key) if self.store else None
+            if stored is not None:
+                self.store.touch(self.STORE_NAMESPACE, self.STORE_VERSION, key)
+                self.store_hits += 1
+                self.cache.put(key, stored)
+                return stored
+            
+            self.api_calls += 1
+            # The normalized text is what the result is cached under, so it is what gets translated
             params = {
-                'q': tagalog_text,
+                'q': key,
                 'langpair': 'tl|en',
                 'de': 'your-email@example.com'
             }
@@ -684,11 +3237,21 @@ class TagalogTranslator:
             
             if response.status_code == 200:
                 data = response.json()
+                # Quota and abuse warnings come back as HTTP 200 with the warning as the "translation"
+                if str(data.get('responseStatus')) != '200':
+                    logger.warning(f"Translation API error: {data.get('responseStatus')} {data.get('responseDetails')}")
+                    return tagalog_text
                 translated_text = data['responseData']['translatedText']
                 
                 # Clean up the translation
                 cleaned_text = self._clean_translation(translated_text)
+                if not cleaned_text:
+                    logger.warning(f"Translation API returned nothing for '{tagalog_text}'")
+                    return tagalog_text
                 logger.info(f"Translated: '{tagalog_text}' -> '{cleaned_text}'")
+                self.cache.put(key, cleaned_text)
+                if self.store:
+                    self.store.put(self.STORE_NAMESPACE, self.STORE_VERSION, key, cleaned_text)
                 return cleaned_text
             else:
                 logger.warning(f"Translation API error: {response.status_code}")
@@ -725,81 +3288,520 @@ class TagalogTranslator:
         clean_text = clean_text.strip()
         
         return clean_text
+    
+    def stats(self) -> Dict[str, Any]:
+        translated = self.local_translations + self.store_hits + self.api_calls
+        return {
+            "memory": self.cache.stats(),
+            "local": self.local_translations,
+            "store_hits": self.store_hits,
+            "api_calls": self.api_calls,
+            "local_ratio": round(self.local_translations / translated, 3) if translated else 0.0,
+            "store_entries_dropped": self.compacted,
+            "store": self.store.stats() if self.store else None
+        }
 
-translator = TagalogTranslator()
+translator = TagalogTranslator(translation_store)
+if translation_store:
+    translator.compact()
+    translator.start_compaction()
 
 # Component Compatibility Checker
+# Constraint -> the part types it reads (a constraint holds while one of its parts is missing)
+COMPATIBILITY_CONSTRAINTS = {
+    "cpu_motherboard": ("cpu", "motherboard"),
+    "ram_motherboard": ("ram", "motherboard"),
+    "case_motherboard": ("case", "motherboard"),
+    "psu_wattage": ("psu", "cpu", "gpu"),
+}
+CONSTRAINTS_BY_TYPE = {
+    comp_type: tuple(name for name, types in COMPATIBILITY_CONSTRAINTS.items() if comp_type in types)
+    for comp_type in {comp_type for types in COMPATIBILITY_CONSTRAINTS.values() for comp_type in types}
+}
+# Constraints that are a bitmask overlap test on one attribute: name -> attribute index
+BITMASK_CONSTRAINTS = {"cpu_motherboard": 0, "ram_motherboard": 1, "case_motherboard": 2}
+
 class ComponentCompatibilityChecker:
+    """
+    Compatibility rules over component_attributes(): CPU/motherboard socket, RAM/motherboard
+    memory generation, case/motherboard form factor and PSU wattage against CPU + GPU TDP.
+    Catalog components carry precomputed attributes, so a check is a handful of integer tests.
+    """
+    
     def __init__(self):
-        self.compatibility_rules = {
-            "cpu_motherboard": {
-                "intel": ["lga1700", "lga1200", "lga1151"],
-                "amd": ["am4", "am5"]
-            },
-            "ram_motherboard": {
-                "ddr4": ["ddr4"],
-                "ddr5": ["ddr5"]
-            },
-            "case_components": {
-                "atx": ["atx", "microatx", "miniitx"],
-                "microatx": ["microatx", "miniitx"],
-                "miniitx": ["miniitx"]
-            }
+        self._attribute_cache: Dict[tuple, Tuple[int, int, int, int]] = {}  # parts outside the catalog
+        self._attribute_lock = threading.Lock()  # tiers check builds concurrently
+        self.last_propagation: Dict[str, Tuple[int, int]] = {}
+        self.rules = {
+            "cpu_motherboard": self._check_cpu_motherboard_compatibility,
+            "ram_motherboard": self._check_ram_motherboard_compatibility,
+            "case_motherboard": self._check_case_motherboard_compatibility,
         }
     
+    def attributes(self, component: Dict) -> Tuple[int, int, int, int]:
+        component_id = component.get('id')
+        if component_id is not None:
+            attributes = component_catalog.attributes.get(component_id)
+            if attributes is not None:
+                return attributes
+        
+        key = (component.get('type'), component.get('model'))
+        with self._attribute_lock:
+            attributes = self._attribute_cache.get(key)
+        if attributes is None:
+            attributes = component_attributes(component.get('type'), component.get('model'), component.get('specs'))
+            with self._attribute_lock:
+                if len(self._attribute_cache) >= 4096:
+                    self._attribute_cache.clear()
+                self._attribute_cache[key] = attributes
+        return attributes
+    
     def check_compatibility(self, components: List[Dict]) -> Tuple[bool, List[str]]:
         """Check if all components are compatible with each other"""
-        issues = []
-        
-        # Extract key components
-        cpu = next((c for c in components if c['type'] == 'cpu'), None)
-        motherboard = next((c for c in components if c['type'] == 'motherboard'), None)
-        ram = next((c for c in components if c['type'] == 'ram'), None)
-        case = next((c for c in components if c['type'] == 'case'), None)
-        
-        if cpu and motherboard:
-            if not self._check_cpu_motherboard_compatibility(cpu, motherboard):
-                issues.append(f"CPU {cpu.get('model', '')} is not compatible with motherboard {motherboard.get('model', '')}")
-        
-        if ram and motherboard:
-            if not self._check_ram_motherboard_compatibility(ram, motherboard):
-                issues.append(f"RAM type not compatible with motherboard")
-        
-        if case and motherboard:
-            if not self._check_case_motherboard_compatibility(case, motherboard):
-                issues.append(f"Case size not compatible with motherboard form factor")
-        
+        # Extract key components (the first of each type, in one pass)
+        parts = {}
+        for component in components:
+            parts.setdefault(component['type'], component)
+        attributes = {comp_type: self.attributes(parts[comp_type])
+                      for comp_type in CONSTRAINTS_BY_TYPE if comp_type in parts}
+        
+        issues = [self.issue(name, parts) for name in COMPATIBILITY_CONSTRAINTS
+                  if not self.constraint_holds(name, attributes)]
         return len(issues) == 0, issues
     
-    def _check_cpu_motherboard_compatibility(self, cpu: Dict, motherboard: Dict) -> bool:
-        """Check CPU and motherboard socket compatibility"""
-        cpu_model = cpu.get('model', '').lower()
-        motherboard_model = motherboard.get('model', '').lower()
-        
-        if 'intel' in cpu_model and 'intel' in motherboard_model:
-            return True
-        if 'amd' in cpu_model and 'amd' in motherboard_model:
+    def constraint_holds(self, name: str, attributes: Dict[str, Tuple[int, ...]]) -> bool:
+        """Evaluate one constraint over the attributes of the parts present, by type"""
+        if name == "psu_wattage":
+            psu = attributes.get("psu")
+            draw = sum(attributes[comp_type][3] for comp_type in ("cpu", "gpu") if comp_type in attributes)
+            return psu is None or self._check_psu_wattage(psu, draw)
+        part_type, board_type = COMPATIBILITY_CONSTRAINTS[name]
+        if part_type not in attributes or board_type not in attributes:
             return True
-        if 'ryzen' in cpu_model and ('am4' in motherboard_model or 'am5' in motherboard_model):
-            return True
-        
-        return True
+        return self.rules[name](attributes[part_type], attributes[board_type])
+    
+    def attribute_matrix(self, components: List[Dict]) -> np.ndarray:
+        """(n, 4) int64 array of the components' attributes, in order"""
+        return np.array([self.attributes(component) for component in components], dtype=np.int64).reshape(-1, 4)
+    
+    def narrow(self, pools: Dict[str, List[Dict]], anchors: Dict[str, Dict] = None,
+               matrices: Dict[str, np.ndarray] = None) -> Dict[str, List[Dict]]:
+        """
+        Constraint propagation over candidate pools: anchored types are fixed to their part and
+        every other pool keeps only members that are compatible with the anchors and with at
+        least one surviving member of each related pool, repeated until nothing changes. Masks
+        are vectorised over attribute arrays (pass the pools' attribute_matrix results as
+        matrices when narrowing the same pools repeatedly). Pool sizes before/after go to
+        last_propagation.
+        """
+        anchors = anchors or {}
+        known = matrices or {}
+        pools = dict(pools, **{comp_type: [part] for comp_type, part in anchors.items()})
+        matrices = {comp_type: known[comp_type] if comp_type in known and comp_type not in anchors
+                    else self.attribute_matrix(pool)
+                    for comp_type, pool in pools.items() if comp_type in CONSTRAINTS_BY_TYPE and pool}
+        masks = {comp_type: np.ones(len(matrix), dtype=bool) for comp_type, matrix in matrices.items()}
+        
+        changed = True
+        while changed:
+            changed = False
+            for comp_type, supported in self._supports(matrices, masks):
+                narrowed = masks[comp_type] & supported
+                if narrowed.sum() < masks[comp_type].sum():
+                    masks[comp_type] = narrowed
+                    changed = True
+        
+        result = dict(pools)
+        stats = {}
+        for comp_type, mask in masks.items():
+            if comp_type not in anchors:
+                result[comp_type] = [part for part, keep in zip(pools[comp_type], mask.tolist()) if keep]
+                stats[comp_type] = (len(mask), len(result[comp_type]))
+        self.last_propagation = stats
+        return result
+    
+    def _supports(self, matrices: Dict[str, np.ndarray], masks: Dict[str, np.ndarray]):
+        """(type, mask of members that some surviving member of each related pool satisfies)"""
+        for name, field in BITMASK_CONSTRAINTS.items():
+            part_type, board_type = COMPATIBILITY_CONSTRAINTS[name]
+            if part_type not in matrices or board_type not in matrices:
+                continue
+            for this, other in ((part_type, board_type), (board_type, part_type)):
+                values = matrices[this][:, field]
+                others = matrices[other][masks[other], field]
+                if not len(others):
+                    yield this, np.zeros(len(values), dtype=bool)
+                elif (others == 0).any():
+                    yield this, np.ones(len(values), dtype=bool)  # an unparsed part fits anything
+                else:
+                    yield this, (values == 0) | ((values & np.bitwise_or.reduce(others)) != 0)
+        
+        # psu_wattage: psu >= cpu TDP + gpu TDP + base, checked against the most favourable partners
+        if "psu" in matrices:
+            psu_watts = matrices["psu"][masks["psu"], 3]
+            lowest = {comp_type: int(matrices[comp_type][masks[comp_type], 3].min()) if masks[comp_type].any() else 0
+                      for comp_type in ("cpu", "gpu") if comp_type in matrices}
+            draw = sum(lowest.values())
+            watts = matrices["psu"][:, 3]
+            yield "psu", (watts == 0) | (draw == 0) | (watts >= draw + BASE_SYSTEM_WATTS)
+            if len(psu_watts):
+                strongest = np.inf if (psu_watts == 0).any() else int(psu_watts.max())
+                for comp_type in lowest:
+                    tdp = matrices[comp_type][:, 3]
+                    rest = draw - lowest[comp_type]
+                    yield comp_type, (tdp + rest == 0) | (tdp + rest + BASE_SYSTEM_WATTS <= strongest)
+    
+    @staticmethod
+    def issue(name: str, parts: Dict[str, Dict]) -> str:
+        if name == "cpu_motherboard":
+            return f"CPU {parts['cpu'].get('model', '')} is not compatible with motherboard {parts['motherboard'].get('model', '')}"
+        return {
+            "ram_motherboard": "RAM type not compatible with motherboard",
+            "case_motherboard": "Case size not compatible with motherboard form factor",
+            "psu_wattage": "Power supply wattage too low for the CPU and GPU",
+        }[name]
     
-    def _check_ram_motherboard_compatibility(self, ram: Dict, motherboard: Dict) -> bool:
+    @staticmethod
+    def _check_cpu_motherboard_compatibility(cpu: Tuple[int, ...], motherboard: Tuple[int, ...]) -> bool:
+        """Check CPU and motherboard socket compatibility"""
+        return not (cpu[0] and motherboard[0]) or bool(cpu[0] & motherboard[0])
+    
+    @staticmethod
+    def _check_ram_motherboard_compatibility(ram: Tuple[int, ...], motherboard: Tuple[int, ...]) -> bool:
         """Check RAM type compatibility"""
-        ram_model = ram.get('model', '').lower()
-        motherboard_model = motherboard.get('model', '').lower()
-        
-        if 'ddr4' in ram_model and 'ddr4' in motherboard_model:
-            return True
-        if 'ddr5' in ram_model and 'ddr5' in motherboard_model:
-            return True
-        
-        return True
+        return not (ram[1] and motherboard[1]) or bool(ram[1] & motherboard[1])
     
-    def _check_case_motherboard_compatibility(self, case: Dict, motherboard: Dict) -> bool:
+    @staticmethod
+    def _check_case_motherboard_compatibility(case: Tuple[int, ...], motherboard: Tuple[int, ...]) -> bool:
         """Check case and motherboard form factor compatibility"""
-        return True
+        return not (case[2] and motherboard[2]) or bool(case[2] & motherboard[2])
+    
+    @staticmethod
+    def _check_psu_wattage(psu: Tuple[int, ...], draw: int) -> bool:
+        """PSU must cover the CPU and GPU TDP plus the rest of the system"""
+        return not (psu[3] and draw) or psu[3] >= draw + BASE_SYSTEM_WATTS
+
+class BuildState:
+    """
+    A build being improved one part at a time. Keeps a type -> slot index, each checked part's
+    attributes and the constraints currently violated, so testing or applying a swap
+    re-evaluates only the constraints that read the swapped type and never copies the build.
+    """
+    
+    def __init__(self, components: List[Dict], checker: ComponentCompatibilityChecker):
+        self.parts = list(components)
+        self.checker = checker
+        self.slots: Dict[str, int] = {}
+        for index, component in enumerate(self.parts):
+            self.slots.setdefault(component.get('type'), index)  # the first part of a type is the one checked
+        self.attributes = {comp_type: checker.attributes(self.parts[index])
+                           for comp_type, index in self.slots.items() if comp_type in CONSTRAINTS_BY_TYPE}
+        self.violated = {name for name in COMPATIBILITY_CONSTRAINTS
+                         if not checker.constraint_holds(name, self.attributes)}
+        self.total = sum(to_float(component['price']) for component in self.parts)
+    
+    @property
+    def compatible(self) -> bool:
+        return not self.violated
+    
+    def part(self, comp_type: str) -> Optional[Dict]:
+        index = self.slots.get(comp_type)
+        return self.parts[index] if index is not None else None
+    
+    def can_swap(self, candidate: Dict) -> bool:
+        """Would the whole build be compatible with candidate in its type's slot?"""
+        names = CONSTRAINTS_BY_TYPE.get(candidate.get('type'), ())
+        if any(name not in names for name in self.violated):
+            return False
+        return not self._broken(candidate, names)
+    
+    def best_upgrade(self, comp_type: str, candidates: List[Dict], spare: float) -> Optional[Dict]:
+        """
+        The compatible candidate with the most performance (catalog value, then lower price)
+        that costs more than the current part, by at most spare, and outperforms it
+        """
+        current = self.part(comp_type)
+        current_price = to_float(current['price'])
+        current_value = component_catalog.performance_value(current)
+        best, best_key = None, None
+        for candidate in candidates:
+            price = to_float(candidate['price'])
+            if not 0 < price - current_price <= spare:
+                continue
+            key = (component_catalog.performance_value(candidate), -price)
+            if key[0] > current_value and (best_key is None or key > best_key) and self.can_swap(candidate):
+                best, best_key = candidate, key
+        return best
+    
+    def swap(self, candidate: Dict) -> Dict:
+        """Put candidate in its type's slot; returns the part it replaced"""
+        comp_type = candidate.get('type')
+        index = self.slots[comp_type]
+        previous = self.parts[index]
+        names = CONSTRAINTS_BY_TYPE.get(comp_type, ())
+        if names:
+            broken = self._broken(candidate, names)
+            self.attributes[comp_type] = self.checker.attributes(candidate)
+            self.violated = (self.violated - set(names)) | broken
+        self.parts[index] = candidate
+        self.total += to_float(candidate['price']) - to_float(previous['price'])
+        return previous
+    
+    def _broken(self, candidate: Dict, names: Tuple[str, ...]) -> set:
+        """Constraints among names that fail with candidate in place of its type's part"""
+        if not names:
+            return set()
+        comp_type = candidate.get('type')
+        previous = self.attributes.get(comp_type)
+        self.attributes[comp_type] = self.checker.attributes(candidate)
+        try:
+            return {name for name in names if not self.checker.constraint_holds(name, self.attributes)}
+        finally:
+            if previous is None:
+                del self.attributes[comp_type]
+            else:
+                self.attributes[comp_type] = previous
+
+# Build optimizer (multiple-choice knapsack over per-type candidate pools)
+class BuildOptimizer:
+    """
+    Picks exactly one candidate per component type so the build fits max_budget and maximizes
+    sum(value - deviation_weight * |price - target|), where value is the part's price-equivalent
+    performance (component_catalog.performance_value, the price itself for unscored parts): pesos
+    buy performance, and pesos spent on a part below its target are worth more than pesos piled
+    onto a part above it.
+    Solved with a dynamic program over price buckets; weights are rounded up so the real total
+    never exceeds the budget. Deterministic: ties keep the cheaper, lower-id candidate.
+    Stateless, so one optimizer serves concurrent solves; candidate dicts are never modified.
+    """
+
+    def __init__(self, buckets: int = 2000, deviation_weight: float = 0.5):
+        self.buckets = buckets
+        self.deviation_weight = deviation_weight
+
+    def solve(self, candidates: Dict[str, List[Dict]], max_budget: float,
+              targets: Dict[str, float] = None,
+              partitions: List[Dict[str, List[Dict]]] = None) -> Tuple[Optional[List[Dict]], Dict[str, Any]]:
+        """
+        (best build in candidates' type order, or None if no combination fits; solve stats).
+        The build's parts are copies of the chosen candidates with float prices.
+        partitions are alternative candidate lists for some of the types (one per motherboard
+        class, say): the other types are solved once and shared, and the best partition wins.
+        """
+        start = time.time()
+        max_budget = to_float(max_budget)
+        targets = targets or {}
+        types = [comp_type for comp_type, options in candidates.items() if options]
+        if not types or max_budget <= 0:
+            return None, {"feasible": False, "ms": 0.0}
+
+        bucket = max(1.0, max_budget / self.buckets)
+        capacity = int(max_budget // bucket)
+        partitions = partitions or [{}]
+        varying = {comp_type for partition in partitions for comp_type in partition}
+
+        dp = np.full(capacity + 1, -np.inf)
+        dp[0] = 0.0
+        shared_layers = []
+        for comp_type in types:
+            if comp_type in varying:
+                continue
+            layer = self._layer(dp, candidates[comp_type], targets.get(comp_type), bucket, capacity)
+            if layer is None:
+                return None, {"feasible": False, "ms": round((time.time() - start) * 1000, 2)}
+            dp = layer[0]
+            shared_layers.append((comp_type, layer))
+
+        best_value, best_position, best_layers = -np.inf, None, None
+        for partition in partitions:
+            partition_dp, layers = dp, list(shared_layers)
+            for comp_type in types:
+                if comp_type not in varying:
+                    continue
+                layer = self._layer(partition_dp, partition.get(comp_type, candidates[comp_type]),
+                                    targets.get(comp_type), bucket, capacity)
+                if layer is None:
+                    break
+                partition_dp = layer[0]
+                layers.append((comp_type, layer))
+            else:
+                position = int(np.argmax(partition_dp))
+                if partition_dp[position] > best_value:
+                    best_value, best_position, best_layers = float(partition_dp[position]), position, layers
+        if best_layers is None:
+            return None, {"feasible": False, "ms": round((time.time() - start) * 1000, 2)}
+
+        position = best_position
+        chosen = {}
+        for comp_type, (_, choice, options, prices, weights) in reversed(best_layers):
+            index = int(choice[position])
+            chosen[comp_type] = dict(options[index], price=float(prices[index]))
+            position -= int(weights[index])
+        build = [chosen[comp_type] for comp_type in types]
+
+        stats = {
+            "feasible": True,
+            "types": len(types),
+            "candidates": sum(len(layer[2]) for _, layer in best_layers),
+            "partitions": len(partitions),
+            "bucket": round(bucket, 2),
+            "total": round(sum(c['price'] for c in build), 2),
+            "value": round(best_value, 2),
+            "ms": round((time.time() - start) * 1000, 2)
+        }
+        return build, stats
+
+    def _layer(self, dp: np.ndarray, candidates: List[Dict], target: Optional[float], bucket: float,
+               capacity: int) -> Optional[Tuple[np.ndarray, np.ndarray, List[Dict], np.ndarray, np.ndarray]]:
+        """
+        Add one type to the DP: (new dp, chosen option per capacity, options, their float prices,
+        weights), None if nothing fits
+        """
+        unsorted = [to_float(c['price']) for c in candidates]
+        order = sorted(range(len(candidates)), key=lambda i: (unsorted[i], candidates[i].get('id') or 0))
+        options = [candidates[i] for i in order]
+        prices = np.array([unsorted[i] for i in order], dtype=np.float64)
+        weights = np.ceil(prices / bucket - 1e-9).astype(np.int64)
+        performance = np.array([component_catalog.performance_value(c) for c in options], dtype=np.float64)
+        values = performance - self.deviation_weight * np.abs(prices - target) if target else performance
+
+        # Only the best-valued option per bucket weight can be part of an optimum
+        fits = np.flatnonzero(weights <= capacity)
+        if not len(fits):
+            return None
+        order = fits[np.lexsort((fits, -values[fits], weights[fits]))]
+        keep = order[np.r_[True, np.diff(weights[order]) != 0]]
+
+        # best[c] = max over kept options j of dp[c - w_j] + v_j
+        best = np.full(capacity + 1, -np.inf)
+        choice = np.full(capacity + 1, -1, dtype=np.int32)
+        for index in keep.tolist():
+            weight = int(weights[index])
+            shifted = dp[:capacity + 1 - weight] + values[index]
+            improved = shifted > best[weight:]
+            best[weight:][improved] = shifted[improved]
+            choice[weight:][improved] = index
+        if not np.isfinite(best).any():
+            return None
+        return best, choice, options, prices, weights
+
+# Extra candidates per type sampled above the prefetch window, so the solver can reach high-end parts
+BUILD_SOLVER_UPPER_SAMPLES = int(os.getenv('BUILD_SOLVER_UPPER_SAMPLES', 64))
+
+# Wall-clock budget (seconds) for the compatible-combination branch and bound
+BUILD_SEARCH_DEADLINE = float(os.getenv('BUILD_SEARCH_DEADLINE', 2.0))
+
+build_optimizer = BuildOptimizer(
+    buckets=int(os.getenv('BUILD_SOLVER_BUCKETS', 2000)),
+    deviation_weight=float(os.getenv('BUILD_SOLVER_DEVIATION_WEIGHT', 0.5))
+)
+
+class CompatibleBuildSearch:
+    """
+    Branch and bound over per-type candidate lists: one part per type, compatible, total within
+    max_budget and as close to target_cost as possible.
+    Partial builds are pruned when even the cheapest completion exceeds max_budget, when the
+    [cheapest, dearest] completion range cannot get closer to the target than the incumbent,
+    or when the parts chosen so far are incompatible. Anytime: search() returns the best build
+    found when the deadline or node limit hits; stats records how complete the search was.
+    """
+
+    def __init__(self, compatibility_checker: 'ComponentCompatibilityChecker'):
+        self.compatibility_checker = compatibility_checker
+        self.best_combination: Optional[List[Dict]] = None
+        self.best_total = 0.0
+        self.best_diff = float('inf')
+        self.stats: Dict[str, Any] = {}
+
+    def search(self, component_candidates: Dict[str, List[Dict]], target_cost: float, max_budget: float,
+               deadline: float = 2.0, max_nodes: int = None, tolerance: float = 0.0) -> Optional[List[Dict]]:
+        """Best combination found within deadline seconds (None if none fits); stops early within tolerance"""
+        start = time.time()
+        target_cost, max_budget = to_float(target_cost), to_float(max_budget)
+        self.best_combination, self.best_total, self.best_diff = None, 0.0, float('inf')
+        stats = {"nodes": 0, "pruned_budget": 0, "pruned_bound": 0, "pruned_incompatible": 0,
+                 "solutions": 0, "complete": False, "timed_out": False}
+        self.stats = stats
+
+        # Widest price spread first: those choices move the total most and tighten the bounds fastest
+        levels = []
+        for comp_type, candidates in component_candidates.items():
+            if not candidates:
+                continue  # types without candidates are left out, as before
+            for candidate in candidates:
+                candidate['price'] = to_float(candidate['price'])
+            prices = [c['price'] for c in candidates]
+            levels.append((comp_type, candidates, min(prices), max(prices)))
+        levels.sort(key=lambda level: level[3] - level[2], reverse=True)
+
+        if levels:
+            # suffix bounds: cheapest / dearest / midpoint completion from each depth
+            depth_count = len(levels)
+            min_rest = [0.0] * (depth_count + 1)
+            max_rest = [0.0] * (depth_count + 1)
+            mid_rest = [0.0] * (depth_count + 1)
+            for depth in range(depth_count - 1, -1, -1):
+                _, _, low, high = levels[depth]
+                min_rest[depth] = min_rest[depth + 1] + low
+                max_rest[depth] = max_rest[depth + 1] + high
+                mid_rest[depth] = mid_rest[depth + 1] + (low + high) / 2
+            time_limit = start + deadline
+            checker = self.compatibility_checker
+            chosen_attributes: Dict[str, Tuple[int, ...]] = {}
+
+            def expand(depth: int, chosen: List[Dict], total: float) -> bool:
+                stats["nodes"] += 1
+                if max_nodes and stats["nodes"] > max_nodes or time.time() > time_limit:
+                    stats["timed_out"] = True
+                    return True
+
+                if depth == depth_count:
+                    diff = abs(total - target_cost)
+                    if diff < self.best_diff:
+                        self.best_diff, self.best_total = diff, total
+                        self.best_combination = list(chosen)
+                        stats["solutions"] += 1
+                    return self.best_diff <= tolerance
+
+                comp_type, candidates, _, _ = levels[depth]
+                # Value heuristic: the price that leaves the rest of the build at its midpoint on target
+                ideal = target_cost - total - mid_rest[depth + 1]
+                for candidate in sorted(candidates, key=lambda c: (abs(c['price'] - ideal), c['price'])):
+                    low = total + candidate['price'] + min_rest[depth + 1]
+                    if low > max_budget:
+                        stats["pruned_budget"] += 1
+                        continue
+                    high = min(total + candidate['price'] + max_rest[depth + 1], max_budget)
+                    bound = low - target_cost if low > target_cost else max(0.0, target_cost - high)
+                    if bound >= self.best_diff:
+                        stats["pruned_bound"] += 1
+                        continue
+
+                    # The partial build was compatible: only constraints reading this type can break
+                    chosen.append(candidate)
+                    chosen_attributes[comp_type] = checker.attributes(candidate)
+                    if not all(checker.constraint_holds(name, chosen_attributes)
+                               for name in CONSTRAINTS_BY_TYPE.get(comp_type, ())):
+                        stats["pruned_incompatible"] += 1
+                    elif expand(depth + 1, chosen, total + candidate['price']):
+                        chosen.pop()
+                        del chosen_attributes[comp_type]
+                        return True
+                    chosen.pop()
+                    del chosen_attributes[comp_type]
+                return False
+
+            expand(0, [], 0.0)
+            stats["complete"] = not stats["timed_out"]
+
+        stats["elapsed_ms"] = round((time.time() - start) * 1000, 2)
+        stats["best_diff"] = round(self.best_diff, 2) if self.best_combination else None
+        if self.best_combination is None:
+            return None
+
+        # Hand the build back in the caller's type order
+        order = {comp_type: position for position, comp_type in enumerate(component_candidates)}
+        return sorted(self.best_combination, key=lambda c: order.get(c.get('type'), len(order)))
 
 # Budget-Aware Build Generator
 class BudgetAwareBuildGenerator:
@@ -809,7 +3811,8 @@ class BudgetAwareBuildGenerator:
         self.essential_components = ["cpu", "motherboard", "ram", "storage", "psu", "case", "cooler", "case-fan", "keyboard", "mouse", "speakers"]
     
     def generate_build_within_budget(self, max_budget: float, performance_needs: List[str], 
-                                   include_peripherals: bool = True, use_case: str = None) -> Dict[str, Any]:
+                                   include_peripherals: bool = True, use_case: str = None,
+                                   candidate_pool: 'CandidatePool' = None) -> Dict[str, Any]:
         """Generate a complete build that MAXIMIZES budget utilization to 95-100%"""
         
         max_budget = to_float(max_budget)
@@ -822,6 +3825,139 @@ class BudgetAwareBuildGenerator:
         # Get initial allocations - peripherals are already included in allocations
         allocations = self._get_budget_allocations(component_budget, performance_needs)
         
+        # Prefetch every candidate window in one round trip; all steps below search the pool
+        if candidate_pool is None:
+            candidate_pool = self.prefetch_candidates(allocations, max_budget)
+        
+        # Steps 1-4: pick every part in one knapsack pass over the candidate pools
+        build_components = self._solve_build(allocations, max_budget, candidate_pool)
+        if build_components is None:
+            build_components = self._greedy_build(allocations, component_budget, performance_needs,
+                                                  candidate_pool)
+        total_cost = sum(to_float(comp['price']) for comp in build_components)
+        
+        # Step 5: Add additional peripherals if needed (headphones for content creation, etc.)
+        # Note: keyboard, mouse, speakers are already in essential_components and budget allocations
+        if include_peripherals and use_case:
+            additional_peripherals = self._add_peripherals(use_case, peripheral_budget, candidate_pool)
+            for p in additional_peripherals:
+                price = to_float(p['price'])
+                p['price'] = price
+                # Only add if not already in build_components
+                if not any(comp.get('type') == p.get('type') for comp in build_components):
+                    build_components.append(p)
+                    total_cost += price
+        
+        # Step 6: Final check - if over budget, optimize
+        if total_cost > max_budget:
+            build_components = self._optimize_build_for_budget(build_components, max_budget, candidate_pool)
+            total_cost = sum(to_float(comp['price']) for comp in build_components)
+        
+        # Check compatibility
+        is_compatible, compatibility_issues = self.compatibility_checker.check_compatibility(build_components)
+        
+        return {
+            "components": build_components,
+            "total_cost": float(total_cost),
+            "within_budget": total_cost <= max_budget,
+            "budget_utilization": (float(total_cost) / float(max_budget)) * 100,
+            "is_compatible": is_compatible,
+            "compatibility_issues": compatibility_issues,
+            "budget_remaining": float(max_budget) - float(total_cost)
+        }
+    
+    def _solve_build(self, allocations: Dict[str, float], max_budget: float,
+                     candidate_pool: 'CandidatePool' = None) -> Optional[List[Dict]]:
+        """Optimal one-part-per-type build from the prefetched windows (None if nothing fits)"""
+        source = candidate_pool or db_manager
+        candidates = {}
+        for component_type in self.essential_components:
+            if component_type not in allocations:
+                continue
+            allocation = allocations[component_type]
+            options = source.search_components(
+                component_type=component_type,
+                min_price=allocation * 0.25,
+                max_price=max_budget,
+                limit=CANDIDATE_PREFETCH_LIMIT
+            )
+            if len(options) >= CANDIDATE_PREFETCH_LIMIT and component_catalog.loaded:
+                # The window holds the cheapest parts only; sample the rest of the range for upgrades
+                options = options + component_catalog.sample(
+                    component_type, options[-1]['price'], max_budget, BUILD_SOLVER_UPPER_SAMPLES
+                )
+            if not options:
+                # Same fallback as the closest-to-allocation pick
+                options = source.search_components(
+                    component_type=component_type,
+                    max_price=allocation * 1.20,
+                    limit=30
+                )
+            candidates[component_type] = options
+        
+        # Parts that fit no member of a related pool can never be in a compatible build
+        narrowed = self.compatibility_checker.narrow(candidates)
+        logger.info(f"Candidate pools (before, after propagation): {self.compatibility_checker.last_propagation}")
+        if all(narrowed.get(comp_type) or not options for comp_type, options in candidates.items()):
+            candidates = narrowed
+        
+        build, stats = build_optimizer.solve(candidates, max_budget, allocations)
+        if build is not None:
+            logger.info(f"Build solver: {stats}")
+            if not self.compatibility_checker.check_compatibility(build)[0]:
+                # Motherboard classes can't repair PSU wattage: the branch and bound checks every rule
+                build = (self._solve_compatible_build(candidates, max_budget, allocations)
+                         or self._search_compatible_build(candidates, max_budget))
+        return build
+    
+    def _solve_compatible_build(self, candidates: Dict[str, List[Dict]], max_budget: float,
+                                allocations: Dict[str, float]) -> Optional[List[Dict]]:
+        """
+        Re-solve with one partition per motherboard class (socket, memory, form factor): the
+        class is anchored and the other pools are narrowed by propagation; the best partition wins.
+        """
+        checker = self.compatibility_checker
+        boards_by_class: Dict[tuple, List[Dict]] = {}
+        for board in candidates.get('motherboard', []):
+            boards_by_class.setdefault(checker.attributes(board)[:3], []).append(board)
+        
+        # Classes that admit exactly the same parts share one partition
+        matrices = {comp_type: checker.attribute_matrix(options) for comp_type, options in candidates.items()
+                    if comp_type in CONSTRAINTS_BY_TYPE}
+        partitions: Dict[tuple, Dict[str, List[Dict]]] = {}
+        for board_class, boards in boards_by_class.items():
+            narrowed = checker.narrow(candidates, {'motherboard': boards[0]}, matrices)
+            narrowed = {comp_type: narrowed[comp_type] for comp_type in checker.last_propagation}
+            if not all(narrowed.values()):
+                continue
+            signature = tuple(tuple(id(c) for c in narrowed[comp_type]) for comp_type in sorted(narrowed))
+            if signature in partitions:
+                partitions[signature]['motherboard'] = partitions[signature]['motherboard'] + boards
+            else:
+                partitions[signature] = dict(narrowed, motherboard=boards)
+        
+        best = (build_optimizer.solve(candidates, max_budget, allocations, list(partitions.values()))[0]
+                if partitions else None)
+        if best and not checker.check_compatibility(best)[0]:
+            best = None
+        
+        logger.info(f"Compatible re-solve over {len(boards_by_class)} motherboard classes: "
+                    f"{'found' if best else 'no compatible build'}")
+        return best
+    
+    def _search_compatible_build(self, candidates: Dict[str, List[Dict]], max_budget: float) -> Optional[List[Dict]]:
+        """Compatible build closest to max_budget by branch and bound (None if none found in time)"""
+        search = CompatibleBuildSearch(self.compatibility_checker)
+        build = search.search(candidates, max_budget, max_budget, deadline=BUILD_SEARCH_DEADLINE)
+        # Types without candidates drop out of the search; a build missing a type is no answer
+        if build and len(build) < sum(1 for options in candidates.values() if options):
+            build = None
+        logger.info(f"Compatible build search: {'found' if build else 'no compatible build'}, stats: {search.stats}")
+        return build
+    
+    def _greedy_build(self, allocations: Dict[str, float], component_budget: float,
+                      performance_needs: List[str], candidate_pool: 'CandidatePool' = None) -> List[Dict]:
+        """Closest-to-allocation picks plus upgrade passes (used when the solver finds no fit)"""
         build_components = []
         total_cost = 0.0
         used_allocations = {}
@@ -831,7 +3967,7 @@ class BudgetAwareBuildGenerator:
             if component_type in allocations:
                 allocation = allocations[component_type]
                 component = self._find_component_closest_to_allocation(
-                    component_type, allocation, performance_needs, build_components
+                    component_type, allocation, performance_needs, build_components, candidate_pool
                 )
                 if component:
                     price = to_float(component['price'])
@@ -846,7 +3982,8 @@ class BudgetAwareBuildGenerator:
         # Step 3: Redistribute remaining budget to maximize utilization
         if remaining_budget > component_budget * 0.05:  # If more than 5% remaining
             build_components = self._redistribute_budget_to_maximize(
-                build_components, allocations, remaining_budget, component_budget, performance_needs
+                build_components, allocations, remaining_budget, component_budget, performance_needs,
+                candidate_pool
             )
             total_cost = sum(to_float(comp['price']) for comp in build_components)
             remaining_budget = component_budget - total_cost
@@ -854,39 +3991,10 @@ class BudgetAwareBuildGenerator:
         # Step 4: If still have budget remaining, upgrade components aggressively
         if remaining_budget > 100:  # More than ₱100 remaining
             build_components = self._aggressively_upgrade_components(
-                build_components, remaining_budget, component_budget, performance_needs
+                build_components, remaining_budget, component_budget, performance_needs, candidate_pool
             )
-            total_cost = sum(to_float(comp['price']) for comp in build_components)
         
-        # Step 5: Add additional peripherals if needed (headphones for content creation, etc.)
-        # Note: keyboard, mouse, speakers are already in essential_components and budget allocations
-        if include_peripherals and use_case:
-            additional_peripherals = self._add_peripherals(use_case, peripheral_budget)
-            for p in additional_peripherals:
-                price = to_float(p['price'])
-                p['price'] = price
-                # Only add if not already in build_components
-                if not any(comp.get('type') == p.get('type') for comp in build_components):
-                    build_components.append(p)
-                    total_cost += price
-        
-        # Step 6: Final check - if over budget, optimize
-        if total_cost > max_budget:
-            build_components = self._optimize_build_for_budget(build_components, max_budget)
-            total_cost = sum(to_float(comp['price']) for comp in build_components)
-        
-        # Check compatibility
-        is_compatible, compatibility_issues = self.compatibility_checker.check_compatibility(build_components)
-        
-        return {
-            "components": build_components,
-            "total_cost": float(total_cost),
-            "within_budget": total_cost <= max_budget,
-            "budget_utilization": (float(total_cost) / float(max_budget)) * 100,
-            "is_compatible": is_compatible,
-            "compatibility_issues": compatibility_issues,
-            "budget_remaining": float(max_budget) - float(total_cost)
-        }
+        return build_components
     
     def _get_budget_allocations(self, total_budget: float, performance_needs: List[str]) -> Dict[str, float]:
         """Get strict budget allocations that ensure total doesn't exceed budget"""
@@ -912,8 +4020,17 @@ class BudgetAwareBuildGenerator:
         
         return {comp: total_budget * perc for comp, perc in base_allocations.items()}
     
+    def prefetch_candidates(self, allocations: Dict[str, float], max_budget: float) -> 'CandidatePool':
+        """Prefetch the price windows every build step may query, for all essential types"""
+        windows = {
+            comp_type: (allocations[comp_type] * 0.25, max_budget, CANDIDATE_PREFETCH_LIMIT)
+            for comp_type in self.essential_components if comp_type in allocations
+        }
+        return db_manager.prefetch_candidate_pool(windows)
+    
     def _find_component_closest_to_allocation(self, component_type: str, allocation: float,
-                                             performance_needs: List[str], existing_components: List[Dict]) -> Optional[Dict]:
+                                             performance_needs: List[str], existing_components: List[Dict],
+                                             candidate_pool: 'CandidatePool' = None) -> Optional[Dict]:
         """
         Find component with price CLOSEST to the allocated budget (not just within it).
         This ensures we use more of the budget.
@@ -923,8 +4040,10 @@ class BudgetAwareBuildGenerator:
         min_price = allocation * 0.50
         max_price = allocation * 1.20  # Allow slight over-allocation for better matches
         
+        source = candidate_pool or db_manager
+        
         # Get multiple candidates
-        candidates = db_manager.search_components(
+        candidates = source.search_components(
             component_type=component_type,
             max_price=max_price,
             min_price=min_price,
@@ -933,7 +4052,7 @@ class BudgetAwareBuildGenerator:
         
         if not candidates:
             # Fallback: search without min_price
-            candidates = db_manager.search_components(
+            candidates = source.search_components(
                 component_type=component_type,
                 max_price=max_price,
                 limit=30
@@ -942,6 +4061,13 @@ class BudgetAwareBuildGenerator:
         if not candidates:
             return None
         
+        # Keep to parts that fit the ones already chosen (the CPU anchors the board, and so on)
+        if component_type in CONSTRAINTS_BY_TYPE and existing_components:
+            anchors = {}
+            for component in existing_components:
+                anchors.setdefault(component.get('type'), component)
+            candidates = self.compatibility_checker.narrow({component_type: candidates}, anchors)[component_type] or candidates
+        
         # Find component closest to allocation
         best_component = None
         best_diff = float('inf')
@@ -963,7 +4089,8 @@ class BudgetAwareBuildGenerator:
     def _redistribute_budget_to_maximize(self, build_components: List[Dict], 
                                         allocations: Dict[str, float],
                                         remaining_budget: float, total_budget: float,
-                                        performance_needs: List[str]) -> List[Dict]:
+                                        performance_needs: List[str],
+                                        candidate_pool: 'CandidatePool' = None) -> List[Dict]:
         """
         Redistribute remaining budget to components to maximize utilization.
         Upgrades components that are under their allocation.
@@ -973,11 +4100,12 @@ class BudgetAwareBuildGenerator:
         
         logger.info(f"Redistributing ₱{remaining_budget:,.2f} to maximize budget use")
         
-        upgraded_build = build_components.copy()
+        source = candidate_pool or db_manager
+        state = BuildState(build_components, self.compatibility_checker)
         remaining = remaining_budget
         
         # Sort components by how much they're under their allocation
-        component_map = {comp.get('type'): comp for comp in upgraded_build}
+        component_map = {comp.get('type'): comp for comp in state.parts}
         under_allocated = []
         
         for comp_type, comp in component_map.items():
@@ -999,7 +4127,7 @@ class BudgetAwareBuildGenerator:
             target_price = to_float(current_comp['price']) + min(remaining, deficit)
             max_search_price = target_price * 1.2
             
-            candidates = db_manager.search_components(
+            candidates = source.search_components(
                 component_type=comp_type,
                 max_price=max_search_price,
                 min_price=to_float(current_comp['price']),
@@ -1007,38 +4135,23 @@ class BudgetAwareBuildGenerator:
             )
             
             if candidates:
-                # Find best upgrade that uses more budget
-                best_upgrade = None
-                best_price = to_float(current_comp['price'])
-                
-                for candidate in candidates:
-                    candidate_price = to_float(candidate['price'])
-                    price_diff = candidate_price - best_price
-                    
-                    if 0 < price_diff <= remaining:
-                        # Test compatibility
-                        test_build = upgraded_build.copy()
-                        index = next(i for i, c in enumerate(test_build) if c.get('type') == comp_type)
-                        test_build[index] = candidate
-                        
-                        is_compatible, _ = self.compatibility_checker.check_compatibility(test_build)
-                        if is_compatible and candidate_price > best_price:
-                            best_upgrade = candidate
-                            best_price = candidate_price
+                # Find the compatible upgrade that buys the most performance
+                best_upgrade = state.best_upgrade(comp_type, candidates, remaining)
                 
                 if best_upgrade:
-                    index = next(i for i, c in enumerate(upgraded_build) if c.get('type') == comp_type)
+                    best_price = to_float(best_upgrade['price'])
                     upgrade_cost = best_price - to_float(current_comp['price'])
-                    upgraded_build[index] = best_upgrade
-                    upgraded_build[index]['price'] = best_price
+                    best_upgrade['price'] = best_price
+                    state.swap(best_upgrade)
                     remaining -= upgrade_cost
                     logger.info(f"Upgraded {comp_type}: +₱{upgrade_cost:,.2f}, Remaining: ₱{remaining:,.2f}")
         
-        return upgraded_build
+        return state.parts
     
     def _aggressively_upgrade_components(self, build_components: List[Dict],
                                         remaining_budget: float, max_budget: float,
-                                        performance_needs: List[str]) -> List[Dict]:
+                                        performance_needs: List[str],
+                                        candidate_pool: 'CandidatePool' = None) -> List[Dict]:
         """
         Aggressively upgrade components to use remaining budget.
         Multiple passes to maximize utilization.
@@ -1048,7 +4161,8 @@ class BudgetAwareBuildGenerator:
         
         logger.info(f"Aggressively upgrading components with remaining ₱{remaining_budget:,.2f}")
         
-        upgraded_build = build_components.copy()
+        source = candidate_pool or db_manager
+        state = BuildState(build_components, self.compatibility_checker)
         remaining = remaining_budget
         
         # Multiple upgrade passes
@@ -1057,7 +4171,7 @@ class BudgetAwareBuildGenerator:
                 break
             
             upgraded_this_pass = False
-            component_map = {comp.get('type'): comp for comp in upgraded_build}
+            component_map = {comp.get('type'): comp for comp in state.parts}
             
             # Sort by current price (cheapest first) to upgrade systematically
             for comp_type, current_comp in sorted(component_map.items(),
@@ -1069,7 +4183,7 @@ class BudgetAwareBuildGenerator:
                 max_search_price = current_price + remaining
                 
                 # Get candidates for upgrade
-                candidates = db_manager.search_components(
+                candidates = source.search_components(
                     component_type=comp_type,
                     max_price=max_search_price,
                     min_price=current_price + 50,  # At least ₱50 more expensive
@@ -1077,30 +4191,14 @@ class BudgetAwareBuildGenerator:
                 )
                 
                 if candidates:
-                    # Find best upgrade
-                    best_upgrade = None
-                    best_price = current_price
-                    
-                    for candidate in candidates:
-                        candidate_price = to_float(candidate['price'])
-                        price_diff = candidate_price - current_price
-                        
-                        if 0 < price_diff <= remaining:
-                            # Test compatibility
-                            test_build = upgraded_build.copy()
-                            index = next(i for i, c in enumerate(test_build) if c.get('type') == comp_type)
-                            test_build[index] = candidate
-                            
-                            is_compatible, _ = self.compatibility_checker.check_compatibility(test_build)
-                            if is_compatible and candidate_price > best_price:
-                                best_upgrade = candidate
-                                best_price = candidate_price
+                    # Find the compatible upgrade that buys the most performance
+                    best_upgrade = state.best_upgrade(comp_type, candidates, remaining)
                     
                     if best_upgrade:
-                        index = next(i for i, c in enumerate(upgraded_build) if c.get('type') == comp_type)
+                        best_price = to_float(best_upgrade['price'])
                         upgrade_cost = best_price - current_price
-                        upgraded_build[index] = best_upgrade
-                        upgraded_build[index]['price'] = best_price
+                        best_upgrade['price'] = best_price
+                        state.swap(best_upgrade)
                         remaining -= upgrade_cost
                         upgraded_this_pass = True
                         logger.info(f"Pass {pass_num+1}: Upgraded {comp_type} by ₱{upgrade_cost:,.2f}, Remaining: ₱{remaining:,.2f}")
@@ -1108,18 +4206,20 @@ class BudgetAwareBuildGenerator:
             if not upgraded_this_pass:
                 break
         
-        return upgraded_build
+        return state.parts
     
-    def _add_peripherals(self, use_case: str, peripheral_budget: float) -> List[Dict]:
+    def _add_peripherals(self, use_case: str, peripheral_budget: float,
+                         candidate_pool: 'CandidatePool' = None) -> List[Dict]:
         """Add peripherals based on use case"""
+        source = candidate_pool or db_manager
         peripherals = []
         
         if use_case == "gaming":
             keyboard_budget = peripheral_budget * 0.6
             mouse_budget = peripheral_budget * 0.4
             
-            keyboard = db_manager.search_components("keyboard", max_price=keyboard_budget, limit=1)
-            mouse = db_manager.search_components("mouse", max_price=mouse_budget, limit=1)
+            keyboard = source.search_components("keyboard", max_price=keyboard_budget, limit=1)
+            mouse = source.search_components("mouse", max_price=mouse_budget, limit=1)
             
             if keyboard:
                 peripherals.append(keyboard[0])
@@ -1127,14 +4227,16 @@ class BudgetAwareBuildGenerator:
                 peripherals.append(mouse[0])
                 
         elif use_case == "content_creation":
-            headphones = db_manager.search_components("headphones", max_price=peripheral_budget, limit=1)
+            headphones = source.search_components("headphones", max_price=peripheral_budget, limit=1)
             if headphones:
                 peripherals.append(headphones[0])
         
         return peripherals
     
-    def _optimize_build_for_budget(self, components: List[Dict], max_budget: float) -> List[Dict]:
+    def _optimize_build_for_budget(self, components: List[Dict], max_budget: float,
+                                   candidate_pool: 'CandidatePool' = None) -> List[Dict]:
         """Optimize build to fit within budget by replacing expensive components"""
+        source = candidate_pool or db_manager
         # Convert max_budget to float
         max_budget = to_float(max_budget)
         
@@ -1153,7 +4255,7 @@ class BudgetAwareBuildGenerator:
                 
             comp_price = to_float(component['price'])
                 
-            cheaper_alternatives = db_manager.search_components(
+            cheaper_alternatives = source.search_components(
                 component_type=component['type'],
                 max_price=comp_price * 0.8,
                 limit=5
@@ -1172,6 +4274,130 @@ class BudgetAwareBuildGenerator:
 
 # Add this class definition around line 857, before AdvancedBuildGenerator
 
+class PremadeBuildCache:
+    """
+    Thread-safe LRU of premade builds keyed by (catalog_version, cache_key).
+    Single-flight: when several requests miss the same key, one computes and the others wait
+    for its result. Entries from older catalog versions are dropped once a newer version is seen.
+    With a shared store, a miss is looked up there before computing and computed builds are
+    written back, so other worker processes reuse them.
+    """
+    
+    def __init__(self, max_entries: int = 512, shared: 'SharedCacheStore' = None, namespace: str = 'premade'):
+        self.max_entries = max_entries
+        self.shared = shared
+        self.namespace = namespace
+        self.lock = threading.Lock()
+        self.entries: 'OrderedDict[tuple, Dict]' = OrderedDict()
+        self.inflight: Dict[tuple, Dict[str, Any]] = {}
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.shared_hits = 0
+    
+    def get_or_compute(self, version: Any, key: str, compute: Callable[[], Optional[Dict]],
+                       shared_version: str = None) -> Optional[Dict]:
+        """
+        Cached value for key at version, computing it at most once across threads (None is not cached).
+        shared_version is the process-independent version used for the shared store.
+        """
+        full_key = (version, key)
+        with self.lock:
+            current = self._observe_version(version)
+            if current and full_key in self.entries:
+                self.entries.move_to_end(full_key)
+                self.hits += 1
+                return self.entries[full_key]
+            
+            flight = self.inflight.get(full_key) if current else None
+            leader = flight is None
+            if not current:
+                self.misses += 1
+            elif leader:
+                flight = {"event": threading.Event(), "value": None}
+                self.inflight[full_key] = flight
+                self.misses += 1
+            else:
+                self.waits += 1
+        
+        if not current:
+            return compute()  # another thread already saw a newer catalog; do not cache this one
+        
+        if not leader:
+            flight["event"].wait()
+            return flight["value"]
+        
+        value = None
+        try:
+            if self.shared and shared_version:
+                value = self.shared.get(self.namespace, shared_version, key)
+                if value is not None:
+                    self.shared_hits += 1
+            if value is None:
+                value = compute()
+                if value is not None and self.shared and shared_version:
+                    value = self.shared.put(self.namespace, shared_version, key, value)
+            flight["value"] = value
+        finally:
+            with self.lock:
+                if value is not None and full_key[0] == self.version:
+                    self._put(full_key, value)
+                self.inflight.pop(full_key, None)
+            flight["event"].set()
+        return value
+    
+    def contains(self, version: Any, key: str) -> bool:
+        """Whether get_or_compute would answer key from memory (not counted as a hit)"""
+        with self.lock:
+            return version == self.version and (version, key) in self.entries
+    
+    def install(self, version: Any, values: Dict[str, Dict]):
+        """Bulk-load precomputed values for a version (premade warmup)"""
+        with self.lock:
+            if not self._observe_version(version):
+                return  # the catalog moved on while these were computed
+            for key, value in values.items():
+                self._put((version, key), value)
+    
+    def _observe_version(self, version: Any) -> bool:
+        """Advance to version if it is newer; False if it is older than the current one"""
+        if version == self.version:
+            return True
+        # Only the catalog's counter is ordered; any other change of version string replaces the entries
+        if isinstance(version, int) and isinstance(self.version, int) and version < self.version:
+            return False
+        stale = [full_key for full_key in self.entries if full_key[0] != version]
+        for full_key in stale:
+            del self.entries[full_key]
+        self.invalidations += len(stale)
+        self.version = version
+        return True
+    
+    def _put(self, full_key: tuple, value: Dict):
+        self.entries[full_key] = value
+        self.entries.move_to_end(full_key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "version": str(self.version) if self.version is not None else None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "waits": self.waits,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "shared_hits": self.shared_hits,
+                "inflight": len(self.inflight)
+            }
+
 class PremadeBuildGenerator:
     """
     Generates and manages premade PC builds for common budget tiers.
@@ -1192,15 +4418,29 @@ class PremadeBuildGenerator:
         ]
         
         # Cache for premade builds
-        self.premade_builds_cache = {}
+        self.premade_builds_cache = PremadeBuildCache(int(os.getenv('PREMADE_CACHE_SIZE', 512)), shared_cache)
     
-    def get_closest_premade_build(self, user_budget: float, performance_needs: List[str] = None) -> Dict[str, Any]:
+    def get_closest_premade_build(self, user_budget: float, performance_needs: List[str] = None,
+                                  candidate_pool: 'CandidatePool' = None) -> Dict[str, Any]:
         """
         Find the closest premade build to user's budget.
         MAXIMIZES BUDGET UTILIZATION TO 99-100%
+        candidate_pool, if given, is a prefetched pool to build from on a cache miss.
         """
-        user_budget = to_float(user_budget)
         performance_needs = performance_needs or []
+        target_budget = self.resolve_target_budget(user_budget)
+        
+        # Generate or retrieve premade build
+        return self.premade_builds_cache.get_or_compute(
+            self.catalog_version(),
+            self.cache_key(target_budget, performance_needs),
+            lambda: self._generate_premade_build(target_budget, performance_needs, candidate_pool),
+            shared_version=self.db_manager.components_version() if shared_cache else None
+        )
+    
+    def resolve_target_budget(self, user_budget: float) -> float:
+        """Budget tier (or nearest 5k) whose premade build serves user_budget"""
+        user_budget = to_float(user_budget)
         
         # Find closest budget tier
         closest_tier = min(self.budget_tiers, key=lambda x: abs(x - user_budget))
@@ -1215,18 +4455,20 @@ class PremadeBuildGenerator:
                 target_budget = 20000
             elif target_budget > 200000:
                 target_budget = 200000
-        
-        # Generate or retrieve premade build
-        cache_key = f"{target_budget}_{'_'.join(sorted(performance_needs))}"
-        
-        if cache_key not in self.premade_builds_cache:
-            build = self._generate_premade_build(target_budget, performance_needs)
-            if build:
-                self.premade_builds_cache[cache_key] = build
-        
-        return self.premade_builds_cache.get(cache_key)
+        return target_budget
+    
+    def catalog_version(self) -> Any:
+        """Cache version: the catalog's own counter, or the polled components version string"""
+        if component_catalog.loaded:
+            return component_catalog.version
+        return self.db_manager.components_version()
+    
+    @staticmethod
+    def cache_key(target_budget: float, performance_needs: List[str]) -> str:
+        return f"{target_budget}_{'_'.join(sorted(performance_needs))}"
     
-    def _generate_premade_build(self, target_budget: float, performance_needs: List[str]) -> Dict[str, Any]:
+    def _generate_premade_build(self, target_budget: float, performance_needs: List[str],
+                                candidate_pool: 'CandidatePool' = None) -> Dict[str, Any]:
         """Generate a premade build optimized for target budget - Uses fast BudgetAwareBuildGenerator"""
         target_budget = to_float(target_budget)
         
@@ -1235,9 +4477,12 @@ class PremadeBuildGenerator:
         # Use the fast BudgetAwareBuildGenerator instead of slow backtracking
         # This is much faster and still maximizes budget utilization
         budget_generator = BudgetAwareBuildGenerator()
+        if candidate_pool is None:
+            candidate_pool = self._prefetch_candidates(budget_generator, target_budget, performance_needs)
         build_result = budget_generator.generate_build_within_budget(
             target_budget, 
-            performance_needs
+            performance_needs,
+            candidate_pool=candidate_pool
         )
         
         if not build_result or not build_result.get("components"):
@@ -1258,12 +4503,13 @@ class PremadeBuildGenerator:
                 if comp_type in allocations:
                     allocation = allocations[comp_type]
                     candidates = self._get_component_candidates_robust(
-                        comp_type, allocation, performance_needs, target_budget
+                        comp_type, allocation, performance_needs, target_budget, candidate_pool
                     )
                     component_candidates[comp_type] = candidates
             
             # Try to maximize budget use
-            build_components = self._maximize_budget_use(build_components, component_candidates, target_budget)
+            build_components = self._maximize_budget_use(build_components, component_candidates, target_budget,
+                                                         allocations)
             total_cost = sum(to_float(comp['price']) for comp in build_components)
             budget_utilization = (float(total_cost) / float(target_budget)) * 100
         
@@ -1279,10 +4525,16 @@ class PremadeBuildGenerator:
                 if comp_type in allocations:
                     allocation = allocations[comp_type]
                     candidates = self._get_component_candidates_robust(
-                        comp_type, allocation, performance_needs, target_budget
+                        comp_type, allocation, performance_needs, target_budget, candidate_pool
                     )
                     component_candidates[comp_type] = candidates
-            build_components = self._fix_compatibility_issues(build_components, component_candidates, target_budget)
+            repaired = self._find_compatible_combination(component_candidates, target_budget, target_budget,
+                                                         performance_needs, deadline=BUILD_SEARCH_DEADLINE)
+            # Types without candidates drop out of the search; never trade parts away for compatibility
+            if repaired and len(repaired) >= len(build_components):
+                build_components = repaired
+            else:
+                build_components = self._fix_compatibility_issues(build_components, component_candidates, target_budget)
             is_compatible, issues = self.compatibility_checker.check_compatibility(build_components)
             total_cost = sum(to_float(comp['price']) for comp in build_components)
             budget_utilization = (float(total_cost) / float(target_budget)) * 100
@@ -1299,9 +4551,47 @@ class PremadeBuildGenerator:
             "budget_remaining": float(target_budget) - float(total_cost)
         }
     
+    def _prefetch_candidates(self, budget_generator: BudgetAwareBuildGenerator, target_budget: float,
+                             performance_needs: List[str]) -> CandidatePool:
+        """One round trip for every window the build and its upgrade passes may query"""
+        return self.db_manager.prefetch_candidate_pool(
+            self._candidate_windows(budget_generator, target_budget, performance_needs)
+        )
+    
+    def prefetch_tier_candidates(self, target_budgets: List[float], performance_needs: List[str]) -> CandidatePool:
+        """
+        One pool for several tier builds: each type's window spans every tier's window.
+        Queries it cannot answer exactly still fall through to the database.
+        """
+        budget_generator = BudgetAwareBuildGenerator()
+        windows = {}
+        for target_budget in target_budgets:
+            for comp_type, (low, high, limit) in self._candidate_windows(
+                    budget_generator, target_budget, performance_needs).items():
+                if comp_type in windows:
+                    merged_low, merged_high, merged_limit = windows[comp_type]
+                    windows[comp_type] = (min(low, merged_low), max(high, merged_high), merged_limit + limit)
+                else:
+                    windows[comp_type] = (low, high, limit)
+        return self.db_manager.prefetch_candidate_pool(windows)
+    
+    def _candidate_windows(self, budget_generator: BudgetAwareBuildGenerator, target_budget: float,
+                           performance_needs: List[str]) -> Dict[str, Tuple[float, float, int]]:
+        allocations = self._get_budget_allocations(target_budget, performance_needs)
+        greedy_allocations = budget_generator._get_budget_allocations(target_budget, performance_needs)
+        
+        windows = {}
+        for comp_type in self.essential_components:
+            shares = [a[comp_type] for a in (allocations, greedy_allocations) if comp_type in a]
+            if shares:
+                windows[comp_type] = (min(shares) * 0.25, target_budget, CANDIDATE_PREFETCH_LIMIT)
+        return windows
+    
     def _get_component_candidates_robust(self, component_type: str, allocation: float,
-                                        performance_needs: List[str], total_budget: float) -> List[Dict]:
+                                        performance_needs: List[str], total_budget: float,
+                                        candidate_pool: CandidatePool = None) -> List[Dict]:
         """Get multiple candidate components with robust search"""
+        source = candidate_pool or self.db_manager
         candidates = []
         
         price_ranges = [
@@ -1313,7 +4603,7 @@ class PremadeBuildGenerator:
         ]
         
         for min_p, max_p in price_ranges:
-            comps = self.db_manager.search_components(
+            comps = source.search_components(
                 component_type=component_type,
                 max_price=max_p,
                 min_price=min_p,
@@ -1333,106 +4623,26 @@ class PremadeBuildGenerator:
     
     def _find_compatible_combination(self, component_candidates: Dict[str, List[Dict]],
                                     target_cost: float, max_budget: float,
-                                    performance_needs: List[str]) -> List[Dict]:
-        """Find compatible combination using backtracking with timeout and optimization"""
-        import time
-        start_time = time.time()
-        timeout = 10.0  # 10 second timeout
-        
+                                    performance_needs: List[str], deadline: float = 2.0) -> List[Dict]:
+        """Find the compatible combination closest to target_cost (branch and bound, anytime)"""
         if not component_candidates:
             logger.warning("_find_compatible_combination: No component candidates provided")
             return []
         
-        component_types = list(component_candidates.keys())
-        logger.info(f"_find_compatible_combination: Searching for {len(component_types)} component types, target: ₱{target_cost:,.0f}, max: ₱{max_budget:,.0f}")
-        
-        # Limit candidates to top 10 per type to speed up search
-        limited_candidates = {}
-        for comp_type, candidates in component_candidates.items():
-            # Sort by price closest to allocation and take top 10
-            if len(candidates) > 10:
-                # Calculate allocation for this type
-                allocation = target_cost / len(component_types) if component_types else 0
-                candidates = sorted(candidates, key=lambda x: abs(to_float(x['price']) - allocation))[:10]
-            limited_candidates[comp_type] = candidates
-            logger.info(f"  {comp_type}: {len(limited_candidates[comp_type])} candidates (limited from {len(component_candidates.get(comp_type, []))})")
-        
-        best_combination = None
-        best_diff = float('inf')
-        best_total = 0
-        iterations = 0
-        max_iterations = 50000  # Limit total iterations
-        
-        def backtrack(current_combination: List[Dict], current_total: float, remaining_types: List[str]):
-            nonlocal best_combination, best_diff, best_total, iterations
-            
-            iterations += 1
-            
-            # Timeout check
-            if time.time() - start_time > timeout:
-                logger.warning(f"_find_compatible_combination: Timeout after {timeout}s, returning best found so far")
-                return True  # Signal to stop
-            
-            # Iteration limit check
-            if iterations > max_iterations:
-                logger.warning(f"_find_compatible_combination: Max iterations reached, returning best found so far")
-                return True  # Signal to stop
-            
-            if not remaining_types:
-                diff = abs(current_total - target_cost)
-                if diff < best_diff and current_total <= max_budget:
-                    best_diff = diff
-                    best_combination = current_combination.copy()
-                    best_total = current_total
-                    # Early exit if we're very close to target
-                    if diff < target_cost * 0.02:
-                        return True
-                return False
-            
-            if current_total >= max_budget:
-                return False
-            
-            next_type = remaining_types[0]
-            candidates = limited_candidates.get(next_type, [])
-            
-            if not candidates:
-                # If no candidates for this type, skip it
-                return backtrack(current_combination, current_total, remaining_types[1:])
-            
-            # Limit candidates to check (take first 5 that fit budget)
-            checked = 0
-            for candidate in candidates:
-                if checked >= 5:  # Only check first 5 candidates per type
-                    break
-                    
-                candidate_price = to_float(candidate['price'])
-                
-                if current_total + candidate_price > max_budget:
-                    continue
-                
-                test_combination = current_combination + [candidate]
-                is_compatible, _ = self.compatibility_checker.check_compatibility(test_combination)
-                
-                if is_compatible:
-                    should_stop = backtrack(test_combination, current_total + candidate_price, remaining_types[1:])
-                    if should_stop:
-                        return True
-                    checked += 1
-            
-            return False
-        
-        backtrack([], 0.0, component_types)
+        search = CompatibleBuildSearch(self.compatibility_checker)
+        best_combination = search.search(component_candidates, target_cost, max_budget, deadline=deadline)
+        self.last_search_stats = search.stats
         
-        elapsed = time.time() - start_time
         if best_combination:
-            logger.info(f"_find_compatible_combination: Found combination with {len(best_combination)} components, total: ₱{best_total:,.2f} in {elapsed:.2f}s ({iterations} iterations)")
+            logger.info(f"_find_compatible_combination: Found combination with {len(best_combination)} components, "
+                        f"total: ₱{search.best_total:,.2f}, stats: {search.stats}")
         else:
-            logger.warning(f"_find_compatible_combination: No compatible combination found after {elapsed:.2f}s ({iterations} iterations)")
+            logger.warning(f"_find_compatible_combination: No compatible combination found, stats: {search.stats}")
         
-        return best_combination if best_combination else []
+        return best_combination or []
     
     def _maximize_budget_use(self, build: List[Dict], component_candidates: Dict[str, List[Dict]],
-                         max_budget: float) -> List[Dict]:
+                         max_budget: float, allocations: Dict[str, float] = None) -> List[Dict]:
         """Aggressively maximize budget utilization"""
         current_total = sum(to_float(comp['price']) for comp in build)
         remaining_budget = max_budget - current_total
@@ -1440,12 +4650,24 @@ class PremadeBuildGenerator:
         if remaining_budget < max_budget * 0.01:
             return build
         
+        # Re-solve over the candidate lists; the current part stays an option for every type
+        options = {}
+        for comp in build:
+            comp_type = comp.get('type')
+            options[comp_type] = [comp] + [c for c in component_candidates.get(comp_type, [])
+                                           if c.get('id') != comp.get('id')]
+        targets = allocations or {comp.get('type'): to_float(comp['price']) for comp in build}
+        solved, _ = build_optimizer.solve(options, max_budget, targets)
+        if solved is not None and sum(c['price'] for c in solved) > current_total:
+            return solved
+        
+        state = BuildState(build, self.compatibility_checker)
         for iteration in range(5):
             if remaining_budget < max_budget * 0.005:
                 break
             
             upgraded = False
-            component_map = {comp.get('type'): comp for comp in build}
+            component_map = {comp.get('type'): comp for comp in state.parts}
             
             for comp_type, current_comp in sorted(component_map.items(), 
                                                 key=lambda x: to_float(x[1]['price'])):
@@ -1454,27 +4676,11 @@ class PremadeBuildGenerator:
                 
                 if comp_type in component_candidates:
                     current_price = to_float(current_comp['price'])
-                    best_upgrade = None
-                    best_upgrade_price = current_price
-                    
-                    for candidate in component_candidates[comp_type]:
-                        candidate_price = to_float(candidate['price'])
-                        price_diff = candidate_price - current_price
-                        
-                        if 0 < price_diff <= remaining_budget and candidate_price > best_upgrade_price:
-                            test_build = build.copy()
-                            index = next(i for i, c in enumerate(test_build) if c.get('type') == comp_type)
-                            test_build[index] = candidate
-                            
-                            is_compatible, _ = self.compatibility_checker.check_compatibility(test_build)
-                            if is_compatible:
-                                best_upgrade = candidate
-                                best_upgrade_price = candidate_price
+                    best_upgrade = state.best_upgrade(comp_type, component_candidates[comp_type], remaining_budget)
                     
                     if best_upgrade:
-                        index = next(i for i, c in enumerate(build) if c.get('type') == comp_type)
                         upgrade_cost = to_float(best_upgrade['price']) - current_price
-                        build[index] = best_upgrade
+                        state.swap(best_upgrade)
                         remaining_budget -= upgrade_cost
                         current_total += upgrade_cost
                         upgraded = True
@@ -1482,6 +4688,7 @@ class PremadeBuildGenerator:
             if not upgraded:
                 break
         
+        build = state.parts
         if remaining_budget > max_budget * 0.01:
             build = self._aggressive_upgrade(build, component_candidates, remaining_budget, max_budget)
         
@@ -1490,10 +4697,10 @@ class PremadeBuildGenerator:
     def _aggressive_upgrade(self, build: List[Dict], component_candidates: Dict[str, List[Dict]],
                        remaining_budget: float, max_budget: float) -> List[Dict]:
         """Aggressively upgrade components to use remaining budget"""
-        upgraded_build = build.copy()
+        state = BuildState(build, self.compatibility_checker)
         remaining = remaining_budget
         
-        component_map = {comp.get('type'): comp for comp in upgraded_build}
+        component_map = {comp.get('type'): comp for comp in state.parts}
         upgrade_order = sorted(component_map.items(), 
                               key=lambda x: max([to_float(c['price']) for c in component_candidates.get(x[0], [])] or [0]),
                               reverse=True)
@@ -1504,57 +4711,34 @@ class PremadeBuildGenerator:
             
             if comp_type in component_candidates:
                 current_price = to_float(current_comp['price'])
-                best_candidate = None
-                best_price = current_price
-                
-                for candidate in component_candidates[comp_type]:
-                    candidate_price = to_float(candidate['price'])
-                    price_diff = candidate_price - current_price
-                    
-                    if 0 < price_diff <= remaining and candidate_price > best_price:
-                        test_build = upgraded_build.copy()
-                        index = next(i for i, c in enumerate(test_build) if c.get('type') == comp_type)
-                        test_build[index] = candidate
-                        
-                        is_compatible, _ = self.compatibility_checker.check_compatibility(test_build)
-                        if is_compatible:
-                            best_candidate = candidate
-                            best_price = candidate_price
+                best_candidate = state.best_upgrade(comp_type, component_candidates[comp_type], remaining)
                 
                 if best_candidate:
-                    index = next(i for i, c in enumerate(upgraded_build) if c.get('type') == comp_type)
-                    upgrade_cost = best_price - current_price
-                    upgraded_build[index] = best_candidate
+                    upgrade_cost = to_float(best_candidate['price']) - current_price
+                    state.swap(best_candidate)
                     remaining -= upgrade_cost
         
-        return upgraded_build
+        return state.parts
     
     def _fix_compatibility_issues(self, build: List[Dict], component_candidates: Dict[str, List[Dict]],
                                  max_budget: float) -> List[Dict]:
         """Fix compatibility issues by replacing incompatible components"""
-        fixed_build = build.copy()
-        is_compatible, issues = self.compatibility_checker.check_compatibility(fixed_build)
-        
-        if is_compatible:
-            return fixed_build
-        
-        for i, comp in enumerate(fixed_build):
-            comp_type = comp.get('type')
-            if comp_type in component_candidates:
-                for candidate in component_candidates[comp_type]:
-                    test_build = fixed_build.copy()
-                    test_build[i] = candidate
-                    
-                    is_compat, _ = self.compatibility_checker.check_compatibility(test_build)
-                    if is_compat:
-                        total = sum(to_float(c['price']) for c in test_build)
-                        if total <= max_budget:
-                            fixed_build = test_build
-                            is_compatible, _ = self.compatibility_checker.check_compatibility(fixed_build)
-                            if is_compatible:
-                                return fixed_build
-        
-        return fixed_build
+        state = BuildState(build, self.compatibility_checker)
+        
+        if state.compatible:
+            return state.parts
+        
+        # Only the checked (first) part of each type can fix the build; the first single swap
+        # that makes it compatible within budget wins
+        for comp_type, index in sorted(state.slots.items(), key=lambda slot: slot[1]):
+            current_price = to_float(state.parts[index]['price'])
+            for candidate in component_candidates.get(comp_type, []):
+                if state.can_swap(candidate) and \
+                        state.total - current_price + to_float(candidate['price']) <= max_budget:
+                    state.swap(candidate)
+                    return state.parts
+        
+        return state.parts
     
     def _get_budget_allocations(self, total_budget: float, performance_needs: List[str]) -> Dict[str, float]:
         """Get budget allocations - ALWAYS includes cooler, case-fan, keyboard, mouse, and speakers"""
@@ -1622,28 +4806,27 @@ class AdvancedBuildGenerator:
             
             if is_feasible:
                 # Use premade builds for better accuracy and compatibility
-                budget_build_data = premade_build_generator.get_closest_premade_build(
-                    max_budget * 0.70, performance_needs
-                )
+                tier_targets = {"budget": max_budget * 0.70, "balanced": max_budget}
+                if max_budget >= 40000:
+                    tier_targets["premium"] = min(max_budget * 1.15, max_budget + 10000)
+                tier_builds = self._generate_tier_builds(tier_targets, performance_needs)
+                
+                budget_build_data = tier_builds["budget"]
                 if budget_build_data and budget_build_data.get("components"):
                     recommendations["builds"]["budget"] = budget_build_data["components"]
                     logger.info(f"Budget build generated: {len(budget_build_data['components'])} components, ₱{budget_build_data.get('total_cost', 0):,.2f}")
                 else:
                     logger.warning(f"Budget build generation failed for ₱{max_budget * 0.70:,.0f}")
                 
-                balanced_build_data = premade_build_generator.get_closest_premade_build(
-                    max_budget, performance_needs
-                )
+                balanced_build_data = tier_builds["balanced"]
                 if balanced_build_data and balanced_build_data.get("components"):
                     recommendations["builds"]["balanced"] = balanced_build_data["components"]
                     logger.info(f"Balanced build generated: {len(balanced_build_data['components'])} components, ₱{balanced_build_data.get('total_cost', 0):,.2f}")
                 else:
                     logger.warning(f"Balanced build generation failed for ₱{max_budget:,.0f}")
                 
-                if max_budget >= 40000:
-                    premium_build_data = premade_build_generator.get_closest_premade_build(
-                        min(max_budget * 1.15, max_budget + 10000), performance_needs
-                    )
+                if "premium" in tier_builds:
+                    premium_build_data = tier_builds["premium"]
                     if premium_build_data and premium_build_data.get("components"):
                         recommendations["builds"]["premium"] = premium_build_data["components"]
                         logger.info(f"Premium build generated: {len(premium_build_data['components'])} components, ₱{premium_build_data.get('total_cost', 0):,.2f}")
@@ -1665,20 +4848,42 @@ class AdvancedBuildGenerator:
                 recommendations["minimum_build"] = self.generate_cheapest_feasible_build(performance_needs)
         else:
             # Fallback to default budgets
-            recommendations["builds"]["budget"] = premade_build_generator.get_closest_premade_build(
-                30000, performance_needs
-            )["components"] if premade_build_generator.get_closest_premade_build(30000, performance_needs) else []
-            
-            recommendations["builds"]["balanced"] = premade_build_generator.get_closest_premade_build(
-                50000, performance_needs
-            )["components"] if premade_build_generator.get_closest_premade_build(50000, performance_needs) else []
-            
-            recommendations["builds"]["premium"] = premade_build_generator.get_closest_premade_build(
-                75000, performance_needs
-            )["components"] if premade_build_generator.get_closest_premade_build(75000, performance_needs) else []
+            tier_builds = self._generate_tier_builds(
+                {"budget": 30000, "balanced": 50000, "premium": 75000}, performance_needs
+            )
+            for tier, build_data in tier_builds.items():
+                recommendations["builds"][tier] = build_data["components"] if build_data else []
         
         return recommendations
     
+    def _generate_tier_builds(self, tier_targets: Dict[str, float], performance_needs: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Premade builds for several tiers at once, computed concurrently on build_tier_executor.
+        Tiers that resolve to the same premade budget are computed once. The candidate pool for
+        the tiers missing from the cache is prefetched here, on the request thread; workers share
+        this request's memo and check out their own connection only for searches the pool misses.
+        """
+        targets = {tier: premade_build_generator.resolve_target_budget(budget) for tier, budget in tier_targets.items()}
+        version = premade_build_generator.catalog_version()
+        missing = sorted(target for target in set(targets.values())
+                         if not premade_build_generator.premade_builds_cache.contains(
+                             version, premade_build_generator.cache_key(target, performance_needs)))
+        tier_pool = premade_build_generator.prefetch_tier_candidates(missing, performance_needs) if missing else None
+        
+        build = db_manager.in_worker_scope(premade_build_generator.get_closest_premade_build)
+        futures = {}
+        for tier, target in targets.items():
+            if target not in futures:
+                futures[target] = build_tier_executor.submit(build, tier_targets[tier], performance_needs, tier_pool)
+        builds = {}
+        for tier, target in targets.items():
+            try:
+                builds[tier] = futures[target].result()
+            except Exception as e:
+                logger.error(f"{tier.capitalize()} build generation error: {e}")
+                builds[tier] = None
+        return builds
+    
     def can_build_within_budget(self, user_budget: float, performance_needs: List[str]) -> Tuple[bool, float, str]:
         """Check if a feasible build is possible within the budget"""
         min_budget = self.get_minimum_feasible_budget(performance_needs)
@@ -1711,14 +4916,13 @@ class AdvancedBuildGenerator:
         
         build_components = []
         
+        options_by_type = db_manager.search_components_batch({
+            component_type: (None, min_budget * allocation * 1.2, 10)
+            for component_type, allocation in allocations.items()
+        })
+        
         for component_type, allocation in allocations.items():
-            component_budget = min_budget * allocation
-            
-            component_options = db_manager.search_components(
-                component_type=component_type,
-                max_price=component_budget * 1.2,
-                limit=10
-            )
+            component_options = options_by_type.get(component_type, [])
             
             if component_options:
                 if len(component_options) >= 3:
@@ -1755,10 +4959,258 @@ class AdvancedBuildGenerator:
 
 # Initialize advanced build generator
 advanced_build_generator = AdvancedBuildGenerator()
+build_tier_executor = ThreadPoolExecutor(max_workers=BUILD_TIER_WORKERS, thread_name_prefix='build-tier')
 
 # Initialize premade build generator
 premade_build_generator = PremadeBuildGenerator()
 
+class PremadeBuildWarmup:
+    """
+    Precomputes premade builds for every budget tier x performance-needs combination and
+    persists the table under CACHE_DIR, keyed by a fingerprint of the catalog contents, so a
+    restarted worker loads it instead of recomputing.
+    Needs subsets that map to the same allocation tables share one computed build.
+    Builds are computed serially on a background thread (start()); by then the process runs
+    other threads and holds pooled connections, so forking worker processes is not safe.
+    After an incremental catalog change only the builds whose candidate windows take in a
+    changed type and price are recomputed, and only the changed types are rehashed.
+    Until the table is installed, premade builds are generated on demand as before.
+    """
+    
+    NEEDS = ["gaming", "professional", "productivity", "streaming"]
+    FORMAT = 3  # bump when build generation changes so persisted tables are recomputed
+    
+    def __init__(self, generator: PremadeBuildGenerator, catalog: ComponentCatalog, path: Path):
+        self.generator = generator
+        self.catalog = catalog
+        self.path = path
+        self.lock = threading.Lock()
+        self.digest_lock = threading.Lock()
+        self.thread = None
+        self.table: Dict[str, Dict] = {}  # the installed builds
+        self.version = None  # catalog version the installed table was computed for
+        self.type_digests: Dict[str, str] = {}  # type -> content hash, see fingerprint()
+        self.fingerprint_value = None
+        self.source = None  # "disk", "computed" or "updated"
+        self.builds = 0
+        self.recomputed = 0  # builds computed by the last warm or update
+        self.warm_seconds = 0.0
+    
+    def fingerprint(self, types: List[str] = None) -> str:
+        """
+        Content hash of the catalog plus solver settings (catalog.version is per-process).
+        Hashed per type: only the given types are rehashed (default: all of them).
+        """
+        with self.digest_lock:
+            with self.catalog.lock:
+                rows, specs, slices = self.catalog.rows, self.catalog.specs, self.catalog.types
+            stale = set(slices) if types is None else (set(types) | set(slices) - set(self.type_digests))
+            digests = {comp_type: value for comp_type, value in self.type_digests.items() if comp_type in slices}
+            for comp_type in stale & set(slices):
+                digest = hashlib.sha1()
+                for component_id in sorted(slices[comp_type].ids.tolist()):
+                    digest.update(repr(rows[component_id][:6]).encode())
+                    digest.update(repr(specs.get(component_id)).encode())
+                digests[comp_type] = digest.hexdigest()
+            self.type_digests = digests
+        
+        digest = hashlib.sha1()
+        digest.update(f"{self.FORMAT}|{build_optimizer.buckets}|{build_optimizer.deviation_weight}|"
+                      f"{BUILD_SOLVER_UPPER_SAMPLES}|{CANDIDATE_PREFETCH_LIMIT}".encode())
+        for comp_type in sorted(digests):
+            digest.update(f"{comp_type}:{digests[comp_type]}".encode())
+        return digest.hexdigest()
+    
+    def combinations(self) -> List[List[str]]:
+        """Every subset of NEEDS; the empty subset is the general-use build"""
+        return [list(combo) for size in range(len(self.NEEDS) + 1)
+                for combo in itertools.combinations(self.NEEDS, size)]
+    
+    def tasks(self) -> List[Tuple[float, List[List[str]]]]:
+        """(tier, needs subsets sharing one build) for every build in the table"""
+        # Builds depend on needs only through the allocation tables
+        budget_generator = BudgetAwareBuildGenerator()
+        groups: Dict[tuple, List[List[str]]] = {}
+        for needs in self.combinations():
+            signature = (
+                tuple(sorted(budget_generator._get_budget_allocations(1.0, needs).items())),
+                tuple(sorted(self.generator._get_budget_allocations(1.0, needs).items()))
+            )
+            groups.setdefault(signature, []).append(needs)
+        return [(tier, members) for tier in self.generator.budget_tiers for members in groups.values()]
+    
+    def load(self, types: List[str] = None) -> bool:
+        """Install the persisted table if it was computed from the current catalog"""
+        if not self.path.exists():
+            return False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            version = self.generator.catalog_version()
+            fingerprint = self.fingerprint(types)
+            if stored.get('fingerprint') != fingerprint:
+                logger.info("Premade build table on disk is stale, recomputing")
+                return False
+            self._install(stored['builds'], fingerprint, 'disk', version)
+            logger.info(f"Premade build table loaded from disk: {len(stored['builds'])} builds")
+            return True
+        except Exception as e:
+            logger.error(f"Premade build table load failed: {e}")
+            return False
+    
+    def start(self):
+        """Load the persisted table, or compute it, without holding up startup"""
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._run, name='premade-warmup', daemon=True)
+        self.thread.start()
+    
+    def _run(self):
+        try:
+            if not self.load():
+                self.warm_shared()
+        except Exception as e:
+            logger.error(f"Premade warmup failed: {e}")
+    
+    def warm(self) -> int:
+        """Compute every tier x needs build, install it and persist it; returns the builds computed"""
+        with self.lock:
+            start = time.time()
+            version = self.generator.catalog_version()
+            fingerprint = self.fingerprint()
+            tasks = self.tasks()
+            builds = self._compute(tasks)
+            self._install(builds, fingerprint, 'computed', version)
+            self._persist(builds, fingerprint)
+            self.recomputed = len(tasks)
+            self.warm_seconds = time.time() - start
+            logger.info(f"Premade build table computed: {len(tasks)} builds for {len(builds)} keys "
+                        f"in {self.warm_seconds:.2f}s")
+            return len(tasks)
+    
+    def update(self, changes: Dict[str, Tuple[float, float]], version: Any) -> int:
+        """
+        Recompute the builds whose candidate windows take in a changed (type, price range), keep
+        the rest, and install the table for version; returns the builds computed.
+        changes must cover every catalog change since the installed table's version, up to version.
+        """
+        with self.lock:
+            start = time.time()
+            fingerprint = self.fingerprint(list(changes))
+            budget_generator = BudgetAwareBuildGenerator()
+            tasks = [(tier, members) for tier, members in self.tasks()
+                     if self._affected(budget_generator, tier, members[0], changes)]
+            
+            builds = dict(self.table)
+            for tier, members in tasks:
+                for member in members:
+                    builds.pop(self.generator.cache_key(tier, member), None)
+            builds.update(self._compute(tasks))
+            self._install(builds, fingerprint, 'updated', version)
+            self._persist(builds, fingerprint)
+            self.recomputed = len(tasks)
+            self.warm_seconds = time.time() - start
+            logger.info(f"Premade build table updated: {len(tasks)} builds recomputed for changes to "
+                        f"{', '.join(sorted(changes))} in {self.warm_seconds:.2f}s")
+            return len(tasks)
+    
+    def _affected(self, budget_generator: 'BudgetAwareBuildGenerator', tier: float, needs: List[str],
+                  changes: Dict[str, Tuple[float, float]]) -> bool:
+        """Whether a changed price falls inside one of the build's candidate windows"""
+        windows = self.generator._candidate_windows(budget_generator, tier, needs)
+        for comp_type, (low, high) in changes.items():
+            window = windows.get(comp_type)
+            if window and low <= window[1] and high >= window[0]:
+                return True
+        return False
+    
+    def _compute(self, tasks: List[Tuple[float, List[List[str]]]]) -> Dict[str, Dict]:
+        builds = {}
+        for target_budget, members in tasks:
+            build = self.generator._generate_premade_build(target_budget, members[0])
+            if not build:
+                continue
+            for member in members:
+                builds[self.generator.cache_key(target_budget, member)] = build
+        # Round-trip through JSON so fresh and disk-loaded builds look the same to callers
+        return json.loads(json.dumps(builds, default=str))
+    
+    def warm_shared(self, changes: Dict[str, Tuple[float, float]] = None, version: Any = None) -> bool:
+        """
+        Warm once per host: the worker holding the lock file computes and persists the table,
+        the others wait for it and load the persisted copy. False if it was loaded, not computed.
+        With changes, the table is updated for them (see update()) instead of recomputed.
+        """
+        def compute():
+            if changes is None:
+                self.warm()
+            else:
+                self.update(changes, version)
+        
+        if fcntl is None:
+            compute()
+            return True
+        
+        with open(self.path.with_suffix('.lock'), 'w') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                logger.info("Another worker is warming the premade build table, waiting for it")
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # Whoever held the lock before us may have just persisted a current table
+                if self.load(list(changes) if changes is not None else None):
+                    return False
+                compute()
+                return True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def on_catalog_change(self):
+        # Runs on the refresher thread. Read the version first: the changes then cover at least up to it
+        version = self.generator.catalog_version()
+        changes = self.catalog.changes_since(self.version) if self.table else None
+        if changes is None:
+            # A full reload (or a table older than the change log): only the full hash can tell
+            if self.fingerprint_value != self.fingerprint():
+                self.warm_shared()
+        elif changes:
+            self.warm_shared(changes, version)
+    
+    def _install(self, builds: Dict[str, Dict], fingerprint: str, source: str, version: Any):
+        self.generator.premade_builds_cache.install(version, builds)
+        self.table = builds
+        self.version = version
+        self.fingerprint_value = fingerprint
+        self.source = source
+        self.builds = len(builds)
+    
+    def _persist(self, builds: Dict[str, Dict], fingerprint: str):
+        try:
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'fingerprint': fingerprint, 'created_at': datetime.now().isoformat(),
+                           'builds': builds}, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Premade build table save failed: {e}")
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": bool(self.thread and self.thread.is_alive()),
+            "source": self.source,
+            "builds": self.builds,
+            "recomputed": self.recomputed,
+            "warm_seconds": round(self.warm_seconds, 2),
+            "fingerprint": self.fingerprint_value[:12] if self.fingerprint_value else None
+        }
+
+premade_warmup = PremadeBuildWarmup(premade_build_generator, component_catalog, CACHE_DIR / 'premade_builds.json')
+
+if CATALOG_ENABLED and PREMADE_WARMUP_ENABLED and component_catalog.loaded:
+    premade_warmup.start()
+    catalog_refresher.listeners.append(premade_warmup.on_catalog_change)
+
 # Smart Query Parser
 ENHANCED_KEYWORD_PATTERNS = {
     "component_types": {
@@ -1784,19 +5236,239 @@ ENHANCED_KEYWORD_PATTERNS = {
         "professional": ["rendering", "video editing", "3d modeling", "photoshop", "premiere", "blender"],
         "productivity": ["office work", "multitasking", "productivity", "excel", "programming", "coding"],
         "streaming": ["streaming", "twitch", "obs", "streaming setup", "content creation"]
+    },
+    "pc_keywords": ["pc", "computer", "desktop", "tower", "rig", "build", "setup", "cpu", "gpu", "ram"],
+    "non_pc_keywords": ["mobile", "hotspot", "lte", "5g", "wifi", "router", "phone", "smartphone"],
+    "build_phrases": ["pc build", "computer build", "desktop build", "gaming build", "build a pc"],
+    "setup_words": ["setup", "build", "complete", "full"],
+    "general_pc_keywords": ["pc", "computer", "setup", "build"],
+    "general_build_phrases": ["help me", "what should i", "recommend me", "suggest me", "need a computer"],
+    "brands": ["intel", "amd", "nvidia", "asus", "msi", "gigabyte", "corsair", "samsung", "western digital"],
+    "intent_keywords": {
+        "search": ["find", "search", "look for", "show me", "looking for"],
+        "compare": ["compare", "vs", "versus", "better", "difference between"],
+        "build": ["build", "pc build", "setup", "complete build"],
+        "upgrade": ["upgrade", "replace", "improve", "better than"]
     }
 }
 
+# Keyword lists of the other message consumers: upgrade detection, relevance check, thread titles
+MESSAGE_KEYWORD_PATTERNS = {
+    "upgrade_keywords": [
+        'upgrade', 'upgrading', 'upgraded', 'upgrades',
+        'future upgrade', 'future upgrades', 'future-proof',
+        'better', 'improve', 'improvement', 'enhance',
+        'next level', 'next step', 'better option',
+        'upgrade path', 'upgrade for', 'upgrade my',
+        'should i upgrade', 'can i upgrade', 'what to upgrade',
+        'upgrade cpu', 'upgrade gpu', 'upgrade ram',
+        'upgrade storage', 'upgrade motherboard', 'upgrade psu',
+        'upgrade case', 'upgrade cooler', 'upgrade monitor'
+    ],
+    "upgrade_components": {
+        'cpu': ['cpu', 'processor', 'chip'],
+        'gpu': ['gpu', 'graphics', 'video card', 'graphics card', 'vga'],
+        'ram': ['ram', 'memory', 'ddr'],
+        'storage': ['storage', 'ssd', 'hdd', 'hard drive', 'disk'],
+        'motherboard': ['motherboard', 'mobo', 'mainboard', 'board'],
+        'psu': ['psu', 'power supply', 'power'],
+        'case': ['case', 'chassis', 'tower'],
+        'cooler': ['cooler', 'cooling', 'fan', 'heatsink'],
+        'monitor': ['monitor', 'display', 'screen']
+    },
+    "relevance_components": ['cpu', 'gpu', 'ram', 'storage', 'motherboard', 'psu', 'case', 'cooler', 'monitor',
+                             'processor', 'graphics', 'memory', 'ssd', 'hdd', 'power supply'],
+    "relevance_budget": ['budget', 'price', 'cost', 'peso', 'php', '₱'],
+    "title_build_keywords": ["build", "setup", "pc", "computer", "gaming", "workstation"]
+}
+
+# Messages whose keyword scans are kept (a message read by several stages is scanned once)
+KEYWORD_SCAN_CACHE_SIZE = int(os.getenv('KEYWORD_SCAN_CACHE_SIZE', 512))
+
+# Query matching engine
+# Every keyword list is matched with one Aho-Corasick pass, so parsing a message costs the same
+# however long the lists get. Price indicators are compiled once and searched once per message.
+class KeywordAutomaton:
+    """Aho-Corasick automaton: scan() reports every keyword that occurs in a text (as `keyword in text`)"""
+    
+    def __init__(self, keywords: List[str] = ()):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[Tuple[str, ...]] = [()]
+        for keyword in keywords:
+            self.add(keyword)
+        self.build()
+    
+    def add(self, keyword: str):
+        state = 0
+        for char in keyword:
+            child = self.goto[state].get(char)
+            if child is None:
+                child = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(())
+                self.goto[state][char] = child
+            state = child
+        if keyword not in self.output[state]:
+            self.output[state] += (keyword,)
+    
+    def build(self):
+        """Compute failure links breadth first; call after the last add()"""
+        frontier = list(self.goto[0].values())
+        for state in frontier:
+            self.fail[state] = 0
+        while frontier:
+            next_frontier = []
+            for state in frontier:
+                for char, child in self.goto[state].items():
+                    fallback = self.fail[state]
+                    while fallback and char not in self.goto[fallback]:
+                        fallback = self.fail[fallback]
+                    self.fail[child] = self.goto[fallback].get(char, 0)
+                    self.output[child] += tuple(k for k in self.output[self.fail[child]] if k not in self.output[child])
+                    next_frontier.append(child)
+            frontier = next_frontier
+    
+    def scan(self, text: str) -> set:
+        goto, fail, output = self.goto, self.fail, self.output
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+class KeywordMatches:
+    """What one scan found: category -> group -> [(position in its list, keyword)]"""
+    
+    def __init__(self, hits: Dict[str, Dict[Optional[str], List[Tuple[int, str]]]],
+                 group_order: Dict[str, Dict[Optional[str], int]]):
+        self.hits = hits
+        self.group_order = group_order
+    
+    def any(self, category: str, group: str = None) -> bool:
+        groups = self.hits.get(category, {})
+        return bool(groups) if group is None else group in groups
+    
+    def count(self, category: str, group: str = None) -> int:
+        """Distinct keywords of the group (or flat list) found"""
+        return len(self.hits.get(category, {}).get(group, ()))
+    
+    def groups(self, category: str) -> List[str]:
+        """Groups with at least one keyword found, in declaration order"""
+        order = self.group_order.get(category, {})
+        return sorted(self.hits.get(category, {}), key=order.get)
+    
+    def first(self, category: str) -> Optional[str]:
+        """Earliest-listed keyword found in a flat list"""
+        found = self.hits.get(category, {}).get(None)
+        return min(found)[1] if found else None
+    
+    def keywords(self, category: str) -> set:
+        """Every keyword of the category found"""
+        return {keyword for found in self.hits.get(category, {}).values() for _, keyword in found}
+
+class KeywordIndex:
+    """Keyword lists (category -> list, or category -> group -> list) behind one automaton"""
+    
+    def __init__(self, patterns: Dict[str, Any], max_entries: int = 0):
+        self.lock = threading.Lock()
+        self.max_entries = max_entries
+        self.scans: 'OrderedDict[str, KeywordMatches]' = OrderedDict()  # text -> matches, LRU order
+        self.hits = 0
+        self.misses = 0
+        self.labels: Dict[str, List[Tuple[str, Optional[str], int]]] = {}
+        self.group_order: Dict[str, Dict[Optional[str], int]] = {}
+        for category, keywords in patterns.items():
+            grouped = keywords if isinstance(keywords, dict) else {None: keywords}
+            self.group_order[category] = {group: rank for rank, group in enumerate(grouped)}
+            for group, words in grouped.items():
+                for position, keyword in enumerate(words):
+                    self.labels.setdefault(keyword, []).append((category, group, position))
+        self.automaton = KeywordAutomaton(self.labels)
+    
+    def scan(self, text: str) -> KeywordMatches:
+        """Matches of every list in text; recent texts are answered from the LRU (treat as read-only)"""
+        with self.lock:
+            matches = self.scans.get(text)
+            if matches is not None:
+                self.scans.move_to_end(text)
+                self.hits += 1
+                return matches
+            self.misses += 1
+        
+        hits: Dict[str, Dict[Optional[str], List[Tuple[int, str]]]] = {}
+        for keyword in self.automaton.scan(text):
+            for category, group, position in self.labels[keyword]:
+                hits.setdefault(category, {}).setdefault(group, []).append((position, keyword))
+        matches = KeywordMatches(hits, self.group_order)
+        
+        if self.max_entries > 0:
+            with self.lock:
+                self.scans[text] = matches
+                while len(self.scans) > self.max_entries:
+                    self.scans.popitem(last=False)
+        return matches
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "keywords": len(self.labels),
+            "states": len(self.automaton.goto),
+            "cached_scans": len(self.scans),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+keyword_index = KeywordIndex(
+    dict({category: keywords for category, keywords in ENHANCED_KEYWORD_PATTERNS.items()
+          if category != "price_indicators"}, **MESSAGE_KEYWORD_PATTERNS),
+    max_entries=KEYWORD_SCAN_CACHE_SIZE
+)
+PRICE_INDICATORS = [re.compile(pattern) for pattern in ENHANCED_KEYWORD_PATTERNS["price_indicators"]]
+MODEL_INDICATOR = re.compile(r'\d{4}[a-z]*|rtx\s*\d+|rx\s*\d+|ryzen\s*[3579]\s*\d+')
+
+class QueryScan:
+    """Every keyword and indicator match in a message, found once and shared by the parser steps"""
+    __slots__ = ('keywords', 'prices', 'specific_model')
+    
+    def __init__(self, query: str):
+        self.keywords = keyword_index.scan(query)
+        # price indicator index -> (start, end, number) of its first match
+        self.prices: Dict[int, Tuple[int, int, str]] = {}
+        for index, indicator in enumerate(PRICE_INDICATORS):
+            match = indicator.search(query)
+            if match:
+                self.prices[index] = (match.start(), match.end(), match.group(1))
+        self.specific_model = MODEL_INDICATOR.search(query) is not None
+
 # Smart Query Parser
 class SmartQueryParser:
     def __init__(self):
         self.db_manager = db_manager
+        self.cache = MessageCache()  # normalized message -> parsed query
     
     def parse_query(self, query: str) -> Dict[str, Any]:
-        query_lower = query.lower()
+        """Parse the normalized message (cached); callers get their own copy"""
+        key = normalize_message(query)
+        parsed = self.cache.get(key)
+        if parsed is MessageCache.MISSING:
+            parsed = self._parse(key)
+            self.cache.put(key, parsed)
+        
+        return dict(parsed, original_query=query,
+                    price_constraints=dict(parsed["price_constraints"]),
+                    model_keywords=list(parsed["model_keywords"]),
+                    performance_needs=list(parsed["performance_needs"]))
+    
+    def _parse(self, query_lower: str) -> Dict[str, Any]:
+        scan = QueryScan(query_lower)
         
         parsed = {
-            "original_query": query,
+            "original_query": query_lower,
             "component_type": None,
             "brand": None,
             "model_keywords": [],
@@ -1811,44 +5483,39 @@ class SmartQueryParser:
             "should_generate_complete_build": False,
         }
         
-        parsed["is_pc_related"] = self._is_pc_related_query(query_lower)
-        parsed["build_intent_detected"] = self._detect_build_intent(query_lower)
-        parsed["component_type"] = self._detect_component_type(query_lower)
-        parsed["price_constraints"] = self._extract_price_constraints(query_lower)
-        parsed["should_generate_complete_build"] = self._should_generate_complete_build(query_lower, parsed)
-        parsed["brand"] = self._detect_brand(query_lower, parsed["component_type"])
+        parsed["is_pc_related"] = self._is_pc_related_query(scan)
+        parsed["build_intent_detected"] = self._detect_build_intent(scan)
+        parsed["component_type"] = self._detect_component_type(scan)
+        parsed["price_constraints"] = self._extract_price_constraints(query_lower, scan)
+        parsed["should_generate_complete_build"] = self._should_generate_complete_build(scan, parsed)
+        parsed["brand"] = self._detect_brand(scan, parsed["component_type"])
         parsed["model_keywords"] = self._extract_model_keywords(query_lower)
-        parsed["intent"] = self._detect_intent(query_lower)
-        parsed["performance_needs"] = self._detect_performance_needs(query_lower)
-        parsed["specific_model_detected"] = self._detect_specific_model(query_lower)
+        parsed["intent"] = self._detect_intent(scan)
+        parsed["performance_needs"] = self._detect_performance_needs(scan)
+        parsed["specific_model_detected"] = scan.specific_model
         parsed["query_context"] = self._determine_query_context(parsed)
         parsed["confidence_score"] = self._calculate_confidence(parsed)
         
         return parsed
     
-    def _is_pc_related_query(self, query: str) -> bool:
-        pc_keywords = ["pc", "computer", "desktop", "tower", "rig", "build", "setup", "cpu", "gpu", "ram"]
-        non_pc_keywords = ["mobile", "hotspot", "lte", "5g", "wifi", "router", "phone", "smartphone"]
-        
-        pc_keywords_present = any(keyword in query for keyword in pc_keywords)
-        non_pc_keywords_present = any(keyword in query for keyword in non_pc_keywords)
+    def _is_pc_related_query(self, scan: QueryScan) -> bool:
+        pc_keywords_present = scan.keywords.any("pc_keywords")
+        non_pc_keywords_present = scan.keywords.any("non_pc_keywords")
         
         return pc_keywords_present or not non_pc_keywords_present
     
-    def _detect_build_intent(self, query: str) -> bool:
-        build_phrases = ["pc build", "computer build", "desktop build", "gaming build", "build a pc"]
-        
-        if any(phrase in query for phrase in build_phrases):
+    def _detect_build_intent(self, scan: QueryScan) -> bool:
+        if scan.keywords.any("build_phrases"):
             return True
         
-        has_budget = any(re.search(pattern, query) for pattern in ENHANCED_KEYWORD_PATTERNS["price_indicators"])
-        has_setup_words = any(word in query for word in ["setup", "build", "complete", "full"])
+        has_budget = bool(scan.prices)
+        has_setup_words = scan.keywords.any("setup_words")
         
         return has_budget and has_setup_words
     
-    def _should_generate_complete_build(self, query: str, parsed: Dict) -> bool:
+    def _should_generate_complete_build(self, scan: QueryScan, parsed: Dict) -> bool:
         has_budget = bool(parsed["price_constraints"])
-        has_general_pc_keywords = any(keyword in query for keyword in ["pc", "computer", "setup", "build"])
+        has_general_pc_keywords = scan.keywords.any("general_pc_keywords")
         no_specific_component = not parsed["component_type"]
         has_performance_needs = bool(parsed["performance_needs"])
         
@@ -1858,30 +5525,23 @@ class SmartQueryParser:
         if has_performance_needs and has_budget and no_specific_component:
             return True
         
-        general_build_phrases = ["help me", "what should i", "recommend me", "suggest me", "need a computer"]
-        if any(phrase in query for phrase in general_build_phrases) and has_budget:
+        if scan.keywords.any("general_build_phrases") and has_budget:
             return True
         
         return False
     
-    def _detect_component_type(self, query: str) -> Optional[str]:
-        scores = {}
-        
-        for comp_type, keywords in ENHANCED_KEYWORD_PATTERNS["component_types"].items():
-            score = sum(1 for keyword in keywords if keyword in query)
-            if score > 0:
-                scores[comp_type] = score
+    def _detect_component_type(self, scan: QueryScan) -> Optional[str]:
+        # Most keywords wins; ties go to the type listed first
+        scores = {comp_type: scan.keywords.count("component_types", comp_type)
+                  for comp_type in scan.keywords.groups("component_types")}
         
         if scores:
             return max(scores.items(), key=lambda x: x[1])[0]
         return None
     
-    def _detect_brand(self, query: str, component_type: str) -> Optional[str]:
-        brands = ["intel", "amd", "nvidia", "asus", "msi", "gigabyte", "corsair", "samsung", "western digital"]
-        for brand in brands:
-            if brand in query:
-                return brand.upper()
-        return None
+    def _detect_brand(self, scan: QueryScan, component_type: str) -> Optional[str]:
+        brand = scan.keywords.first("brands")
+        return brand.upper() if brand else None
     
     def _extract_model_keywords(self, query: str) -> List[str]:
         stop_words = {"the", "a", "an", "for", "with", "under", "around"}
@@ -1894,35 +5554,34 @@ class SmartQueryParser:
         
         return list(set(model_keywords))
     
-    def _extract_price_constraints(self, query: str) -> Dict[str, float]:
+    def _extract_price_constraints(self, query: str, scan: QueryScan = None) -> Dict[str, float]:
         constraints = {}
         
-        for pattern in ENHANCED_KEYWORD_PATTERNS["price_indicators"]:
-            matches = re.finditer(pattern, query.lower())
-            for match in matches:
-                try:
-                    price_str = match.group(1).replace(',', '').strip()
-                    
-                    if not price_str:
-                        continue
-                    
-                    if 'k' in query[match.start():match.end()].lower():
-                        price = float(price_str) * 1000
-                    else:
-                        price = float(price_str)
-                    
-                    context = query[max(0, match.start()-20):match.start()].lower()
-                    if any(word in context for word in ["under", "below", "less", "max", "maximum"]):
-                        constraints["max_price"] = price
-                    elif any(word in context for word in ["above", "over", "more", "min", "minimum"]):
-                        constraints["min_price"] = price
-                    else:
-                        constraints["max_price"] = price
-                    
-                    break
-                    
-                except (ValueError, IndexError):
+        # The first match of each price indicator, in indicator order (later ones win)
+        prices = (scan or QueryScan(query.lower())).prices
+        for index in sorted(prices):
+            start, end, number = prices[index]
+            try:
+                price_str = number.replace(',', '').strip()
+                
+                if not price_str:
                     continue
+                
+                if 'k' in query[start:end].lower():
+                    price = float(price_str) * 1000
+                else:
+                    price = float(price_str)
+                
+                context = query[max(0, start-20):start].lower()
+                if any(word in context for word in ["under", "below", "less", "max", "maximum"]):
+                    constraints["max_price"] = price
+                elif any(word in context for word in ["above", "over", "more", "min", "minimum"]):
+                    constraints["min_price"] = price
+                else:
+                    constraints["max_price"] = price
+                
+            except (ValueError, IndexError):
+                continue
         
         if not constraints:
             number_pattern = r'\b(\d{4,6})\b'
@@ -1936,34 +5595,12 @@ class SmartQueryParser:
         
         return constraints
     
-    def _detect_intent(self, query: str) -> str:
-        intent_keywords = {
-            "search": ["find", "search", "look for", "show me", "looking for"],
-            "compare": ["compare", "vs", "versus", "better", "difference between"],
-            "build": ["build", "pc build", "setup", "complete build"],
-            "upgrade": ["upgrade", "replace", "improve", "better than"]
-        }
-        
-        for intent, keywords in intent_keywords.items():
-            if any(keyword in query for keyword in keywords):
-                return intent
-        return "search"
-    
-    def _detect_performance_needs(self, query: str) -> List[str]:
-        needs = []
-        for need_type, keywords in ENHANCED_KEYWORD_PATTERNS["performance_keywords"].items():
-            if any(keyword in query for keyword in keywords):
-                needs.append(need_type)
-        return needs
+    def _detect_intent(self, scan: QueryScan) -> str:
+        intents = scan.keywords.groups("intent_keywords")
+        return intents[0] if intents else "search"
     
-    def _detect_specific_model(self, query: str) -> bool:
-        model_indicators = [r'\d{4}[a-z]*', r'rtx\s*\d+', r'rx\s*\d+', r'ryzen\s*[3579]\s*\d+']
-        
-        for pattern in model_indicators:
-            if re.search(pattern, query):
-                return True
-        
-        return False
+    def _detect_performance_needs(self, scan: QueryScan) -> List[str]:
+        return scan.keywords.groups("performance_keywords")
     
     def _determine_query_context(self, parsed: Dict) -> str:
         if parsed.get("build_intent_detected") or parsed.get("should_generate_complete_build"):
@@ -2054,14 +5691,14 @@ class SmartQueryParser:
         
         all_results = []
         
+        results_by_type = self.db_manager.search_components_batch({
+            component_type: (None, max_price * allocation, 10)
+            for component_type, allocation in component_allocations.items()
+        })
+        
         for component_type, allocation in component_allocations.items():
             component_budget = max_price * allocation
-            
-            component_results = self.db_manager.search_components(
-                component_type=component_type,
-                max_price=component_budget,
-                limit=10
-            )
+            component_results = results_by_type.get(component_type, [])
             
             if component_results:
                 sorted_results = sorted(
@@ -2078,45 +5715,21 @@ query_parser = SmartQueryParser()
 # Upgrade Detection and Suggestion System
 class UpgradeSuggestionSystem:
     def __init__(self):
-        self.upgrade_keywords = [
-            'upgrade', 'upgrading', 'upgraded', 'upgrades',
-            'future upgrade', 'future upgrades', 'future-proof',
-            'better', 'improve', 'improvement', 'enhance',
-            'next level', 'next step', 'better option',
-            'upgrade path', 'upgrade for', 'upgrade my',
-            'should i upgrade', 'can i upgrade', 'what to upgrade',
-            'upgrade cpu', 'upgrade gpu', 'upgrade ram',
-            'upgrade storage', 'upgrade motherboard', 'upgrade psu',
-            'upgrade case', 'upgrade cooler', 'upgrade monitor'
-        ]
-        
-        self.component_type_keywords = {
-            'cpu': ['cpu', 'processor', 'chip'],
-            'gpu': ['gpu', 'graphics', 'video card', 'graphics card', 'vga'],
-            'ram': ['ram', 'memory', 'ddr'],
-            'storage': ['storage', 'ssd', 'hdd', 'hard drive', 'disk'],
-            'motherboard': ['motherboard', 'mobo', 'mainboard', 'board'],
-            'psu': ['psu', 'power supply', 'power'],
-            'case': ['case', 'chassis', 'tower'],
-            'cooler': ['cooler', 'cooling', 'fan', 'heatsink'],
-            'monitor': ['monitor', 'display', 'screen']
-        }
+        self.upgrade_keywords = MESSAGE_KEYWORD_PATTERNS["upgrade_keywords"]
+        self.component_type_keywords = MESSAGE_KEYWORD_PATTERNS["upgrade_components"]
     
     def detect_upgrade_request(self, query: str) -> Dict[str, Any]:
         """Detect if the query is about upgrades and extract component types"""
-        query_lower = query.lower()
+        matches = keyword_index.scan(query.lower())
         
         # Check for upgrade keywords
-        has_upgrade_keyword = any(keyword in query_lower for keyword in self.upgrade_keywords)
+        has_upgrade_keyword = matches.any("upgrade_keywords")
         
         if not has_upgrade_keyword:
             return {'is_upgrade_request': False}
         
         # Extract mentioned component types
-        mentioned_components = []
-        for comp_type, keywords in self.component_type_keywords.items():
-            if any(keyword in query_lower for keyword in keywords):
-                mentioned_components.append(comp_type)
+        mentioned_components = matches.groups("upgrade_components")
         
         # If no specific component mentioned, it's for all components
         if not mentioned_components:
@@ -2170,6 +5783,7 @@ class UpgradeSuggestionSystem:
         
         # If not found in history, try to query database for latest recommendation in thread
         if thread_id and not previous_components:
+            conn = None
             try:
                 conn = db_manager.get_connection()
                 if conn:
@@ -2193,8 +5807,8 @@ class UpgradeSuggestionSystem:
                         recommendation_id = result['recommendation_id']
                         
                         # Get components from this recommendation
-                        comp_query = """
-                            SELECT component_type as type, brand, model, price, currency, 
+                        comp_query = f"""
+                            SELECT {'component_id, ' if db_manager.has_component_id else ''}component_type as type, brand, model, price, currency, 
                                    image_url, source_url
                             FROM recommendation_components
                             WHERE recommendation_id = %s
@@ -2220,6 +5834,7 @@ class UpgradeSuggestionSystem:
                             comp_type = comp.get('type')
                             if comp_type and comp_type not in previous_components:
                                 previous_components[comp_type] = {
+                                    'component_id': comp.get('component_id'),
                                     'type': comp_type,
                                     'brand': comp.get('brand'),
                                     'model': comp.get('model'),
@@ -2239,8 +5854,12 @@ class UpgradeSuggestionSystem:
                     
                     cursor.close()
                     conn.close()
+                    
+                    db_manager.hydrate_components(list(previous_components.values()))
             except Exception as e:
                 logger.error(f"Error extracting previous build from database: {e}")
+                if conn:
+                    conn.close()
         
         return {
             'has_previous_build': len(previous_components) > 0,
@@ -2265,26 +5884,15 @@ class UpgradeSuggestionSystem:
             return False
         
         # Extract keywords from both messages
-        current_lower = current_message.lower()
-        previous_lower = last_assistant_msg.lower()
-        
-        # Component-related keywords
-        component_keywords = ['cpu', 'gpu', 'ram', 'storage', 'motherboard', 'psu', 'case', 'cooler', 'monitor',
-                            'processor', 'graphics', 'memory', 'ssd', 'hdd', 'power supply']
+        current = keyword_index.scan(current_message.lower())
+        previous = keyword_index.scan(last_assistant_msg.lower())
         
         # Check if both mention similar components
-        current_components = [kw for kw in component_keywords if kw in current_lower]
-        previous_components = [kw for kw in component_keywords if kw in previous_lower]
-        
-        if current_components and previous_components:
-            # Check for overlap
-            overlap = set(current_components) & set(previous_components)
-            if overlap:
-                return True
+        if current.keywords("relevance_components") & previous.keywords("relevance_components"):
+            return True
         
         # Check for budget mentions in both
-        budget_keywords = ['budget', 'price', 'cost', 'peso', 'php', '₱']
-        if any(kw in current_lower for kw in budget_keywords) and any(kw in previous_lower for kw in budget_keywords):
+        if current.any("relevance_budget") and previous.any("relevance_budget"):
             return True
         
         return False
@@ -2329,18 +5937,21 @@ class UpgradeSuggestionSystem:
                 component_type=comp_type,
                 min_price=min_upgrade_price,
                 max_price=max_upgrade_price,
-                limit=5
+                limit=30
             )
             
             if upgrade_options:
-                # Filter out the current component if it's in the results
+                # Filter out the current component and parts that do not outperform it
                 current_model = current_comp.get('model', '').lower()
+                current_value = component_catalog.performance_value(current_comp)
                 upgrade_options = [opt for opt in upgrade_options 
-                                if opt.get('model', '').lower() != current_model]
+                                if opt.get('model', '').lower() != current_model
+                                and component_catalog.performance_value(opt) > current_value]
                 
                 if upgrade_options:
-                    # Sort by price (ascending) and performance (higher price usually = better)
-                    upgrade_options.sort(key=lambda x: to_float(x.get('price', 0)))
+                    # Most performance per peso first
+                    upgrade_options.sort(key=lambda x: (-component_catalog.performance_value(x) / to_float(x['price']),
+                                                        to_float(x['price'])))
                     
                     suggestions[comp_type] = {
                         'current': current_comp,
@@ -2692,35 +6303,39 @@ def generate_smart_recommendation(user_message: str, conversation_history: List[
     # Handle upgrade suggestions differently - they don't need recommendation_id
     recommendation_id = None
     if not is_upgrade_suggestion:
-        recommendation_id = db_manager.create_recommendation(
-            ai_response=ai_context if isinstance(ai_context, str) else str(ai_context),
-            query_analysis=parsed_query,
-            components_found=len(db_results),
-            needs_update=needs_update,
-            budget_analysis=budget_analysis
-        )
-    
-    if db_results and recommendation_id:
-        for component in db_results[:10]:
-            db_manager.add_recommendation_component(recommendation_id, component, 'balanced')
-    
-    if multiple_recommendations and recommendation_id:
-        for tier_name, tier_components in multiple_recommendations.items():
+        tier_rows = []
+        component_rows = [('balanced', component) for component in (db_results or [])[:10]]
+        
+        for tier_name, tier_components in (multiple_recommendations or {}).items():
             if tier_components:
                 total_price = sum(to_float(comp.get('price', 0)) for comp in tier_components)
-                db_manager.add_recommendation_tier(
-                    recommendation_id, 
-                    tier_name, 
-                    total_price, 
-                    len(tier_components)
-                )
-                
-                for component in tier_components[:6]:
-                    db_manager.add_recommendation_component(recommendation_id, component, tier_name)
-    
-    if minimum_build and recommendation_id:
-        for component in minimum_build:
-            db_manager.add_recommendation_component(recommendation_id, component, 'minimum')
+                tier_rows.append((tier_name, total_price, len(tier_components)))
+                component_rows.extend((tier_name, component) for component in tier_components[:6])
+        
+        component_rows.extend(('minimum', component) for component in (minimum_build or []))
+        
+        recommendation_record = {
+            "ai_response": ai_context if isinstance(ai_context, str) else str(ai_context),
+            "query_analysis": parsed_query,
+            "components_found": len(db_results),
+            "needs_update": needs_update,
+            "budget_analysis": budget_analysis,
+            "tiers": tier_rows,
+            "components": component_rows
+        }
+        
+        # Write-behind: the id is reserved now and the INSERTs run after the response is sent
+        if RECOMMENDATION_WRITE_BEHIND:
+            recommendation_id = recommendation_writer.submit(**recommendation_record)
+        
+        if recommendation_id is None:
+            # Recommendation, tiers and components go in with one transaction instead of a commit per row.
+            # The id still comes from the reserved sequence so it cannot collide with a queued write.
+            recommendation_id, persist_timings = db_manager.save_recommendation(
+                **recommendation_record, recommendation_id=recommendation_writer.reserve_id()
+            )
+            logger.info(f"Recommendation {recommendation_id} persisted: {len(tier_rows)} tiers, "
+                        f"{len(component_rows)} components, timings={persist_timings}")
     
     # Return structured response
     if is_upgrade_suggestion:
@@ -2777,6 +6392,17 @@ def health():
         "status": "ok",
         "model_loaded": ai_model.generator is not None,
         "database": db_status,
+        "database_pool": db_manager.pool_stats(),
+        "catalog": component_catalog.stats(),
+        "catalog_refresher": catalog_refresher.stats(),
+        "alternatives_index": alternatives_index.stats(),
+        "model_search_index": model_search_index.stats(),
+        "premade_builds": premade_warmup.stats(),
+        "premade_cache": premade_build_generator.premade_builds_cache.stats(),
+        "shared_cache": shared_cache.stats() if shared_cache else None,
+        "keyword_index": keyword_index.stats(),
+        "message_cache": {"parse": query_parser.cache.stats(), "translate": translator.stats()},
+        "recommendation_writer": recommendation_writer.stats(),
         "timestamp": datetime.now().isoformat()
     })
 
@@ -2810,7 +6436,9 @@ def generate():
         
         logger.info(f"Processing request: {user_message[:100]}... (Thread: {thread_id}, Request ID: {request_id})")
         
-        recommendation = generate_smart_recommendation(user_message, conversation_history, request_id, thread_id)
+        # One request scope per /generate: repeated component searches are served from its memo
+        with db_manager.request_scope() as db_scope:
+            recommendation = generate_smart_recommendation(user_message, conversation_history, request_id, thread_id)
         
         processing_time = time.time() - start_time
         logger.info(f"Request processed in {processing_time:.2f}s")
@@ -2836,6 +6464,7 @@ def generate():
             "thread_id": thread_id,
             "request_id": request_id,
             "processing_time": f"{processing_time:.2f}s",
+            "query_stats": db_scope.stats(),
             "timestamp": recommendation["timestamp"]
         })
     
@@ -2857,6 +6486,8 @@ def generate():
 def get_recommendation(recommendation_id):
     """Get formatted HTML for a specific recommendation"""
     try:
+        # A just-generated recommendation may still be in the write-behind queue
+        recommendation_writer.wait_for(recommendation_id)
         recommendation_data = db_manager.get_recommendation_data(recommendation_id)
         
         if not recommendation_data:
@@ -2905,11 +6536,20 @@ def get_alternatives():
         if not component_id:
             return jsonify({"success": False, "error": "Component ID is required"}), 400
         
-        original_component = db_manager.get_component_by_id(component_id)
-        if not original_component:
-            return jsonify({"success": False, "error": "Component not found"}), 404
-        
-        alternatives = db_manager.get_alternatives(component_id, price_range=3000)
+        # Fast path: catalogued components answer from the precomputed alternatives index
+        original_component = None
+        alternatives = None
+        if component_catalog.loaded and str(component_id).isdigit():
+            original_component = component_catalog.get(int(component_id))
+            if original_component:
+                alternatives = alternatives_index.lookup(int(component_id))
+        
+        if alternatives is None:
+            original_component = db_manager.get_component_by_id(component_id)
+            if not original_component:
+                return jsonify({"success": False, "error": "Component not found"}), 404
+            
+            alternatives = db_manager.get_alternatives(component_id, price_range=3000)
         
         compatible_alternatives = []
         # Ensure original_component price is float
@@ -2986,8 +6626,7 @@ def generate_title():
                 if word.lower() in component_types:
                     found_components.append(word.upper())
             
-            build_keywords = ["build", "setup", "pc", "computer", "gaming", "workstation"]
-            has_build_intent = any(keyword in cleaned_message.lower() for keyword in build_keywords)
+            has_build_intent = keyword_index.scan(cleaned_message.lower()).any("title_build_keywords")
             
             if has_build_intent and budget_text:
                 if found_components:
@@ -3031,4 +6670,7 @@ if __name__ == '__main__':
     logger.info(f"Database Status: {'Connected' if connection_pool else 'Disconnected'}")
     logger.info(f"Debug Mode: {debug_mode}")
     
+    # Turn SIGTERM into a normal exit so atexit flushes the recommendation write-behind queue
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
     app.run(host='0.0.0.0', port=port, debug=debug_mode)
\ No newline at end of file
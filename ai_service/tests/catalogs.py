@@ -0,0 +1,30 @@
+"""Small random catalogs of parts with compatibility specs, for the solver tests"""
+import random
+
+SOCKETS = ('AM4', 'AM5', 'LGA1700')
+MEMORY = ('DDR4', 'DDR5')
+FORM_FACTORS = ('ATX', 'Micro ATX', 'Mini ITX')
+
+
+def random_part(rng: random.Random, comp_type: str, index: int) -> dict:
+    if comp_type == 'cpu':
+        specs = {'socket': rng.choice(SOCKETS), 'tdp': rng.choice((65, 105, 125))}
+    elif comp_type == 'motherboard':
+        specs = {'socket': rng.choice(SOCKETS), 'memory_type': rng.choice(MEMORY),
+                 'form_factor': rng.choice(FORM_FACTORS)}
+    elif comp_type == 'ram':
+        specs = {'speed': [int(rng.choice(MEMORY)[-1]), 3200]}
+    elif comp_type == 'case':
+        specs = {'type': rng.choice(('ATX Mid Tower', 'MicroATX Mini Tower', 'Mini ITX Tower'))}
+    elif comp_type == 'psu':
+        specs = {'wattage': rng.choice((300, 450, 650))}
+    else:
+        specs = {'tdp': rng.choice((120, 200, 300))}
+    # Unique models: parts outside the catalog have their attributes cached by (type, model)
+    return {'id': index, 'type': comp_type, 'model': f'test {comp_type} {index} {specs}',
+            'specs': specs, 'price': float(rng.randint(1, 40) * 100)}
+
+
+def random_candidates(rng: random.Random, types=('cpu', 'motherboard', 'ram', 'case', 'psu', 'gpu')):
+    return {comp_type: [random_part(rng, comp_type, 100 * position + index) for index in range(rng.randint(1, 4))]
+            for position, comp_type in enumerate(types, start=1)}
@@ -0,0 +1,16 @@
+"""
+Tests import app.py directly. Background work that needs a database or writes under
+CACHE_DIR (catalog load, premade warmup, write-behind, SQLite caches) is switched off
+before the import; the solvers and parsers under test work on in-memory data.
+"""
+import os
+import sys
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for name in ('CATALOG_ENABLED', 'PREMADE_WARMUP', 'RECOMMENDATION_WRITE_BEHIND', 'SHARED_CACHE', 'TRANSLATION_CACHE'):
+    os.environ.setdefault(name, 'false')
+os.environ.setdefault('USE_LIGHTWEIGHT_MODEL', 'true')
+
+os.chdir(SERVICE_DIR)  # CACHE_DIR is relative, as when the service is started from here
+sys.path.insert(0, SERVICE_DIR)
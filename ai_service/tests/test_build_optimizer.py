@@ -0,0 +1,106 @@
+"""BuildOptimizer (multiple-choice knapsack DP) against brute force on small catalogs"""
+import itertools
+import random
+
+import pytest
+
+import app
+
+TYPES = ('cpu', 'gpu', 'ram')
+
+
+@pytest.fixture(autouse=True)
+def unscored_catalog(monkeypatch):
+    # Parts outside the catalog are valued at their price, which keeps the objective checkable
+    monkeypatch.setattr(app.component_catalog, 'values', {})
+
+
+def random_candidates(rng: random.Random):
+    return {
+        comp_type: [{'id': 1000 * position + index, 'type': comp_type, 'price': float(rng.randint(1, 60))}
+                    for index in range(rng.randint(1, 5))]
+        for position, comp_type in enumerate(TYPES, start=1)
+    }
+
+
+def objective(build, targets, deviation_weight):
+    return sum(part['price'] - deviation_weight * abs(part['price'] - targets[part['type']]) for part in build)
+
+
+def brute_force(candidates, max_budget, targets, deviation_weight):
+    best = None
+    for combination in itertools.product(*candidates.values()):
+        if sum(part['price'] for part in combination) <= max_budget:
+            value = objective(combination, targets, deviation_weight)
+            best = value if best is None else max(best, value)
+    return best
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_matches_brute_force(seed):
+    rng = random.Random(seed)
+    candidates = random_candidates(rng)
+    max_budget = rng.randint(10, 150)
+    targets = {comp_type: rng.randint(5, 50) for comp_type in TYPES}
+    # One peso per bucket with integer prices: the DP is exact
+    optimizer = app.BuildOptimizer(buckets=max_budget, deviation_weight=0.5)
+
+    build, stats = optimizer.solve(candidates, max_budget, targets)
+    expected = brute_force(candidates, max_budget, targets, 0.5)
+
+    assert stats['feasible'] == (expected is not None)
+    if expected is None:
+        assert build is None
+    else:
+        assert [part['type'] for part in build] == list(TYPES)
+        assert sum(part['price'] for part in build) <= max_budget
+        assert objective(build, targets, 0.5) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_partitions_match_best_separate_solve(seed):
+    rng = random.Random(seed)
+    candidates = random_candidates(rng)
+    partitions = [{'cpu': [dict(part) for part in random_candidates(rng)['cpu']]} for _ in range(3)]
+    max_budget = rng.randint(10, 150)
+    targets = {comp_type: rng.randint(5, 50) for comp_type in TYPES}
+    optimizer = app.BuildOptimizer(buckets=max_budget)
+
+    build, _ = optimizer.solve(candidates, max_budget, targets, partitions=partitions)
+    separate = [brute_force(dict(candidates, **partition), max_budget, targets, 0.5) for partition in partitions]
+    separate = [value for value in separate if value is not None]
+
+    if not separate:
+        assert build is None
+    else:
+        assert objective(build, targets, 0.5) == pytest.approx(max(separate))
+
+
+def test_coarse_buckets_never_exceed_budget():
+    rng = random.Random(7)
+    for _ in range(100):
+        candidates = {t: [{'id': index, 'type': t, 'price': rng.uniform(500, 20000)} for index in range(20)]
+                      for t in TYPES}
+        max_budget = rng.uniform(5000, 40000)
+        build, _ = app.BuildOptimizer(buckets=50).solve(candidates, max_budget)
+        if build is not None:
+            assert sum(part['price'] for part in build) <= max_budget
+
+
+def test_infeasible_budget():
+    candidates = {t: [{'id': 1, 'type': t, 'price': 100.0}] for t in TYPES}
+    build, stats = app.BuildOptimizer().solve(candidates, 250)
+    assert build is None and not stats['feasible']
+
+
+def test_candidates_are_not_modified():
+    from decimal import Decimal
+
+    candidates = {t: [{'id': index, 'type': t, 'price': Decimal(100 * index)} for index in range(1, 6)] for t in TYPES}
+    snapshot = {t: [dict(part) for part in parts] for t, parts in candidates.items()}
+
+    build, stats = app.BuildOptimizer().solve(candidates, 1200)
+
+    assert candidates == snapshot and all(isinstance(part['price'], Decimal) for part in candidates['cpu'])
+    assert all(isinstance(part['price'], float) for part in build)
+    assert stats['total'] == sum(part['price'] for part in build) <= 1200
@@ -0,0 +1,106 @@
+"""CatalogRefresher polling, tombstone deletes and pruning against an in-memory fake database"""
+from datetime import datetime
+
+import pytest
+
+import app
+
+
+class FakeDatabase:
+    """components and component_deletions tables, answering the refresher's few statements"""
+
+    def __init__(self, components, tombstones=()):
+        self.components = components
+        self.tombstones = list(tombstones)  # (id, component_id, age in seconds)
+        self.statements = []
+        self.commits = 0
+
+    def get_connection(self):
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self, dictionary=False):
+        return FakeCursor(self.db)
+
+    def commit(self):
+        self.db.commits += 1
+
+    def close(self):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rows = []
+        self.rowcount = 0
+
+    def execute(self, sql, params=()):
+        db = self.db
+        sql = ' '.join(sql.split())
+        db.statements.append((sql, params))
+        if sql.startswith('SELECT COALESCE(MAX(id), 0)'):
+            self.rows = [{'id': max((t[0] for t in db.tombstones), default=0)}]
+        elif sql.startswith('SELECT id, component_id FROM component_deletions'):
+            self.rows = [{'id': t[0], 'component_id': t[1]} for t in db.tombstones if t[0] > params[0]]
+        elif sql.startswith('DELETE FROM component_deletions'):
+            kept = [t for t in db.tombstones if t[2] <= params[0]]
+            self.rowcount = len(db.tombstones) - len(kept)
+            db.tombstones = kept
+        elif 'WHERE last_updated >=' in sql:
+            self.rows = [dict(row) for row in db.components if row['last_updated'] >= params[0]]
+        elif 'FROM components' in sql:
+            self.rows = [dict(row) for row in db.components]
+        else:
+            raise AssertionError(f'unexpected statement: {sql}')
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+def component(component_id, price, updated=datetime(2026, 1, 1)):
+    return {'id': component_id, 'type': 'cpu', 'brand': 'AMD', 'model': f'Ryzen {component_id}', 'price': price,
+            'currency': 'PHP', 'image_url': None, 'source_url': None, 'last_updated': updated, 'specs': None}
+
+
+@pytest.fixture
+def refresher():
+    db = FakeDatabase([component(1, 5000.0), component(2, 9000.0), component(3, 12000.0)],
+                      tombstones=[(1, 90, 200000), (2, 91, 10)])
+    return app.CatalogRefresher(app.ComponentCatalog(), db, interval=60, reconcile_interval=3600,
+                                tombstone_retention=86400)
+
+
+def test_reload_returns_rows_and_prunes_old_tombstones(refresher):
+    db = refresher.db
+    assert refresher.refresh() == 3  # first poll reloads: every row counts as applied
+    assert refresher.tombstone_cursor == 2
+    assert [t[0] for t in db.tombstones] == [2]  # 200000 s old is past the one-day retention
+    assert db.commits == 1
+
+
+def test_retention_covers_a_reconcile_cycle():
+    refresher = app.CatalogRefresher(app.ComponentCatalog(), FakeDatabase([]), interval=60,
+                                     reconcile_interval=21600, tombstone_retention=600)
+    assert refresher.tombstone_retention == 21660
+
+
+def test_polls_apply_changes_and_tombstones(refresher):
+    db = refresher.db
+    refresher.refresh()
+
+    db.components[0] = component(1, 4500.0, updated=datetime(2026, 1, 2))
+    db.tombstones.append((3, 2, 0))
+    db.components.pop(1)
+
+    assert refresher.refresh() == 1
+    assert refresher.last_removed == 1 and refresher.tombstone_cursor == 3
+    assert sorted(refresher.catalog.rows) == [1, 3]
+    assert refresher.catalog.get(1)['price'] == 4500.0
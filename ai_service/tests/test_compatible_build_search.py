@@ -0,0 +1,120 @@
+"""CompatibleBuildSearch (branch and bound) against brute force on small catalogs"""
+import itertools
+import random
+
+import pytest
+
+import app
+from catalogs import random_candidates, random_part
+
+
+def brute_force(checker, candidates, target_cost, max_budget):
+    best = None
+    for combination in itertools.product(*candidates.values()):
+        total = sum(part['price'] for part in combination)
+        if total <= max_budget and checker.check_compatibility(list(combination))[0]:
+            diff = abs(total - target_cost)
+            best = diff if best is None else min(best, diff)
+    return best
+
+
+@pytest.mark.parametrize('seed', range(150))
+def test_matches_brute_force(seed):
+    rng = random.Random(seed)
+    checker = app.ComponentCompatibilityChecker()
+    candidates = random_candidates(rng)
+    max_budget = float(rng.randint(30, 200) * 100)
+    target_cost = max_budget * rng.uniform(0.7, 1.0)
+
+    search = app.CompatibleBuildSearch(checker)
+    build = search.search(candidates, target_cost, max_budget, deadline=30)
+    expected = brute_force(checker, candidates, target_cost, max_budget)
+
+    assert search.stats['complete']
+    if expected is None:
+        assert build is None
+    else:
+        total = sum(part['price'] for part in build)
+        assert [part['type'] for part in build] == list(candidates)
+        assert total <= max_budget
+        assert checker.check_compatibility(build)[0]
+        assert abs(total - target_cost) == pytest.approx(expected)
+
+
+def test_tolerance_stops_at_first_close_build():
+    rng = random.Random(3)
+    checker = app.ComponentCompatibilityChecker()
+    candidates = random_candidates(rng, types=('cpu', 'gpu'))
+    search = app.CompatibleBuildSearch(checker)
+    build = search.search(candidates, 1e9, 1e9, tolerance=1e9)
+    assert build is not None and search.stats['solutions'] == 1
+
+
+def test_node_limit_returns_best_so_far():
+    rng = random.Random(5)
+    checker = app.ComponentCompatibilityChecker()
+    candidates = {comp_type: [random_part(rng, comp_type, 100 * position + index) for index in range(8)]
+                  for position, comp_type in enumerate(('cpu', 'gpu', 'psu', 'case'), start=1)}
+    search = app.CompatibleBuildSearch(checker)
+    search.search(candidates, 6000, 1e9, max_nodes=10)
+    assert search.stats['timed_out'] and not search.stats['complete']
+
+
+class FakePool:
+    """search_components over fixed per-type lists, as CandidatePool answers it"""
+
+    def __init__(self, candidates):
+        self.candidates = candidates
+
+    def search_components(self, component_type, min_price=None, max_price=None, limit=50, **kwargs):
+        return [dict(part) for part in self.candidates.get(component_type, [])
+                if (min_price is None or part['price'] >= min_price)
+                and (max_price is None or part['price'] <= max_price)][:limit]
+
+
+def solver_for(types):
+    generator = app.BudgetAwareBuildGenerator()
+    generator.essential_components = list(types)
+    return generator
+
+
+def test_solver_repairs_psu_wattage(monkeypatch):
+    # The unconstrained optimum pairs the dearest CPU and GPU with the cheap 300 W PSU; the PSU
+    # survives propagation because the coolest CPU and GPU do fit it, and no motherboard class fixes it
+    monkeypatch.setattr(app.component_catalog, 'values', {})
+    candidates = {
+        'cpu': [{'id': 1, 'type': 'cpu', 'model': 'test cpu hot', 'specs': {'tdp': 125}, 'price': 900.0},
+                {'id': 6, 'type': 'cpu', 'model': 'test cpu cool', 'specs': {'tdp': 65}, 'price': 250.0}],
+        'gpu': [{'id': 2, 'type': 'gpu', 'model': 'test gpu hot', 'specs': {'tdp': 300}, 'price': 900.0},
+                {'id': 3, 'type': 'gpu', 'model': 'test gpu cool', 'specs': {'tdp': 120}, 'price': 500.0}],
+        'psu': [{'id': 4, 'type': 'psu', 'model': 'test psu small', 'specs': {'wattage': 300}, 'price': 100.0},
+                {'id': 5, 'type': 'psu', 'model': 'test psu big', 'specs': {'wattage': 650}, 'price': 700.0}],
+    }
+    allocations = {'cpu': 1000.0, 'gpu': 1000.0, 'psu': 400.0}
+    generator = solver_for(candidates)
+
+    optimum, _ = app.BuildOptimizer().solve(candidates, 2000, allocations)
+    assert {part['id'] for part in optimum} == {1, 2, 4}
+
+    build = generator._solve_build(allocations, 2000, FakePool(candidates))
+
+    assert generator.compatibility_checker.check_compatibility(build)[0]
+    assert {part['id'] for part in build} == {6, 2, 5}
+
+
+@pytest.mark.parametrize('seed', range(60))
+def test_solver_never_returns_incompatible_build(seed, monkeypatch):
+    monkeypatch.setattr(app.component_catalog, 'values', {})
+    rng = random.Random(seed)
+    candidates = random_candidates(rng)
+    max_budget = float(rng.randint(30, 200) * 100)
+    allocations = {comp_type: 100.0 for comp_type in candidates}
+    generator = solver_for(candidates)
+
+    build = generator._solve_build(allocations, max_budget, FakePool(candidates))
+    expected = brute_force(generator.compatibility_checker, candidates, max_budget, max_budget)
+
+    if build is not None:
+        assert generator.compatibility_checker.check_compatibility(build)[0]
+        assert sum(part['price'] for part in build) <= max_budget
+    assert (build is None) == (expected is None)
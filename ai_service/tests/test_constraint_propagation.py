@@ -0,0 +1,82 @@
+"""ComponentCompatibilityChecker.narrow (constraint propagation) against unpruned search"""
+import itertools
+import random
+
+import pytest
+
+import app
+from catalogs import random_candidates
+
+
+def compatible_builds(checker, pools):
+    return {tuple(part['id'] for part in combination)
+            for combination in itertools.product(*pools.values())
+            if checker.check_compatibility(list(combination))[0]}
+
+
+@pytest.mark.parametrize('seed', range(100))
+def test_keeps_every_compatible_build(seed):
+    rng = random.Random(seed)
+    checker = app.ComponentCompatibilityChecker()
+    pools = random_candidates(rng)
+
+    narrowed = checker.narrow(pools)
+
+    assert list(narrowed) == list(pools)
+    for comp_type, pool in narrowed.items():
+        assert all(part in pools[comp_type] for part in pool)
+    assert compatible_builds(checker, narrowed) == compatible_builds(checker, pools)
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_anchored_board(seed):
+    rng = random.Random(seed)
+    checker = app.ComponentCompatibilityChecker()
+    pools = random_candidates(rng)
+    board = pools['motherboard'][0]
+
+    narrowed = checker.narrow(pools, anchors={'motherboard': board})
+
+    assert narrowed['motherboard'] == [board]
+    anchored = dict(pools, motherboard=[board])
+    assert compatible_builds(checker, narrowed) == compatible_builds(checker, anchored)
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_search_over_narrowed_pools_finds_the_same_optimum(seed):
+    rng = random.Random(seed)
+    checker = app.ComponentCompatibilityChecker()
+    pools = random_candidates(rng)
+    max_budget = float(rng.randint(30, 200) * 100)
+    target_cost = max_budget * 0.9
+
+    full = app.CompatibleBuildSearch(checker)
+    best = full.search(pools, target_cost, max_budget, deadline=30)
+    narrowed = checker.narrow(pools)
+
+    if not all(narrowed.values()):
+        # An emptied pool proves no compatible build exists
+        assert best is None
+        return
+    pruned = app.CompatibleBuildSearch(checker)
+    pruned.search(narrowed, target_cost, max_budget, deadline=30)
+    assert pruned.stats['best_diff'] == full.stats['best_diff']
+
+
+def test_prunes_unsupported_parts():
+    checker = app.ComponentCompatibilityChecker()
+    board = {'id': 1, 'type': 'motherboard', 'model': 'test am5 board', 'price': 100.0,
+             'specs': {'socket': 'AM5', 'memory_type': 'DDR5', 'form_factor': 'ATX'}}
+    am4 = {'id': 2, 'type': 'cpu', 'model': 'test am4 cpu', 'specs': {'socket': 'AM4'}, 'price': 100.0}
+    am5 = {'id': 3, 'type': 'cpu', 'model': 'test am5 cpu', 'specs': {'socket': 'AM5'}, 'price': 100.0}
+    ddr4 = {'id': 4, 'type': 'ram', 'model': 'test ddr4 kit', 'specs': {'speed': [4, 3200]}, 'price': 100.0}
+    ddr5 = {'id': 5, 'type': 'ram', 'model': 'test ddr5 kit', 'specs': {'speed': [5, 6000]}, 'price': 100.0}
+
+    narrowed = checker.narrow({'motherboard': [board], 'cpu': [am4, am5], 'ram': [ddr4, ddr5]})
+
+    assert narrowed == {'motherboard': [board], 'cpu': [am5], 'ram': [ddr5]}
+    assert checker.last_propagation['cpu'] == (2, 1)
+
+    # Without a RAM kit the board takes, the board goes and takes the CPUs with it
+    narrowed = checker.narrow({'motherboard': [board], 'cpu': [am4, am5], 'ram': [ddr4]})
+    assert narrowed == {'motherboard': [], 'cpu': [], 'ram': []}
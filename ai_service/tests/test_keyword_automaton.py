@@ -0,0 +1,76 @@
+"""KeywordAutomaton / KeywordIndex (Aho-Corasick) against plain substring scans"""
+import random
+
+import pytest
+
+import app
+
+PATTERNS = dict({category: keywords for category, keywords in app.ENHANCED_KEYWORD_PATTERNS.items()
+                 if category != "price_indicators"}, **app.MESSAGE_KEYWORD_PATTERNS)
+
+
+def all_keywords():
+    for keywords in PATTERNS.values():
+        for words in (keywords.values() if isinstance(keywords, dict) else [keywords]):
+            yield from words
+
+
+def random_message(rng: random.Random, vocabulary) -> str:
+    parts = []
+    for _ in range(rng.randint(1, 10)):
+        choice = rng.random()
+        if choice < 0.5:
+            word = rng.choice(vocabulary)
+            # Cut keywords apart and glue them together so partial and overlapping matches occur
+            parts.append(word[rng.randint(0, len(word) // 2):] if rng.random() < 0.3 else word)
+        elif choice < 0.8:
+            parts.append(str(rng.randint(1, 99999)) + rng.choice(['', 'k', ' pesos', ' php']))
+        else:
+            parts.append(''.join(rng.choice('abcdeiklmnoprstu -') for _ in range(rng.randint(1, 8))))
+    return rng.choice([' ', '', ', ']).join(parts)
+
+
+def test_textbook_overlaps():
+    automaton = app.KeywordAutomaton(['he', 'she', 'his', 'hers'])
+    assert automaton.scan('ushers') == {'he', 'she', 'hers'}
+    assert automaton.scan('ahishers') == {'he', 'she', 'his', 'hers'}
+    assert automaton.scan('') == set()
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_automaton_matches_substring_scan(seed):
+    rng = random.Random(seed)
+    vocabulary = sorted(set(all_keywords()))
+    automaton = app.KeywordAutomaton(vocabulary)
+    for _ in range(300):
+        text = random_message(rng, vocabulary)
+        assert automaton.scan(text) == {keyword for keyword in vocabulary if keyword in text}, text
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_index_matches_per_list_scans(seed):
+    rng = random.Random(seed)
+    vocabulary = sorted(set(all_keywords()))
+    index = app.KeywordIndex(PATTERNS)
+    for _ in range(200):
+        text = random_message(rng, vocabulary)
+        matches = index.scan(text)
+        for category, keywords in PATTERNS.items():
+            if isinstance(keywords, dict):
+                expected_groups = [group for group, words in keywords.items() if any(w in text for w in words)]
+                assert matches.groups(category) == expected_groups, (text, category)
+                for group, words in keywords.items():
+                    assert matches.count(category, group) == len({w for w in words if w in text}), (text, group)
+            else:
+                found = [word for word in keywords if word in text]
+                assert matches.any(category) == bool(found), (text, category)
+                assert matches.first(category) == (found[0] if found else None), (text, category)
+
+
+def test_index_lru_is_bounded():
+    index = app.KeywordIndex(PATTERNS, max_entries=2)
+    for text in ('gaming pc', 'rtx 4060', 'office build'):
+        index.scan(text)
+    assert list(index.scans) == ['rtx 4060', 'office build']
+    assert index.scan('rtx 4060') is index.scan('rtx 4060')
+    assert index.stats()['hits'] == 2
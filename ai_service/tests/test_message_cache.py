@@ -0,0 +1,89 @@
+"""normalize_message, the MessageCache LRU and the caches keyed by it"""
+import pytest
+
+import app
+
+
+@pytest.mark.parametrize('message, expected', [
+    ('Gaming PC 50 K', 'gaming pc 50k'),
+    ('gaming pc 50k', 'gaming pc 50k'),
+    ('  gaming\tpc\n\n50K  ', 'gaming pc 50k'),
+    ('budget 30 k php', 'budget 30k php'),
+    ('50 kilos', '50 kilos'),  # only a standalone k is the thousands suffix
+    ('4k gaming', '4k gaming'),
+    ('RTX 4060,   52,192', 'rtx 4060, 52,192'),  # commas are kept: they decide specific-model detection
+])
+def test_normalize_message(message, expected):
+    assert app.normalize_message(message) == expected
+
+
+def test_lru_bound_and_eviction():
+    cache = app.MessageCache(max_entries=2, max_chars=100)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # a is now the most recent
+    cache.put('c', 3)
+
+    assert cache.get('b') is app.MessageCache.MISSING
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert list(cache.entries) == ['a', 'c']
+    assert cache.stats() == {'entries': 2, 'hits': 3, 'misses': 1, 'hit_rate': 0.75}
+
+
+def test_long_messages_and_disabled_cache_are_not_stored():
+    cache = app.MessageCache(max_entries=4, max_chars=5)
+    cache.put('123456', 'long')
+    assert cache.get('123456') is app.MessageCache.MISSING
+
+    disabled = app.MessageCache(max_entries=0)
+    disabled.put('a', 1)
+    assert disabled.get('a') is app.MessageCache.MISSING
+
+
+def test_none_is_a_cached_value():
+    cache = app.MessageCache(max_entries=4)
+    cache.put('hello', None)
+    assert cache.get('hello') is None
+
+
+def test_parse_query_variants_share_one_parse():
+    parser = app.SmartQueryParser()
+    first = parser.parse_query('Gaming PC  50 K')
+    second = parser.parse_query('gaming pc 50k')
+
+    assert parser.cache.stats()['hits'] == 1
+    assert first['original_query'] == 'Gaming PC  50 K'
+    assert second['original_query'] == 'gaming pc 50k'
+    assert first['price_constraints'] == second['price_constraints']
+    # Each caller gets its own copy
+    first['price_constraints']['max_price'] = 1
+    first['performance_needs'].append('changed')
+    assert parser.parse_query('gaming pc 50k')['performance_needs'] == second['performance_needs']
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, text):
+        self.text = text
+
+    def json(self):
+        return {'responseData': {'translatedText': f'translated: {self.text}'}, 'responseStatus': 200}
+
+
+def test_translation_is_requested_for_the_cache_key(monkeypatch):
+    requested = []
+
+    def fake_get(url, params=None, timeout=None):
+        requested.append(params['q'])
+        return FakeResponse(params['q'])
+
+    monkeypatch.setattr(app.requests, 'get', fake_get)
+    # No offline translation: every miss goes to the API
+    translator = app.TagalogTranslator(store=None, min_coverage=2.0)
+
+    first = translator.translate_to_english('Kailangan ko ng  PC para sa opisina 50 K')
+    second = translator.translate_to_english('kailangan ko ng pc para sa opisina 50k')
+
+    assert requested == ['kailangan ko ng pc para sa opisina 50k']
+    assert first == second
@@ -0,0 +1,61 @@
+"""ModelSearchIndex incremental refresh against a from-scratch build"""
+import copy
+import random
+from datetime import datetime
+
+import pytest
+
+import app
+
+BRANDS = ('AMD', 'Intel', 'NVIDIA', 'ASUS', 'MSI', 'Gigabyte')
+WORDS = ('ryzen', 'core', 'rtx', 'radeon', 'rog', 'strix', 'gaming', 'x', 'ti', 'super', 'oc', 'pro')
+
+
+def random_row(rng, component_id, updated):
+    model = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 3))) + f' {rng.randint(1000, 9999)}'
+    return {'id': component_id, 'type': rng.choice(('cpu', 'gpu')), 'brand': rng.choice(BRANDS), 'model': model,
+            'price': float(rng.randint(10, 500) * 100), 'currency': 'PHP', 'image_url': None, 'source_url': None,
+            'last_updated': updated, 'specs': None}
+
+
+def contents(postings):
+    return {name: getattr(postings, name) for name in
+            ('tokens', 'trigrams', 'model_words', 'lengths', 'texts', 'models', 'brands', 'total_length')}
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_incremental_refresh_matches_a_full_build(seed):
+    rng = random.Random(seed)
+    catalog = app.ComponentCatalog()
+    catalog.load_rows([random_row(rng, component_id, datetime(2026, 1, 1)) for component_id in range(1, 80)])
+    index = app.ModelSearchIndex(catalog)
+    assert index.refresh() == 79
+    published = index.postings
+    before = copy.deepcopy(contents(published))
+
+    changed = [random_row(rng, component_id, datetime(2026, 1, 2))
+               for component_id in rng.sample(range(1, 80), 15) + list(range(80, 90))]
+    catalog.apply_changes(changed)
+    catalog.remove(rng.sample(range(1, 80), 10))
+
+    assert 0 < index.refresh() <= 25
+    assert contents(published) == before  # searches holding the old postings never see a change
+    rebuilt = app.ModelSearchIndex(catalog)
+    rebuilt.refresh()
+    assert contents(index.postings) == contents(rebuilt.postings)
+    for query in ('ryzen', 'rtx ti', 'strix gaming', 'radon'):
+        assert index.search(query) == rebuilt.search(query)
+    assert index.refresh() == 0
+
+
+def test_searches_do_not_rebuild_after_the_first_build():
+    rng = random.Random(1)
+    catalog = app.ComponentCatalog()
+    catalog.load_rows([random_row(rng, component_id, datetime(2026, 1, 1)) for component_id in range(1, 10)])
+    index = app.ModelSearchIndex(catalog)
+    index.search('ryzen')  # nothing published yet: built here
+    version = index.version
+
+    catalog.apply_changes([random_row(rng, 50, datetime(2026, 1, 2))])
+    index.search('ryzen')
+    assert index.version == version != catalog.version  # left to the refresher
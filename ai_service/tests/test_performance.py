@@ -0,0 +1,182 @@
+"""Component performance scores, the catalog's price-equivalent values and the upgrades they rank"""
+import json
+import os
+import random
+
+import numpy as np
+import pytest
+
+import app
+
+VIDEO_CARDS = os.path.join(os.path.dirname(app.__file__), '..', 'scripts', 'pcpartpicker_json', 'video-card.json')
+
+# Chipsets from the parts listings, weakest first within each line-up
+GPU_LINEUPS = [
+    ['GeForce RTX 4060', 'GeForce RTX 4060 Ti', 'GeForce RTX 4070', 'GeForce RTX 4070 SUPER',
+     'GeForce RTX 4070 Ti', 'GeForce RTX 4070 Ti SUPER', 'GeForce RTX 4080', 'GeForce RTX 4080 SUPER',
+     'GeForce RTX 4090'],
+    ['GeForce RTX 5060', 'GeForce RTX 5060 Ti', 'GeForce RTX 5070', 'GeForce RTX 5070 Ti', 'GeForce RTX 5080',
+     'GeForce RTX 5090'],
+    ['Radeon RX 6500 XT', 'Radeon RX 6600', 'Radeon RX 6600 XT', 'Radeon RX 6650 XT', 'Radeon RX 6700 XT',
+     'Radeon RX 6750 XT', 'Radeon RX 6800', 'Radeon RX 6800 XT', 'Radeon RX 6900 XT'],
+    ['Radeon RX 7600', 'Radeon RX 7700 XT', 'Radeon RX 7800 XT', 'Radeon RX 7900 GRE', 'Radeon RX 7900 XT',
+     'Radeon RX 7900 XTX'],
+    ['Radeon RX 9060 XT', 'Radeon RX 9070', 'Radeon RX 9070 XT'],
+    ['Arc A380', 'Arc A580', 'Arc A750'],
+]
+
+# (weaker, stronger) across generations and vendors
+GPU_PAIRS = [
+    ('Radeon RX 6500 XT', 'Radeon RX 9060 XT'),
+    ('Radeon RX 7800 XT', 'Radeon RX 9070 XT'),
+    ('Radeon RX 6600', 'Radeon RX 9060 XT'),
+    ('Radeon RX 570', 'Radeon RX 6600'),
+    ('GeForce GTX 980 Ti', 'GeForce RTX 4060'),
+    ('GeForce RTX 3050 8GB', 'GeForce RTX 4060'),
+    ('GeForce RTX 4070', 'GeForce RTX 5070'),
+    ('Arc A580', 'Arc B580'),
+]
+
+
+@pytest.mark.parametrize('lineup', GPU_LINEUPS, ids=lambda lineup: lineup[0])
+def test_gpu_tier_orders_each_lineup(lineup):
+    tiers = [app._gpu_tier(chipset) for chipset in lineup]
+    assert all(tier > 0 for tier in tiers)
+    assert tiers == sorted(tiers) and len(set(tiers)) == len(tiers)
+
+
+@pytest.mark.parametrize('weaker, stronger', GPU_PAIRS)
+def test_gpu_tier_across_generations(weaker, stronger):
+    assert 0 < app._gpu_tier(weaker) < app._gpu_tier(stronger)
+
+
+def test_every_consumer_chipset_in_the_listings_is_scored():
+    with open(VIDEO_CARDS) as f:
+        chipsets = {card['chipset'] for card in json.load(f)}
+    consumer = {chipset for chipset in chipsets
+                if any(line in chipset for line in ('GeForce RTX', 'Radeon RX ', 'Arc '))
+                and 'VEGA' not in chipset}
+    assert consumer and all(app._gpu_tier(chipset) > 0 for chipset in consumer)
+
+
+@pytest.mark.parametrize('chipset', ['Radeon VII', 'GeForce GTX Titan X', 'RTX A2000 12GB', 'Radeon PRO W7900', ''])
+def test_unknown_gpus_are_unscored(chipset):
+    assert app._gpu_tier(chipset) == 0.0
+
+
+# (type, weaker specs, stronger specs), as listed
+SPEC_PAIRS = [
+    ('cpu', {'core_count': 6, 'boost_clock': 4.4, 'core_clock': 3.5},  # Ryzen 5 5600
+     {'core_count': 8, 'boost_clock': 5.2, 'core_clock': 4.7}),  # Ryzen 7 9800X3D
+    ('cpu', {'core_count': 6, 'boost_clock': 4.4, 'core_clock': 2.5},  # Core i5-12400F
+     {'core_count': 24, 'boost_clock': 6.0, 'core_clock': 3.2}),  # Core i9-14900K
+    ('gpu', {'chipset': 'GeForce RTX 4060', 'memory': 8}, {'chipset': 'GeForce RTX 4060 Ti', 'memory': 16}),
+    ('gpu', {'chipset': 'Radeon RX 6600', 'memory': 8}, {'chipset': 'Radeon RX 9070 XT', 'memory': 16}),
+    ('ram', {'speed': [4, 3200], 'modules': [2, 8], 'cas_latency': 16, 'first_word_latency': 10.0},
+     {'speed': [5, 6000], 'modules': [2, 16], 'cas_latency': 30, 'first_word_latency': 10.0}),
+    ('ram', {'speed': [5, 6000], 'modules': [2, 16], 'cas_latency': 36, 'first_word_latency': 12.0},
+     {'speed': [5, 6000], 'modules': [2, 16], 'cas_latency': 30, 'first_word_latency': 10.0}),
+    ('storage', {'capacity': 2000.0, 'interface': 'SATA 6.0 Gb/s', 'form_factor': 3.5},
+     {'capacity': 2000.0, 'interface': 'M.2 PCIe 4.0 X4', 'form_factor': 'M.2-2280'}),
+    ('storage', {'capacity': 2000.0, 'interface': 'M.2 PCIe 4.0 X4', 'form_factor': 'M.2-2280'},
+     {'capacity': 4000.0, 'interface': 'M.2 PCIe 5.0 X4', 'form_factor': 'M.2-2280'}),
+    ('psu', {'wattage': 650, 'efficiency': 'bronze', 'modular': False},
+     {'wattage': 650, 'efficiency': 'gold', 'modular': 'Full'}),
+    ('psu', {'wattage': 750, 'efficiency': 'gold', 'modular': 'Full'},
+     {'wattage': 850, 'efficiency': 'gold', 'modular': 'Full'}),
+]
+
+
+@pytest.mark.parametrize('comp_type, weaker, stronger', SPEC_PAIRS)
+def test_component_performance_orders_listed_specs(comp_type, weaker, stronger):
+    assert 0 < app.component_performance(comp_type, '', weaker) < app.component_performance(comp_type, '', stronger)
+
+
+@pytest.mark.parametrize('comp_type, specs', [
+    ('cpu', {'core_count': 8}),
+    ('gpu', {'chipset': 'Radeon VII', 'memory': 16}),
+    ('storage', {'interface': 'SATA 6.0 Gb/s'}),
+    ('case', {'type': 'ATX Mid Tower'}),
+])
+def test_component_performance_is_zero_without_the_specs(comp_type, specs):
+    assert app.component_performance(comp_type, '', specs) == 0.0
+
+
+def test_ram_capacity_from_the_model_name():
+    assert app.component_performance('ram', 'Corsair Vengeance LPX 16 GB', {}) == pytest.approx(4.0)
+
+
+def scored_catalog(seed, count=40):
+    rng = random.Random(seed)
+    scores = np.array([rng.uniform(1, 20) for _ in range(count)])
+    prices = np.array([score ** 1.5 * 100 * rng.uniform(0.7, 1.4) for score in scores])
+    return prices, scores
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_value_fit_is_monotonic_in_score(seed, monkeypatch):
+    prices, scores = scored_catalog(seed)
+    monkeypatch.setattr(app, 'PERFORMANCE_VALUE_CLIP', 1e9)  # the fit itself, unclipped
+    values = app.performance_values(prices, scores)
+    assert np.all(np.diff(values[np.argsort(scores)]) >= 0)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_values_stay_within_the_clip(seed):
+    prices, scores = scored_catalog(seed)
+    values = app.performance_values(prices, scores)
+    clip = app.PERFORMANCE_VALUE_CLIP
+    assert np.all(values >= prices / clip - 1e-9) and np.all(values <= prices * clip + 1e-9)
+
+
+def test_unscored_parts_and_unusable_fits_are_valued_at_price():
+    prices, scores = scored_catalog(0)
+    scores[:5] = 0
+    values = app.performance_values(prices, scores)
+    assert np.array_equal(values[:5], prices[:5])
+
+    few = app.PERFORMANCE_MIN_SAMPLES - 1
+    assert np.array_equal(app.performance_values(prices[:few], scores[:few]), prices[:few])
+
+    prices, scores = scored_catalog(0)
+    inverted = app.performance_values(prices, scores.max() + 1 - scores)  # dearer parts score lower
+    assert np.array_equal(inverted, prices)
+
+
+def gpu(component_id, chipset, price, tdp=200):
+    return {'id': component_id, 'type': 'gpu', 'model': chipset, 'price': price,
+            'specs': {'chipset': chipset, 'tdp': tdp}}
+
+
+@pytest.fixture
+def catalog_values(monkeypatch):
+    values = {}
+    monkeypatch.setattr(app.component_catalog, 'values', values)
+    return values
+
+
+def test_best_upgrade_takes_the_most_performance_within_spare(catalog_values):
+    current = gpu(1, 'Radeon RX 6600', 12000.0)
+    psu = {'id': 9, 'type': 'psu', 'model': 'test psu', 'price': 3000.0, 'specs': {'wattage': 550}}
+    candidates = [gpu(2, 'Radeon RX 7600', 15000.0), gpu(3, 'Radeon RX 9060 XT', 20000.0),
+                  gpu(4, 'Radeon RX 9070 XT', 38000.0), gpu(5, 'GeForce RTX 5090', 24000.0, tdp=575),
+                  gpu(6, 'Radeon RX 6500 XT', 13000.0)]
+    catalog_values.update({1: 12000.0, 2: 14000.0, 3: 26000.0, 4: 45000.0, 5: 90000.0, 6: 8000.0})
+    state = app.BuildState([current, psu], app.ComponentCompatibilityChecker())
+
+    # 38000 is over the spare and the 5090 draws too much for the 550 W PSU
+    assert state.best_upgrade('gpu', candidates, 15000)['id'] == 3
+    assert state.best_upgrade('gpu', candidates, 30000)['id'] == 4
+    assert state.best_upgrade('gpu', [gpu(6, 'Radeon RX 6500 XT', 13000.0)], 15000) is None
+
+
+def test_suggest_upgrades_ranks_by_performance_per_peso(catalog_values, monkeypatch):
+    options = [gpu(2, 'Radeon RX 7600', 15000.0), gpu(3, 'Radeon RX 9060 XT', 17000.0),
+               gpu(4, 'GeForce RTX 4060', 16000.0), gpu(5, 'Radeon RX 6600 XT', 14500.0)]
+    catalog_values.update({1: 12000.0, 2: 18000.0, 3: 25500.0, 4: 19200.0, 5: 11000.0})
+    monkeypatch.setattr(app.db_manager, 'search_components', lambda **kwargs: [dict(option) for option in options])
+
+    suggestions = app.UpgradeSuggestionSystem().suggest_upgrades({'gpu': gpu(1, 'Radeon RX 6600', 12000.0)}, ['gpu'])
+
+    # 25500 / 17000 = 1.5, 18000 / 15000 = 1.2, 19200 / 16000 = 1.2 (cheaper first); the 6600 XT is no upgrade
+    assert [option['id'] for option in suggestions['gpu']['upgrade_options']] == [3, 2, 4]
@@ -0,0 +1,128 @@
+"""Catalog change log and the premade table updates it drives"""
+import random
+from datetime import datetime
+
+import pytest
+
+import app
+
+TYPES = ('cpu', 'motherboard', 'ram', 'storage', 'psu', 'case', 'gpu', 'monitor')
+
+
+def row(component_id, comp_type, price, updated=datetime(2026, 1, 1)):
+    return {'id': component_id, 'type': comp_type, 'brand': 'Brand', 'model': f'{comp_type} {component_id}',
+            'price': price, 'currency': 'PHP', 'image_url': None, 'source_url': None,
+            'last_updated': updated, 'specs': None}
+
+
+def random_catalog(seed, count=120):
+    rng = random.Random(seed)
+    catalog = app.ComponentCatalog()
+    catalog.load_rows([row(component_id, rng.choice(TYPES), float(rng.randint(5, 900) * 100))
+                       for component_id in range(1, count + 1)])
+    return catalog
+
+
+def test_changes_since_reports_old_and_new_prices():
+    catalog = random_catalog(0)
+    version = catalog.version
+    assert catalog.changes_since(version) == {}
+
+    old_price = catalog.get(1)['price']
+    catalog.apply_changes([row(1, catalog.get(1)['type'], 123456.0, updated=datetime(2026, 1, 2)),
+                           row(500, 'gpu', 7000.0, updated=datetime(2026, 1, 2))])
+    removed = catalog.get(2)
+    catalog.remove([2])
+
+    changes = catalog.changes_since(version)
+    assert changes['gpu'][0] <= 7000.0 <= changes['gpu'][1]
+    low, high = changes[catalog.get(1)['type']]
+    assert low <= old_price and high >= 123456.0
+    low, high = changes[removed['type']]
+    assert low <= removed['price'] <= high
+    assert set(changes) == {'gpu', catalog.get(1)['type'], removed['type']}
+
+
+def test_changes_since_gives_up_past_a_reload_or_the_log():
+    catalog = random_catalog(0)
+    version = catalog.version
+    catalog.load_rows([row(1, 'cpu', 5000.0)])
+    assert catalog.changes_since(version) is None
+    assert catalog.changes_since(catalog.version - 1) is None  # the load itself
+
+    version = catalog.version
+    for price in range(catalog.changes.maxlen + 1):
+        catalog.apply_changes([row(1, 'cpu', 6000.0 + price)])
+    assert catalog.changes_since(version) is None
+    assert catalog.changes_since(catalog.version - 1) == {'cpu': (6000.0 + price - 1, 6000.0 + price)}
+    assert catalog.changes_since('components-version') is None
+
+
+@pytest.fixture
+def warmup(monkeypatch, tmp_path):
+    """Warmup over a random catalog; a "build" lists the parts inside its candidate windows"""
+    catalog = random_catalog(1)
+    generator = app.PremadeBuildGenerator()
+    generator.budget_tiers = [20000, 50000, 100000, 200000]
+    computed = []
+
+    def generate(target_budget, performance_needs, candidate_pool=None):
+        computed.append(target_budget)
+        windows = generator._candidate_windows(app.BudgetAwareBuildGenerator(), target_budget, performance_needs)
+        parts = [component_id for component_id, packed in sorted(catalog.rows.items())
+                 if packed[1] in windows and windows[packed[1]][0] <= packed[4] <= windows[packed[1]][1]]
+        return {'parts': parts}
+
+    monkeypatch.setattr(generator, '_generate_premade_build', generate)
+    monkeypatch.setattr(generator, 'catalog_version', lambda: catalog.version)
+    warmup = app.PremadeBuildWarmup(generator, catalog, tmp_path / 'premade_builds.json')
+    warmup.computed = computed
+    return warmup
+
+
+def fresh_table(warmup, tmp_path):
+    rebuilt = app.PremadeBuildWarmup(warmup.generator, warmup.catalog, tmp_path / 'rebuilt.json')
+    rebuilt.warm()
+    return rebuilt
+
+
+def test_changes_outside_every_window_recompute_nothing(warmup, tmp_path):
+    warmup.warm()
+    table = warmup.table
+    warmup.computed.clear()
+
+    warmup.catalog.apply_changes([row(900, 'gpu', 30000.0), row(901, 'monitor', 9000.0)])
+    warmup.on_catalog_change()
+    assert warmup.computed == [] and warmup.table == table
+    assert warmup.version == warmup.catalog.version
+    assert warmup.fingerprint_value == fresh_table(warmup, tmp_path).fingerprint_value
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_update_matches_a_full_warm(warmup, tmp_path, seed):
+    rng = random.Random(seed)
+    warmup.warm()
+    for _ in range(3):
+        warmup.computed.clear()
+        changed = [row(component_id, rng.choice(TYPES), float(rng.randint(5, 900) * 100))
+                   for component_id in rng.sample(range(1, 140), 3)]
+        warmup.catalog.apply_changes(changed)
+        warmup.catalog.remove(rng.sample(range(1, 140), 2))
+        warmup.on_catalog_change()
+        assert len(warmup.computed) == warmup.recomputed <= len(warmup.tasks())
+
+        rebuilt = fresh_table(warmup, tmp_path)
+        assert warmup.table == rebuilt.table
+        assert warmup.fingerprint_value == rebuilt.fingerprint_value
+
+
+def test_only_tiers_whose_windows_take_the_price_are_recomputed(warmup):
+    warmup.warm()
+    warmup.computed.clear()
+
+    # 150,000 is above the 20k, 50k and 100k tiers' windows: only the 200k builds can use it
+    warmup.catalog.apply_changes([row(900, 'cpu', 150000.0)])
+    warmup.on_catalog_change()
+    assert set(warmup.computed) == {200000}
+    assert warmup.generator.premade_builds_cache.contains(warmup.catalog.version,
+                                                         warmup.generator.cache_key(20000, []))
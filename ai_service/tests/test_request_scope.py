@@ -0,0 +1,102 @@
+"""RequestScope connection reuse and the scopes tier workers run in"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    """Fake pool: each checkout is a new object; released ones are recorded"""
+    released = []
+    checked_out = []
+
+    def checkout():
+        conn = object()
+        checked_out.append(conn)
+        return conn, 0.0
+
+    monkeypatch.setattr(app.db_manager, '_checkout', checkout)
+    monkeypatch.setattr(app.db_manager, '_release', released.append)
+    return checked_out, released
+
+
+def test_scope_checks_out_once_and_releases_at_the_end(connections):
+    checked_out, released = connections
+    with app.db_manager.request_scope() as scope:
+        first = app.db_manager.get_connection()
+        first.close()
+        second = app.db_manager.get_connection()
+        assert first._conn is second._conn
+        assert scope.stats()['connection_uses'] == 2
+    assert checked_out == released and len(checked_out) == 1
+
+
+def test_workers_get_their_own_connection_and_share_the_memo(connections):
+    checked_out, released = connections
+
+    def worker():
+        scope = app.db_manager.current_scope()
+        conn = app.db_manager.get_connection()
+        conn.close()
+        return scope, conn._conn
+
+    with app.db_manager.request_scope() as request:
+        run = app.db_manager.in_worker_scope(worker)  # bound on the request thread
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            results = list(executor.map(lambda _: run(), range(3)))
+        assert request.conn is None  # the request itself never reached SQL
+
+    scopes = [scope for scope, _ in results]
+    assert all(scope is not request and scope.memo is request.memo for scope in scopes)
+    assert len({conn for _, conn in results}) == 3
+    assert sorted(map(id, released)) == sorted(map(id, checked_out))
+
+
+def test_worker_scope_without_a_request_is_a_no_op():
+    def current():
+        return app.db_manager.current_scope()
+
+    assert app.db_manager.in_worker_scope(current) is current
+
+
+class FakeCursor:
+    def execute(self, sql, params=()):
+        self.sql = sql
+
+    def fetchone(self):
+        return (1,)  # the index exists
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def cursor(self, dictionary=False):
+        return FakeCursor()
+
+
+@pytest.mark.parametrize('search', [
+    lambda db: db.fuzzy_search_components('ryzen 7 7800x3d', component_type='cpu'),
+    lambda db: db.search_components(component_type='cpu', model_query='7800x3d'),
+], ids=['fuzzy', 'model_query'])
+def test_schema_lookups_never_nest_a_checkout(search, monkeypatch):
+    in_use = []
+    peak = []
+
+    def checkout():
+        in_use.append(1)
+        peak.append(len(in_use))
+        return FakeConnection(), 0.0
+
+    monkeypatch.setattr(app.db_manager, '_checkout', checkout)
+    monkeypatch.setattr(app.db_manager, '_release', lambda conn: in_use.pop())
+    monkeypatch.setattr(app.db_manager, '_schema', {})
+
+    search(app.db_manager)
+    assert max(peak) == 1 and not in_use
+    assert app.db_manager._schema  # looked up, before the search's own checkout
@@ -0,0 +1,139 @@
+"""TaglishNormalizer's lexicon and coverage, and when TagalogTranslator skips the API"""
+import pytest
+
+import app
+
+
+@pytest.fixture
+def normalizer():
+    return app.TaglishNormalizer()
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, text, status=200, details=''):
+        self.text = text
+        self.status = status
+        self.details = details
+
+    def json(self):
+        return {'responseData': {'translatedText': self.text}, 'responseStatus': self.status,
+                'responseDetails': self.details}
+
+
+@pytest.fixture
+def api_calls(monkeypatch):
+    calls = []
+
+    def get(url, params=None, timeout=None):
+        calls.append(params['q'])
+        return FakeResponse('translated by the api')
+
+    monkeypatch.setattr(app.requests, 'get', get)
+    return calls
+
+
+@pytest.mark.parametrize('message, expected', [
+    ('ano', 'what'),
+    ('ano ang best pc', 'what is best pc'),  # "ano ang" beats "ano" + "ang"
+    ('hindi', 'not'),
+    ('hindi ko alam', "i don't know"),  # not "not my know"
+    ('gusto ko ng mabilis na pc', 'i want fast pc'),
+    ('magkano aabutin', 'how much will it cost'),
+    ('pakitulungan mo ako', 'please help me'),
+])
+def test_longest_phrase_wins(normalizer, message, expected):
+    assert normalizer.normalize(message) == (expected, 1.0)
+
+
+def test_longest_match_falls_back_to_shorter_prefix():
+    # "a b c" is a phrase but the message stops at "a b": the trie backs off to "a b"
+    normalizer = app.TaglishNormalizer({'a': 'x', 'a b': 'y', 'a b c': 'z'}, english=frozenset())
+    assert normalizer.normalize('a b d')[0] == 'y d'
+    assert normalizer.normalize('a b c')[0] == 'z'
+    assert normalizer.normalize('a c')[0] == 'x c'
+
+
+def test_coverage_counts_only_non_english_words(normalizer):
+    # One unknown Tagalog word among mostly English ones is not outweighed by them
+    text, coverage = normalizer.normalize('basta amd gaming pc 40k')
+    assert text == 'basta amd gaming pc 40k'
+    assert coverage == 0.0
+
+    assert normalizer.normalize('ayaw ko ng intel basta amd')[1] == 0.75
+    assert normalizer.normalize('gaming pc 40k') == ('gaming pc 40k', 1.0)
+
+
+def test_negation_is_kept(normalizer):
+    assert normalizer.normalize('ayoko ng intel gusto ko amd 40k') == ("i don't want intel i want amd 40k", 1.0)
+    assert normalizer.normalize('ayaw ko ng intel')[0] == "i don't want intel"
+
+
+@pytest.mark.parametrize('message', [
+    'may gpu na ako',
+    'meron na ako ng ram',
+    'magkano ang rtx 4060 na',
+])
+def test_na_as_already_is_left_to_the_api(normalizer, message):
+    text, coverage = normalizer.normalize(message)
+    assert 'na' in text.split()
+    assert coverage < 1.0
+
+
+@pytest.mark.parametrize('message, expected', [
+    ('hanggang 30 libo', 'within 30k'),
+    ('build pc hanggang 30 libong piso', 'build pc within 30k pesos'),
+    ('2.5 libo', '2.5k'),
+    ('ilang libo', 'how many thousand'),  # no number: the word is translated
+])
+def test_thousands(normalizer, message, expected):
+    assert normalizer.normalize(message) == (expected, 1.0)
+
+
+def test_thousands_reach_the_price_parser(normalizer):
+    text, _ = normalizer.normalize('hanggang 30 libo')
+    constraints = app.SmartQueryParser().parse_query(text)['price_constraints']
+    assert list(constraints.values()) == [30000.0]
+
+
+def test_covered_message_is_translated_locally(api_calls):
+    translator = app.TagalogTranslator()
+    assert translator.translate_to_english('Ano ang pinakamurang gaming pc') == 'what is cheapest gaming pc'
+    assert api_calls == []
+    assert translator.stats()['local'] == 1
+
+
+@pytest.mark.parametrize('message', [
+    'ano ang basta gaming pc',  # one unknown word
+    'may gpu na ako',
+])
+def test_unknown_words_go_to_the_api(api_calls, message):
+    translator = app.TagalogTranslator()
+    assert translator.translate_to_english(message) == 'translated by the api'
+    assert api_calls == [message]
+    assert translator.stats()['api_calls'] == 1
+    assert translator.stats()['local_ratio'] == 0.0
+
+
+def test_min_coverage_is_configurable(api_calls):
+    translator = app.TagalogTranslator(min_coverage=0.7)
+    assert translator.translate_to_english('ayaw ko ng intel basta amd') == "i don't want intel basta amd"
+    assert api_calls == []
+
+
+@pytest.mark.parametrize('response', [
+    FakeResponse('MYMEMORY WARNING: YOU USED ALL AVAILABLE FREE TRANSLATIONS FOR TODAY.', status=429,
+                 details='MYMEMORY WARNING: YOU USED ALL AVAILABLE FREE TRANSLATIONS FOR TODAY.'),
+    FakeResponse('QUERY LENGTH LIMIT EXCEEDED', status='403'),
+    FakeResponse('[ ]'),  # nothing left once cleaned
+])
+def test_api_errors_are_not_cached(response, monkeypatch, tmp_path):
+    monkeypatch.setattr(app.requests, 'get', lambda url, params=None, timeout=None: response)
+    store = app.SharedCacheStore(tmp_path / 'cache.sqlite3')
+    translator = app.TagalogTranslator(store)
+    message = 'ano ang basta gaming pc'
+
+    assert translator.translate_to_english(message) == message
+    assert translator.cache.get(message) is app.MessageCache.MISSING
+    assert store.get(translator.STORE_NAMESPACE, translator.STORE_VERSION, message) is None
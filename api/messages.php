@@ -196,9 +196,32 @@ function sendMessage($conn, $userId) {
     error_log("Recommendation ID: " . ($recommendationId ?? 'NULL'));
     
     // Save AI response with proper data_type and recommendation_id
+    // The AI service writes recommendations behind its response, so the referenced row can
+    // arrive a moment later: retry on the foreign key (1452) before saving the message unlinked
     $stmt = $conn->prepare("INSERT INTO messages (thread_id, role, content, data_type, recommendation_id) VALUES (?, 'assistant', ?, ?, ?)");
     $stmt->bind_param("issi", $threadId, $content, $dataType, $recommendationId);
-    $stmt->execute();
+    for ($attempt = 1; ; $attempt++) {
+        try {
+            if ($stmt->execute()) {
+                break;
+            }
+            $errno = $stmt->errno;
+        } catch (mysqli_sql_exception $e) {
+            $errno = $e->getCode();
+            if ($errno !== 1452) {
+                throw $e;
+            }
+        }
+        if ($errno !== 1452 || $recommendationId === null) {
+            break;
+        }
+        if ($attempt >= 10) {
+            error_log("Recommendation $recommendationId not persisted in time, saving message without it");
+            $recommendationId = null;
+            continue;
+        }
+        usleep(100000);
+    }
     $aiMessageId = $conn->insert_id;
     
     // Get updated thread info
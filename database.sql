@@ -69,6 +69,7 @@ CREATE TABLE IF NOT EXISTS recommendations (
 CREATE TABLE IF NOT EXISTS recommendation_components (
     id INT AUTO_INCREMENT PRIMARY KEY,
     recommendation_id INT NOT NULL,
+    component_id INT NULL,
     component_type VARCHAR(50) NOT NULL,
     brand VARCHAR(100),
     model VARCHAR(255),
@@ -79,10 +80,23 @@ CREATE TABLE IF NOT EXISTS recommendation_components (
     tier VARCHAR(20) DEFAULT 'balanced',
     FOREIGN KEY (recommendation_id) REFERENCES recommendations(id) ON DELETE CASCADE,
     INDEX idx_recommendation_id (recommendation_id),
+    INDEX idx_component_id (component_id),
     INDEX idx_component_type (component_type),
     INDEX idx_tier (tier)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Existing databases: add component_id (reference storage) when the table predates it
+SET @rc_component_id = (
+    SELECT COUNT(*) FROM information_schema.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'recommendation_components' AND COLUMN_NAME = 'component_id'
+);
+SET @rc_migration = IF(@rc_component_id = 0,
+    'ALTER TABLE recommendation_components ADD COLUMN component_id INT NULL AFTER recommendation_id, ADD INDEX idx_component_id (component_id)',
+    'SELECT 1');
+PREPARE rc_migration_stmt FROM @rc_migration;
+EXECUTE rc_migration_stmt;
+DEALLOCATE PREPARE rc_migration_stmt;
+
 -- New recommendation_tiers table for multiple recommendations
 CREATE TABLE IF NOT EXISTS recommendation_tiers (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -94,6 +108,16 @@ CREATE TABLE IF NOT EXISTS recommendation_tiers (
     INDEX idx_recommendation_id (recommendation_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Recommendation id reservation for the AI service's write-behind persistence
+-- (ids are handed out in blocks so a response can carry its id before the row is written)
+CREATE TABLE IF NOT EXISTS recommendation_id_sequence (
+    id TINYINT PRIMARY KEY,
+    next_id BIGINT NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+INSERT IGNORE INTO recommendation_id_sequence (id, next_id)
+SELECT 1, COALESCE(MAX(id), 0) + 1 FROM recommendations;
+
 -- User preferences table
 CREATE TABLE IF NOT EXISTS user_preferences (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -117,5 +141,46 @@ CREATE TABLE IF NOT EXISTS components (
     last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP, 
     INDEX idx_type (type), 
     INDEX idx_brand (brand), 
-    INDEX idx_model (model) 
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
\ No newline at end of file
+    INDEX idx_model (model),
+    INDEX idx_last_updated (last_updated),
+    FULLTEXT INDEX ft_model (model),
+    FULLTEXT INDEX ft_brand_model (brand, model)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Existing databases: add the FULLTEXT indexes used by model search when the table predates
+-- them (each index is checked on its own, so a table that has one of them still gets the other)
+SET @ft_model_exists = (
+    SELECT COUNT(*) FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'components' AND INDEX_NAME = 'ft_model'
+);
+SET @components_migration = IF(@ft_model_exists = 0,
+    'ALTER TABLE components ADD FULLTEXT INDEX ft_model (model)',
+    'SELECT 1');
+PREPARE components_migration_stmt FROM @components_migration;
+EXECUTE components_migration_stmt;
+DEALLOCATE PREPARE components_migration_stmt;
+
+SET @ft_brand_model_exists = (
+    SELECT COUNT(*) FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'components' AND INDEX_NAME = 'ft_brand_model'
+);
+SET @components_migration = IF(@ft_brand_model_exists = 0,
+    'ALTER TABLE components ADD FULLTEXT INDEX ft_brand_model (brand, model)',
+    'SELECT 1');
+PREPARE components_migration_stmt FROM @components_migration;
+EXECUTE components_migration_stmt;
+DEALLOCATE PREPARE components_migration_stmt;
+
+-- Deleted components, for the AI service's catalog refresher (it polls by last_updated,
+-- which a deleted row can no longer carry). The refresher prunes rows older than
+-- CATALOG_TOMBSTONE_RETENTION (one day by default) on each full reload.
+CREATE TABLE IF NOT EXISTS component_deletions (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    component_id INT NOT NULL,
+    deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_deleted_at (deleted_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+DROP TRIGGER IF EXISTS components_after_delete;
+CREATE TRIGGER components_after_delete AFTER DELETE ON components
+FOR EACH ROW INSERT INTO component_deletions (component_id) VALUES (OLD.id);